@@ -5,11 +5,123 @@ Handles anomaly detection, statistical analysis, and behavior profiling.
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from speed_stats import speed_stats
+
+# Columnar anomaly records: one row per anomaly, speed anomalies first, then loitering
+ANOMALY_SPEED = 1
+ANOMALY_LOITERING = 2
+SEVERITY_MEDIUM = 1
+SEVERITY_HIGH = 2
+
+ANOMALY_DTYPE = np.dtype([
+    ('row', np.uint32),        # Fleet row (index into the input arrays)
+    ('kind', np.uint8),        # ANOMALY_SPEED / ANOMALY_LOITERING
+    ('severity', np.uint8),    # SEVERITY_MEDIUM / SEVERITY_HIGH
+    ('speed', np.float64),
+    ('z', np.float64),         # Speed z-score (NaN when not computed)
+])
+
+ANOMALY_TYPES = {ANOMALY_SPEED: 'SPEED_ANOMALY', ANOMALY_LOITERING: 'LOITERING_RISK'}
+SEVERITY_NAMES = {SEVERITY_MEDIUM: 'MEDIUM', SEVERITY_HIGH: 'HIGH'}
+
+LOITER_MIN_KTS = 0.1
+LOITER_MAX_KTS = 3.0
+
+
+def _to_float(value):
+    """Numeric coercion matching pd.to_numeric(errors='coerce').fillna(0)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if value != value else value
+
 
 class AISAnalytics:
     def __init__(self):
         self.anomaly_threshold_std = 2.5 # Z-score threshold
 
+    def detect_anomaly_array(self, speed, is_tanker, z=None):
+        """
+        Vectorized anomaly pass over fleet columns.
+        speed: float array (knots), is_tanker: bool array of the same length.
+        z: optional precomputed speed z-scores (NaN = no baseline); a fleet-wide z-score is used if omitted.
+        Returns a structured array of ANOMALY_DTYPE records.
+        """
+        speed = np.nan_to_num(np.asarray(speed, dtype=np.float64))
+        n = len(speed)
+        if n == 0:
+            return np.zeros(0, dtype=ANOMALY_DTYPE)
+
+        # 1. Speed Anomalies (Z-Score)
+        # Per-type/per-history scores come from speed_stats; fall back to a global z-score
+        speed_rows = np.zeros(0, dtype=np.int64)
+        if z is not None:
+            z = np.asarray(z, dtype=np.float64)
+            speed_rows = np.flatnonzero(np.abs(z) > self.anomaly_threshold_std)
+        elif n > 1:
+            std_speed = speed.std(ddof=1)
+            if std_speed > 0.1:
+                z = (speed - speed.mean()) / std_speed
+                speed_rows = np.flatnonzero(np.abs(z) > self.anomaly_threshold_std)
+
+        # 2. Loitering Detection (Pollution/Smuggling Risk)
+        # Vessel moving very slowly for extended periods in open ocean
+        loiter_rows = np.flatnonzero((speed < LOITER_MAX_KTS) & (speed > LOITER_MIN_KTS))
+
+        n_speed = len(speed_rows)
+        out = np.empty(n_speed + len(loiter_rows), dtype=ANOMALY_DTYPE)
+        out['row'][:n_speed] = speed_rows
+        out['kind'][:n_speed] = ANOMALY_SPEED
+        out['severity'][:n_speed] = SEVERITY_MEDIUM
+        out['z'][:n_speed] = z[speed_rows] if z is not None else np.nan
+
+        out['row'][n_speed:] = loiter_rows
+        out['kind'][n_speed:] = ANOMALY_LOITERING
+        out['severity'][n_speed:] = np.where(np.asarray(is_tanker, dtype=bool)[loiter_rows], SEVERITY_HIGH, SEVERITY_MEDIUM)
+        out['z'][n_speed:] = z[loiter_rows] if z is not None else np.nan
+
+        out['speed'] = speed[out['row']]
+        return out
+
+    def detect_fleet_anomalies(self, fleet, stats=speed_stats):
+        """
+        Anomaly records straight from the FleetState arrays (no dict or DataFrame round-trip).
+        Speed z-scores are read from the streaming per-type and per-vessel accumulators;
+        whichever baseline deviates more is reported.
+        """
+        if stats.epoch != fleet.epoch:
+            stats.update(fleet)
+        with fleet.lock:
+            tanker_types = np.fromiter((t.lower().endswith('tanker') for t in fleet.types), dtype=bool, count=len(fleet.types))
+            is_tanker = tanker_types[fleet.type_code] if len(tanker_types) else np.zeros(len(fleet.speed), dtype=bool)
+            type_z, history_z = stats.zscores(fleet)
+            use_history = np.nan_to_num(np.abs(history_z)) > np.nan_to_num(np.abs(type_z))
+            z = np.where(use_history, history_z, type_z)
+            return self.detect_anomaly_array(fleet.speed, is_tanker, z)
+
+    def format_details(self, kind, speed, z):
+        """Human readable description for one anomaly"""
+        if kind == ANOMALY_SPEED:
+            return f"Abnormal speed: {speed} kts (Z-score: {z:.2f})"
+        return f"Suspicious loitering detected at {speed} kts. Risk of illegal discharge."
+
+    def to_records(self, anomalies, imos, names):
+        """Expand an anomaly array into the API's list of anomaly dicts"""
+        return [
+            {
+                'type': ANOMALY_TYPES[kind],
+                'severity': SEVERITY_NAMES[severity],
+                'vessel_imo': imos[row],
+                'vessel_name': names[row],
+                'details': self.format_details(kind, speed, z)
+            }
+            for row, kind, severity, speed, z in zip(
+                anomalies['row'].tolist(), anomalies['kind'].tolist(), anomalies['severity'].tolist(),
+                anomalies['speed'].tolist(), anomalies['z'].tolist()
+            )
+        ]
+
     def detect_anomalies(self, vessel_data_list):
         """
         Detect operational anomalies in a list of vessel dictionaries.
@@ -18,53 +130,14 @@ class AISAnalytics:
         if not vessel_data_list:
             return []
 
-        df = pd.DataFrame(vessel_data_list)
-        anomalies = []
-
-        # Ensure numeric types
-        df['speed'] = pd.to_numeric(df['speed'], errors='coerce').fillna(0)
-        df['course'] = pd.to_numeric(df['course'], errors='coerce').fillna(0)
+        n = len(vessel_data_list)
+        speed = np.fromiter((_to_float(v.get('speed')) for v in vessel_data_list), dtype=np.float64, count=n)
+        is_tanker = np.fromiter((str(v.get('type') or '').lower().endswith('tanker') for v in vessel_data_list), dtype=bool, count=n)
+        anomalies = self.detect_anomaly_array(speed, is_tanker)
 
-        # 1. Speed Anomalies (Global Z-Score)
-        # In a real app, this should be per-vessel-type or per-vessel-history
-        mean_speed = df['speed'].mean()
-        std_speed = df['speed'].std()
-        
-        if std_speed > 0.1:
-            df['speed_z'] = (df['speed'] - mean_speed) / std_speed
-            
-            # SUDDEN STOP or OVERSPEED
-            anomalous_speeds = df[df['speed_z'].abs() > self.anomaly_threshold_std]
-            for _, row in anomalous_speeds.iterrows():
-                anomalies.append({
-                    'type': 'SPEED_ANOMALY',
-                    'severity': 'MEDIUM',
-                    'vessel_imo': row.get('imo'),
-                    'vessel_name': row.get('name'),
-                    'details': f"Abnormal speed: {row['speed']} kts (Z-score: {row['speed_z']:.2f})"
-                })
-
-        # 2. Stationary but drift (potential engine failure or disabled)
-        # Speed < 1.0 but course changing wildly (simulated logic)
-        
-        # 3. Loitering Detection (Pollution/Smuggling Risk)
-        # Vessel moving very slowly for extended periods in open ocean
-        loitering_vessels = df[(df['speed'] < 3.0) & (df['speed'] > 0.1)]
-        for _, row in loitering_vessels.iterrows():
-            anomalies.append({
-                'type': 'LOITERING_RISK',
-                'severity': 'HIGH' if row.get('type', '').lower().endswith('tanker') else 'MEDIUM',
-                'vessel_imo': row.get('imo'),
-                'vessel_name': row.get('name'),
-                'details': f"Suspicious loitering detected at {row['speed']} kts. Risk of illegal discharge."
-            })
-
-        # 4. Potential Dumping / S-Turn Detection (Simulated)
-        # Speed changes + sharp course turns often indicate dumping
-        # We simulate this by checking for high variance if we had history, 
-        # but for single-frame we'll use a random probability for demonstration if metadata suggests
-        
-        return anomalies
+        imos = [v.get('imo') for v in vessel_data_list]
+        names = [v.get('name') for v in vessel_data_list]
+        return self.to_records(anomalies, imos, names)
 
     def analyze_vessel_history(self, history_points):
         """
@@ -0,0 +1,227 @@
+"""
+AIS Parquet Cache for SeaTrace
+Normalized AIS positions from raw CSV dumps, written once as a Parquet dataset partitioned by date and lat/lon tile.
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from kaggle_ais_processor import AIS_COLUMN_MAPPINGS, AIS_CHUNK_ROWS, AIS_FLOAT_FIELDS, ingest_tasks, read_ais_chunks, run_ingest_tasks
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+    print("Warning: pyarrow not available, AIS Parquet cache disabled. Install with: pip install pyarrow")
+
+TILE_DEG = int(os.environ.get('AIS_CACHE_TILE_DEG', 30))  # Size of the lat/lon partition tiles
+MANIFEST_FILE = '_manifest.json'
+CACHE_VERSION = 1
+
+# Canonical column names (first name of each mapping), as in KaggleAISProcessor.stream_latest_records
+FIELD_COLUMNS = {key: names[0] for key, names in AIS_COLUMN_MAPPINGS.items()}
+TS_COLUMN = FIELD_COLUMNS['timestamp']
+SEQ_COLUMN = '_seq'             # Global row order, breaks timestamp ties like file order did
+SEQ_TASK_SHIFT = 40             # _seq = task index << 40 | row within the task
+PARTITION_COLUMNS = ['date', 'tile_lat', 'tile_lon']
+
+
+def _schema():
+    fields = []
+    for key, col in FIELD_COLUMNS.items():
+        if key in AIS_FLOAT_FIELDS:
+            fields.append(pa.field(col, pa.float32()))
+        elif key == 'timestamp':
+            fields.append(pa.field(col, pa.timestamp('ms')))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    fields.append(pa.field(SEQ_COLUMN, pa.int64()))
+    fields += [pa.field('date', pa.string()), pa.field('tile_lat', pa.int16()), pa.field('tile_lon', pa.int16())]
+    return pa.schema(fields)
+
+
+def _tile(values):
+    return (np.floor(values / TILE_DEG) * TILE_DEG).astype(np.int16)
+
+
+def source_fingerprint(csv_files: List[Path]) -> List[Dict]:
+    """Name, size and mtime of every source file (cache is rebuilt when any of them changes)"""
+    return [{'name': f.name, 'size': f.stat().st_size, 'mtime': int(f.stat().st_mtime)} for f in csv_files]
+
+
+class AISParquetCache:
+    """Partitioned Parquet cache of one AIS dataset"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.manifest_path = self.cache_dir / MANIFEST_FILE
+
+    def manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, dataset_path: Path, file_pattern: str = "*.csv") -> bool:
+        """True if the cache was built from exactly the current source files"""
+        manifest = self.manifest()
+        if not PARQUET_AVAILABLE or not manifest or manifest.get('version') != CACHE_VERSION:
+            return False
+        return manifest.get('sources') == source_fingerprint(sorted(Path(dataset_path).glob(file_pattern)))
+
+    def build(self, dataset_path: Path, file_pattern: str = "*.csv", chunk_rows: int = AIS_CHUNK_ROWS,
+              workers: int = 1) -> bool:
+        """Parse every CSV once (chunked, mapped columns only) and write the partitioned dataset"""
+        if not PARQUET_AVAILABLE:
+            return False
+
+        csv_files = sorted(Path(dataset_path).glob(file_pattern))
+        if not csv_files:
+            print(f"No CSV files found in {dataset_path}")
+            return False
+
+        # Build into a fresh directory and swap it in, so readers never see a half-written cache
+        build_dir = self.cache_dir.with_name(self.cache_dir.name + '.building')
+        if build_dir.exists():
+            _remove_tree(build_dir)
+        build_dir.mkdir(parents=True)
+        started = datetime.now()
+
+        # Each task (file or byte range) writes its own part files; workers share nothing
+        tasks = [
+            (task_index, str(build_dir), csv_file, start, end, chunk_rows)
+            for task_index, (csv_file, start, end, _, _) in enumerate(ingest_tasks(csv_files, workers, None, chunk_rows))
+        ]
+        results = list(run_ingest_tasks(cache_task, tasks, workers))
+        if any(rows is None for rows, _ in results):
+            _remove_tree(build_dir)
+            return False
+        rows = sum(r for r, _ in results)
+
+        manifest = {
+            'version': CACHE_VERSION,
+            'built_at': datetime.now().isoformat(),
+            'sources': source_fingerprint(csv_files),
+            'rows': rows,
+            'id_field': 'imo' if any(has_imo for _, has_imo in results) else 'mmsi',
+            'tile_deg': TILE_DEG
+        }
+        with open(build_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        if self.cache_dir.exists():
+            _remove_tree(self.cache_dir)
+        os.replace(build_dir, self.cache_dir)
+        print(f"Cached {rows} AIS records to {self.cache_dir} in {(datetime.now() - started).total_seconds():.1f}s")
+        return True
+
+    def dataset(self):
+        """Memory-mapped pyarrow dataset over the cache"""
+        return ds.dataset(
+            self.cache_dir, format='parquet', partitioning='hive',
+            filesystem=pafs.LocalFileSystem(use_mmap=True),
+            exclude_invalid_files=True
+        )
+
+    def _filter(self, region_filter: Optional[Dict] = None, dates: Optional[List[str]] = None):
+        expr = None
+        if region_filter:
+            lat_min = region_filter.get('lat_min', 5)
+            lat_max = region_filter.get('lat_max', 25)
+            lon_min = region_filter.get('lon_min', 65)
+            lon_max = region_filter.get('lon_max', 100)
+            lat, lon = ds.field(FIELD_COLUMNS['lat']), ds.field(FIELD_COLUMNS['lon'])
+            # Partition fields prune whole tiles; the row filter trims the edges
+            expr = (
+                (ds.field('tile_lat') >= int(_tile(np.array([lat_min]))[0])) &
+                (ds.field('tile_lat') <= int(_tile(np.array([lat_max]))[0])) &
+                (ds.field('tile_lon') >= int(_tile(np.array([lon_min]))[0])) &
+                (ds.field('tile_lon') <= int(_tile(np.array([lon_max]))[0])) &
+                (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+            )
+        if dates:
+            date_expr = ds.field('date').isin(list(dates))
+            expr = date_expr if expr is None else expr & date_expr
+        return expr
+
+    def query(self, region_filter: Optional[Dict] = None, columns: Optional[List[str]] = None,
+              dates: Optional[List[str]] = None) -> pd.DataFrame:
+        """Positions in a region / set of dates, reading only the needed partitions and columns"""
+        table = self.dataset().to_table(columns=columns, filter=self._filter(region_filter, dates))
+        return table.to_pandas()
+
+    def latest_records(self, region_filter: Optional[Dict] = None, dates: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Latest record per vessel (same shape as KaggleAISProcessor.stream_latest_records)"""
+        manifest = self.manifest() or {}
+        id_col = FIELD_COLUMNS[manifest.get('id_field', 'mmsi')]
+        columns = list(FIELD_COLUMNS.values()) + [SEQ_COLUMN]
+
+        df = self.query(region_filter, columns, dates)
+        df = df.dropna(subset=[id_col])
+        if df.empty:
+            return None
+        df = df.sort_values([TS_COLUMN, SEQ_COLUMN], kind='stable', na_position='first')
+        df = df.drop_duplicates(id_col, keep='last')
+        return df.drop(columns=[SEQ_COLUMN]).dropna(axis=1, how='all').reset_index(drop=True)
+
+
+def cache_task(task: tuple):
+    """
+    Worker: normalize one file / byte range and write its rows into the partitioned dataset.
+    Returns (rows read, file has an IMO column); rows is None on failure.
+    """
+    task_index, build_dir, csv_file, start, end, chunk_rows = task
+    name = Path(csv_file).name if start is None else f"{Path(csv_file).name} [{start}:{end}]"
+    schema = _schema()
+    partitioning = ds.partitioning(pa.schema([schema.field(c) for c in PARTITION_COLUMNS]), flavor='hive')
+    seq = task_index << SEQ_TASK_SHIFT
+    try:
+        actual_columns, chunks = read_ais_chunks(csv_file, start, end, chunk_rows)
+        if actual_columns is None:
+            print(f"Skipping {name}: no IMO/MMSI or position columns")
+            return 0, False
+
+        print(f"Caching {name}...")
+        for chunk_index, chunk in enumerate(chunks):
+            chunk[SEQ_COLUMN] = np.arange(seq, seq + len(chunk), dtype=np.int64)
+            seq += len(chunk)
+            chunk = chunk.dropna(subset=[FIELD_COLUMNS['lat'], FIELD_COLUMNS['lon']])
+            if chunk.empty:
+                continue
+
+            if TS_COLUMN in chunk.columns:
+                chunk[TS_COLUMN] = pd.to_datetime(chunk[TS_COLUMN], errors='coerce').astype('datetime64[ms]')
+                dates = chunk[TS_COLUMN].to_numpy().astype('datetime64[D]').astype(str)
+                chunk['date'] = np.where(dates == 'NaT', 'unknown', dates)
+            else:
+                chunk['date'] = 'unknown'
+            chunk['tile_lat'] = _tile(chunk[FIELD_COLUMNS['lat']].to_numpy())
+            chunk['tile_lon'] = _tile(chunk[FIELD_COLUMNS['lon']].to_numpy())
+
+            for col in schema.names:
+                if col not in chunk.columns:
+                    chunk[col] = None
+            table = pa.Table.from_pandas(chunk[schema.names], schema=schema, preserve_index=False)
+            ds.write_dataset(
+                table, build_dir, format='parquet', partitioning=partitioning,
+                basename_template=f"part-{task_index}-{chunk_index}-{{i}}.parquet",
+                existing_data_behavior='overwrite_or_ignore'
+            )
+        return seq - (task_index << SEQ_TASK_SHIFT), 'imo' in actual_columns
+    except Exception as e:
+        print(f"Error caching {name}: {e}")
+        return None, False
+
+
+def _remove_tree(path: Path):
+    shutil.rmtree(path, ignore_errors=True)
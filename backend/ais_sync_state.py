@@ -0,0 +1,126 @@
+"""
+AIS Incremental Sync State for SeaTrace
+Source file fingerprints, per-file latest records and per-vessel row hashes from the last sync, used to diff the next one.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from kaggle_ais_processor import AIS_COLUMN_MAPPINGS
+
+SYNC_STATE_VERSION = 1
+STATE_FILE = 'state.json'
+VESSELS_FILE = 'vessels.npz'
+HASH_BLOCK_BYTES = 1 << 20
+
+# Vessel fields derived from the AIS record. On vessels already in the store only these are
+# refreshed; generated fields (inspection dates, compliance, DWT estimates) are left alone.
+AIS_SOURCE_FIELDS = (
+    'name', 'mmsi', 'type', 'flag', 'company_name', 'company_logo', 'lat', 'lon',
+    'speed', 'course', 'risk_level', 'destination', 'eta', 'image'
+)
+
+# Canonical columns hashed per vessel (fixed order, so files with fewer columns hash the same way)
+HASH_COLUMNS = [names[0] for names in AIS_COLUMN_MAPPINGS.values()]
+
+
+def file_fingerprint(path: Path, previous: Optional[Dict] = None) -> Dict:
+    """
+    Size, mtime and content hash of a source file.
+    The hash is only recomputed when size or mtime differ from the previous fingerprint.
+    """
+    stat = path.stat()
+    size, mtime = stat.st_size, int(stat.st_mtime)
+    if previous and previous.get('size') == size and previous.get('mtime') == mtime:
+        return previous
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return {'size': size, 'mtime': mtime, 'hash': digest.hexdigest()}
+
+
+def row_hashes(latest: pd.DataFrame) -> np.ndarray:
+    """64-bit hash of every latest AIS record (one per vessel)"""
+    values = latest.reindex(columns=HASH_COLUMNS).astype(str)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def vessel_changes(existing: Optional[Dict], vessel: Dict) -> Dict:
+    """Whole vessel for a new IMO, otherwise only the AIS fields whose value changed"""
+    if existing is None:
+        return vessel
+    return {k: vessel[k] for k in AIS_SOURCE_FIELDS if k in vessel and existing.get(k) != vessel[k]}
+
+
+class AISSyncState:
+    """State of the last incremental sync of one AIS dataset"""
+
+    def __init__(self, state_dir):
+        self.state_dir = Path(state_dir)
+        self.state_path = self.state_dir / STATE_FILE
+        self.vessels_path = self.state_dir / VESSELS_FILE
+
+    def load(self, region_filter: Optional[Dict] = None) -> Dict:
+        """Last sync state; empty if missing, from another version or for another region"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if state.get('version') != SYNC_STATE_VERSION or state.get('region_filter') != (region_filter or None):
+            return {}
+        return state
+
+    def load_vessels(self):
+        """(imos, row hashes) of the vessels written by the last sync"""
+        try:
+            data = np.load(self.vessels_path)
+            return data['imos'].astype(object), data['hashes']
+        except (OSError, KeyError, ValueError):
+            return np.zeros(0, dtype=object), np.zeros(0, dtype=np.uint64)
+
+    def _partial_path(self, name: str) -> Path:
+        return self.state_dir / f"{name}.latest.pkl"
+
+    def has_partial(self, name: str) -> bool:
+        return self._partial_path(name).exists()
+
+    def load_partial(self, name: str) -> Optional[pd.DataFrame]:
+        """Latest record per vessel of one source file, as of the last sync (empty if it had none)"""
+        try:
+            return pd.read_pickle(self._partial_path(name))
+        except (OSError, ValueError, EOFError):
+            return None
+
+    def save_partial(self, name: str, latest: Optional[pd.DataFrame]):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        (latest if latest is not None else pd.DataFrame()).to_pickle(self._partial_path(name))
+
+    def remove_partial(self, name: str):
+        self._partial_path(name).unlink(missing_ok=True)
+
+    def save(self, files: Dict[str, Dict], region_filter: Optional[Dict], imos, hashes):
+        """Persist fingerprints and vessel hashes (tmp files + atomic rename, vessels first)"""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.vessels_path.with_suffix('.tmp.npz')
+        np.savez(tmp, imos=np.asarray(imos, dtype=str), hashes=np.asarray(hashes, dtype=np.uint64))
+        os.replace(tmp, self.vessels_path)
+
+        state = {
+            'version': SYNC_STATE_VERSION,
+            'synced_at': datetime.now().isoformat(),
+            'region_filter': region_filter or None,
+            'files': files,
+            'vessels': len(imos)
+        }
+        tmp = self.state_path.with_suffix('.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.state_path)
@@ -6,18 +6,20 @@ This application provides real-time vessel tracking, oil spill detection,
 and environmental monitoring for maritime operations.
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 # Apply eventlet monkey patching for async compatibility
 import eventlet
 eventlet.monkey_patch()
+from eventlet import tpool
 
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import jwt
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from functools import wraps
 import os
+import atexit
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
@@ -25,9 +27,20 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from io import BytesIO
 import random
+import numpy as np
 import requests
 import threading
 from data_manager import data_manager
+from fleet_state import fleet_state
+from vessel_stream import vessel_stream
+from spatial_index import fleet_grid, spill_grid, strike_grid
+from track_store import track_store, encode_polyline, TRACK_SAMPLE_TICKS, TRACK_BROADCAST_POINTS
+from response_cache import response_cache
+from live_aggregates import live_aggregates
+from vessel_index import (vessel_index, decode_cursor, encode_cursor, INDEXED_FIELDS,
+                          VESSEL_PAGE_DEFAULT, VESSEL_PAGE_MAX)
+from realtime_snapshot import (realtime_snapshots, revision_room, spill_payload, vessel_payload, vessel_position,
+                               REALTIME_SNAPSHOT_MAX_AGE)
 try:
     from kaggle_ais_processor import KaggleAISProcessor
     from kaggle_config import KAGGLE_DATASETS, REGION_FILTER
@@ -42,7 +55,11 @@ import threading
 
 # --- AI & Analytics Integration ---
 from ais_analytics import ais_analyzer
-from spill_forecasting import spill_forecaster
+from speed_stats import speed_stats
+from spill_forecasting import env_conditions_from, spill_forecaster
+from env_fields import available_fields, field_tile_cache
+from forecast_batch import expand_scenarios, forecast_batches
+from forecast_cache import forecast_cache, forecast_key, quantize_env
 from llm_service import llm_service
 from model_inference import model_inference
 # ----------------------------------
@@ -81,91 +98,67 @@ socketio = SocketIO(app, cors_allowed_origins=cors_origins, async_mode='eventlet
 simulation_thread = None
 simulation_active = True
 
+# Vessel tracks live in the track store (ring buffers), persisted next to the data files
+TRACKS_FILE = data_manager.data_dir / 'vessel_tracks.npz'
+track_store.load(TRACKS_FILE)
+atexit.register(track_store.save, TRACKS_FILE)
+
+# Clients still receiving JSON 'vessel_movement_batch' (not yet on the binary stream)
+legacy_movement_sids = set()
+
 def simulate_vessel_movement():
     """Background thread to update vessel positions based on course/speed"""
-    from math import cos, sin, radians
     print("Starting Vessel Movement Simulation...")
     tick_count = 0
     while simulation_active:
         vessels = data_manager.get_vessels()
         
-        # Performance: Only process active movement for a subset or batch updates
-        # For 5000 vessels, sending 5000 individual events is too heavy.
-        # We will collect updates and broadcast a lightweight 'vessel_update' event.
+        # Performance: kinematics live in NumPy arrays (fleet_state) and the whole
+        # fleet advances in one batched step. The dict view is only synced when needed.
+        fleet_state.ensure_loaded(vessels)
+        fleet_state.step()
+        sync_vessel_index()
+        speed_stats.update(fleet_state)
         
-        updated_vessels = []
+        # Track breadcrumb every TRACK_SAMPLE_TICKS ticks, straight from the fleet arrays
+        if tick_count % TRACK_SAMPLE_TICKS == 0:
+            track_store.record_fleet(fleet_state)
         
-        for imo, v in vessels.items():
-            # Initialize history if missing
-            if 'history' not in v: v['history'] = []
-            
-            # Move ~0.0005 deg per tick per 10kts (approx visual movement)
-            speed_factor = 0.0005 * (float(v.get('speed', 10)) / 10.0)
-            course_rad = radians(float(v.get('course', 0)))
-            
-            # Update lat/lon (Simulate movement along Great Circles roughly)
-            new_lat = v['lat'] + (speed_factor * cos(course_rad))
-            new_lon = v['lon'] + (speed_factor * sin(course_rad))
-            
-            # Simple boundary bounce logic (Indian Ocean / Global bounds)
-            if not (-80 <= new_lat <= 80): 
-                v['course'] = (v['course'] + 180 + random.uniform(-20, 20)) % 360
-                new_lat = max(-80, min(80, new_lat))
-            
-            # Wrap longitude for Pacific crossing
-            if new_lon > 180: new_lon = -180
-            if new_lon < -180: new_lon = 180
-            
-            v['lat'] = new_lat
-            v['lon'] = new_lon
-            
-            # Random course adjustment for realism (Wander)
-            if random.random() < 0.05:
-                v['course'] = (v['course'] + random.uniform(-2, 2)) % 360
-            
-            # Store history breadcrumb every 10 ticks (less frequent for performance)
-            if tick_count % 10 == 0:
-                v['history'].append({'lat': round(new_lat, 4), 'lon': round(new_lon, 4), 'timestamp': datetime.utcnow().isoformat()})
-                if len(v['history']) > 30: v['history'].pop(0) # Keep shorter tail for memory
-            
-            # Add to batch for frontend update (Optimization: Round coordinates)
-            updated_vessels.append({
-                'imo': imo,
-                'lat': round(new_lat, 4),
-                'lon': round(new_lon, 4),
-                'course': round(v['course'], 1),
-                'speed': v['speed']
-            })
-
-            # Check for Oil Spill Source Linkage... (Keep logic but optimize if needed)
-            # ... (omitted for brevity in this high-frequency loop, usually run less often)
+        # Binary delta stream: per-connection baseline, only vessels that moved
+        # Fan-out cost scales with what each client can see: viewport clients only get
+        # the rows inside their box (grid index), low zoom gets shared server-side clusters
+        if vessel_stream.has_clients():
+            vessel_stream.update(fleet_state, tick_count)
+            for sid, client in list(vessel_stream.clients.items()):
+                if client.wants_clusters():
+                    lat, lon, counts = fleet_grid.clusters_in_bbox(client.zoom, *client.bbox)
+                    socketio.emit('vessel_clusters', {
+                        'zoom': client.zoom,
+                        'clusters': [[round(la, 3), round(lo, 3), n] for la, lo, n in zip(lat.tolist(), lon.tolist(), counts.tolist())]
+                    }, to=sid)
+                    continue
+                rows = fleet_grid.query_bbox(*client.bbox) if client.bbox else None
+                frames, needs_index = vessel_stream.frames_for(sid, rows)
+                if needs_index:
+                    socketio.emit('vessel_stream_index', {'epoch': fleet_state.epoch, 'imos': fleet_state.imos}, to=sid)
+                for frame in frames:
+                    socketio.emit('vessel_stream', frame, to=sid)
         
-        # Broadcast BATCH update to frontend (efficient)
-        if updated_vessels:
+        # Legacy JSON BATCH update for clients that have not switched to the binary stream
+        if legacy_movement_sids:
+            updated_vessels = fleet_state.movement_batch()
             # Send in chunks of 500 to avoid packet size limits
             chunk_size = 500
             for i in range(0, len(updated_vessels), chunk_size):
                 chunk = updated_vessels[i:i + chunk_size]
-                socketio.emit('vessel_movement_batch', chunk)
+                socketio.emit('vessel_movement_batch', chunk, room='vessel_movement')
         
         # Run AIS Analytics every 5 ticks (approx 10s)
         if tick_count % 5 == 0:
             try:
-                # Convert dict to list for analyzer
-                current_vessel_list = list(vessels.values())
-                anomalies = ais_analyzer.detect_anomalies(current_vessel_list)
-                
-                # Create a set of anomalous IMOs for quick lookup
-                high_risk_imos = {a['vessel_imo']: a for a in anomalies}
-                
-                for imo, v in vessels.items():
-                    if imo in high_risk_imos:
-                        v['risk_level'] = 'High'
-                        v['risk_details'] = high_risk_imos[imo]['details']
-                    elif v.get('risk_level') == 'High' and random.random() < 0.1:
-                        # Decay risk if no longer anomalous (10% chance to clear per check to avoid flickering)
-                        v['risk_level'] = 'Low'
-                        v.pop('risk_details', None)
+                # Columnar pass over the fleet arrays; only flagged rows touch the dicts
+                anomalies = ais_analyzer.detect_fleet_anomalies(fleet_state)
+                apply_anomaly_flags(anomalies)
             except Exception as e:
                 print(f"Error in AIS Analytics Loop: {e}")
 
@@ -173,6 +166,133 @@ def simulate_vessel_movement():
         tick_count += 1
         socketio.sleep(1) # 1Hz update rate
 
+def sync_vessel_index():
+    """Keep the vessel spatial index in step with the fleet arrays (incremental between rebuilds)"""
+    if fleet_grid.epoch != fleet_state.epoch:
+        fleet_grid.build(fleet_state.lat, fleet_state.lon, keys=fleet_state.imos, epoch=fleet_state.epoch)
+    else:
+        fleet_grid.move(fleet_state.lat, fleet_state.lon)
+
+def apply_anomaly_flags(anomalies):
+    """Mark anomalous vessels High risk; previously flagged vessels decay back to Low"""
+    risk_changed = {}
+    with fleet_state.lock:
+        flagged = np.zeros(len(fleet_state.vessels), dtype=bool)
+        flagged[anomalies['row']] = True
+
+        # Later records win, so loitering details override speed details as before
+        for row, kind, speed, z in zip(anomalies['row'].tolist(), anomalies['kind'].tolist(),
+                                       anomalies['speed'].tolist(), anomalies['z'].tolist()):
+            v = fleet_state.vessels[row]
+            if v.get('risk_level') != 'High':
+                risk_changed[fleet_state.imos[row]] = v
+            v['risk_level'] = 'High'
+            v['risk_details'] = ais_analyzer.format_details(kind, speed, z)
+
+        # Decay risk if no longer anomalous (10% chance to clear per check to avoid flickering)
+        decay = fleet_state.high_risk & ~flagged
+        decay &= np.random.random(len(decay)) < 0.1
+        for row in np.flatnonzero(decay).tolist():
+            v = fleet_state.vessels[row]
+            risk_changed[fleet_state.imos[row]] = v
+            v['risk_level'] = 'Low'
+            v.pop('risk_details', None)
+        fleet_state.high_risk = (fleet_state.high_risk & ~decay) | flagged
+        fleet_state.version += 1
+        vessel_index.set_value('risk_level', anomalies['row'], 'High', fleet_state.epoch)
+        vessel_index.set_value('risk_level', np.flatnonzero(decay), 'Low', fleet_state.epoch)
+    live_aggregates.update_vessels(risk_changed)
+
+def get_spill_index():
+    """Spill spatial index, built on first use and extended as spills are added"""
+    if spill_grid.keys is None:
+        spills = list(data_manager.get_oil_spills().values())
+        spill_grid.build([float(s['lat']) for s in spills], [float(s['lon']) for s in spills],
+                         keys=[s['spill_id'] for s in spills])
+    return spill_grid
+
+def get_strike_index():
+    """Marine strike spatial index (keys are the strike records themselves)"""
+    if strike_grid.keys is None:
+        strikes = data_manager.get_marine_strikes()
+        strike_grid.build([float(s['lat']) for s in strikes], [float(s['lon']) for s in strikes], keys=strikes)
+    return strike_grid
+
+def get_live_vessels():
+    """Get the vessel dict with simulated positions written back from the fleet arrays"""
+    fleet_state.sync_to_dicts()
+    return data_manager.get_vessels()
+
+def get_live_vessel(imo):
+    """One vessel with its simulated position read from the fleet arrays (no write-back of the whole fleet)"""
+    fleet_state.ensure_loaded(data_manager.get_vessels())
+    return fleet_state.live_vessel(imo) or data_manager.get_vessel(imo)
+
+def cached_json_response(name, revision, build):
+    """
+    Serve a collection from the response cache: serialized (and compressed) once per revision
+    and shared by every request, 304 Not Modified when the client already has this revision.
+    """
+    snapshot = response_cache.get(name, revision, build)
+    if request.if_none_match.contains_weak(snapshot.etag):
+        response = Response(status=304)
+    else:
+        encoding = snapshot.encoding_for(request.headers.get('Accept-Encoding'))
+        response = Response(snapshot.body_for(encoding), status=200, mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    # Weak ETag: the same for every content coding of a revision
+    response.set_etag(snapshot.etag, weak=True)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def apply_vessel_changes(upserts, deletes=()):
+    """Apply vessel upserts/deletes to the store and patch the fleet arrays to match"""
+    # Simulated positions go into the dicts first, so merged fields land on current values
+    fleet_state.sync_to_dicts()
+    changes = data_manager.apply_vessel_changes(upserts, deletes)
+    vessels = data_manager.get_vessels()
+    live_aggregates.update_vessels({imo: vessels.get(imo) for imo in changes['added'] + changes['updated'] + changes['deleted']},
+                                   data_manager.revision('vessels'))
+    if changes['added'] or changes['deleted']:
+        fleet_state.load(data_manager.get_vessels())
+    else:
+        for imo in changes['updated']:
+            fleet_state.refresh_vessel(imo)
+    return changes
+
+# Incremental AIS sync (one at a time, runs as a background task)
+ais_sync_status = {'running': False, 'last': None}
+
+def plan_ais_sync(processor, dataset_name, download, vessels, workers):
+    """Download the dataset and compute the vessel diff (blocking: file hashing, CSV parsing, pandas)"""
+    dataset_path = processor.download_dataset(dataset_name) if download else processor.local_dataset_path(dataset_name)
+    if not dataset_path or not dataset_path.exists():
+        return None
+    return processor.plan_incremental_sync(dataset_path, vessels, region_filter=REGION_FILTER, workers=workers)
+
+def run_ais_sync(dataset_name, download, workers):
+    """Background task: diff the AIS dataset against the live store and apply only the changes"""
+    started = datetime.now()
+    try:
+        processor = KaggleAISProcessor(data_dir=data_manager.data_dir)
+        # Planning never yields to the hub, so it runs on a native thread; the simulation, broadcasts
+        # and requests carry on meanwhile. The diff is taken against a copy of the vessel mapping.
+        plan = tpool.execute(plan_ais_sync, processor, dataset_name, download, dict(data_manager.get_vessels()), workers)
+        if plan is None:
+            ais_sync_status['last'] = {'dataset': dataset_name, 'error': 'No AIS data available', 'finished_at': datetime.now().isoformat()}
+            return
+        apply_vessel_changes(plan['upserts'], plan['deletes'])
+        processor.commit_incremental_sync(plan)
+        ais_sync_status['last'] = dict(plan['summary'], dataset=dataset_name, started_at=started.isoformat(),
+                                       finished_at=datetime.now().isoformat())
+    except Exception as e:
+        print(f"Error in AIS sync: {e}")
+        ais_sync_status['last'] = {'dataset': dataset_name, 'error': str(e), 'finished_at': datetime.now().isoformat()}
+    finally:
+        ais_sync_status['running'] = False
+
 # Start simulation on first request (handled by app startup)
 @app.before_request
 def start_simulation():
@@ -519,24 +639,42 @@ def delete_user(email):
     return jsonify({'message': f'User {email} deleted successfully'}), 200
 
 # Audit Logging Endpoints
+def audit_log_range(args):
+    """since / until query parameters (ISO 8601, inclusive) as naive UTC timestamps comparable with the log's"""
+    bounds = []
+    for name in ('since', 'until'):
+        value = args.get(name)
+        if not value:
+            bounds.append(None)
+            continue
+        try:
+            moment = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f'Invalid {name} timestamp: {value}')
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        bounds.append(moment.isoformat())
+    return bounds
+
 @app.route('/api/admin/audit-logs', methods=['GET'])
 @token_required
 def get_audit_logs():
-    """Admin only: Get all audit logs"""
+    """Admin only: Get audit logs, newest first (limit / offset pagination, optional since / until)"""
     if request.user.get('role') != 'admin':
         log_access(request.user['email'], 'UNAUTHORIZED_AUDIT_LOGS', 'audit')
         return jsonify({'error': 'Admin access required'}), 403
     
     limit = request.args.get('limit', 100, type=int)
     offset = request.args.get('offset', 0, type=int)
+    try:
+        since, until = audit_log_range(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Get all audit logs from data manager
-    all_logs = data_manager.get_audit_logs()
-    # Return logs in reverse chronological order
-    logs = sorted(all_logs, key=lambda x: x['timestamp'], reverse=True)[offset:offset+limit]
+    total, logs = data_manager.query_audit_logs(since=since, until=until, offset=offset, limit=limit)
     
     return jsonify({
-        'total': len(all_logs),
+        'total': total,
         'count': len(logs),
         'logs': logs
     }), 200
@@ -544,18 +682,24 @@ def get_audit_logs():
 @app.route('/api/admin/audit-logs/user/<email>', methods=['GET'])
 @token_required
 def get_user_audit_logs(email):
-    """Admin only: Get audit logs for specific user"""
+    """Admin only: Get audit logs for specific user, newest first"""
     if request.user.get('role') != 'admin':
         log_access(request.user['email'], 'UNAUTHORIZED_USER_AUDIT', 'audit', {'target_user': email})
         return jsonify({'error': 'Admin access required'}), 403
     
     limit = request.args.get('limit', 50, type=int)
-    all_logs = data_manager.get_audit_logs()
-    user_logs = [log for log in all_logs if log['user_email'] == email]
-    user_logs = sorted(user_logs, key=lambda x: x['timestamp'], reverse=True)[:limit]
+    offset = request.args.get('offset', 0, type=int)
+    try:
+        since, until = audit_log_range(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    total, user_logs = data_manager.query_audit_logs(user_email=email, since=since, until=until,
+                                                     offset=offset, limit=limit)
     
     return jsonify({
         'user_email': email,
+        'total': total,
         'count': len(user_logs),
         'logs': user_logs
     }), 200
@@ -563,10 +707,73 @@ def get_user_audit_logs(email):
 @app.route('/api/vessels', methods=['GET'])
 @token_required
 def get_vessels():
-    """Get all vessels - viewable by all roles"""
+    """
+    Get all vessels - viewable by all roles. With any listing parameter (limit, cursor, fields,
+    q, bbox, min_speed, max_speed, type, flag, risk_level, status) one page is returned instead.
+    """
     log_access(request.user['email'], 'VIEW', 'vessels_list')
-    vessels_dict = data_manager.get_vessels()
-    return jsonify(list(vessels_dict.values())), 200
+    if any(param in request.args for param in VESSEL_LISTING_PARAMS):
+        try:
+            return jsonify(list_vessels(request.args)), 200
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    def build():
+        vessels_dict = get_live_vessels()
+        tracks = track_store.polylines(list(vessels_dict.keys()))
+        return [dict(v, track=tracks[imo]) for imo, v in vessels_dict.items()]
+
+    # Positions and tracks change with each simulation step, everything else through the data manager
+    revision = (fleet_state.epoch, fleet_state.version, data_manager.revision('vessels'))
+    return cached_json_response('vessels', revision, build)
+
+VESSEL_LISTING_PARAMS = ('limit', 'cursor', 'fields', 'q', 'bbox', 'min_speed', 'max_speed') + INDEXED_FIELDS
+
+def list_vessels(args):
+    """One page of the vessel listing: indexed filters, IMO-ordered cursor pagination and fields= projection"""
+    filters = {field: [v for v in args[field].split(',') if v.strip()] for field in INDEXED_FIELDS if args.get(field)}
+    limit = args.get('limit', VESSEL_PAGE_DEFAULT, type=int)
+    if not 1 <= limit <= VESSEL_PAGE_MAX:
+        raise ValueError(f"limit must be between 1 and {VESSEL_PAGE_MAX}")
+    after = decode_cursor(args['cursor']) if args.get('cursor') else None
+    fields = [f.strip() for f in args['fields'].split(',') if f.strip()] if args.get('fields') else None
+    try:
+        min_speed = float(args['min_speed']) if args.get('min_speed') else None
+        max_speed = float(args['max_speed']) if args.get('max_speed') else None
+        bbox = [float(v) for v in args['bbox'].split(',')] if args.get('bbox') else None
+    except ValueError:
+        raise ValueError('min_speed, max_speed and bbox must be numbers')
+    if bbox is not None and len(bbox) != 4:
+        raise ValueError('bbox must be south,west,north,east')
+
+    fleet_state.ensure_loaded(data_manager.get_vessels())
+    sync_vessel_index()
+    vessel_index.sync(fleet_state, data_manager.revision('vessels'))
+    rows = fleet_grid.query_bbox(*bbox) if bbox else None
+    page, total, last_imo = vessel_index.query(filters, rows=rows, speed=fleet_state.speed,
+                                               speed_range=(min_speed, max_speed), text=args.get('q'),
+                                               after=after, limit=limit)
+
+    # Positions come straight from the fleet arrays, only for the rows on this page
+    vessels = fleet_state.live_rows(page.tolist())
+    if fields is None or 'track' in fields:
+        tracks = track_store.polylines([v['imo'] for v in vessels])
+        for v in vessels:
+            v['track'] = tracks[v['imo']]
+    if fields is not None:
+        vessels = [{f: v[f] for f in fields if f in v} for v in vessels]
+
+    result = {
+        'vessels': vessels,
+        'count': len(vessels),
+        'total': total,
+        'limit': limit,
+        'next_cursor': encode_cursor(last_imo) if last_imo is not None else None
+    }
+    if after is None:
+        result['fleet_size'] = len(vessel_index)
+        result['facets'] = vessel_index.facets()
+    return result
 
 @app.route('/api/vessels/<imo>', methods=['GET'])
 @token_required
@@ -577,12 +784,38 @@ def get_vessel(imo):
         log_access(request.user['email'], 'UNAUTHORIZED_ACCESS', 'vessel', {'imo': imo})
         return jsonify({'error': 'Access denied for viewers'}), 403
     
-    vessel = data_manager.get_vessel(imo)
+    vessel = get_live_vessel(imo)
     if not vessel:
         return jsonify({'error': 'Vessel not found'}), 404
     
     log_access(request.user['email'], 'VIEW', 'vessel_details', {'imo': imo})
-    return jsonify(vessel), 200
+    return jsonify(dict(vessel, history=track_store.get_points(imo, TRACK_BROADCAST_POINTS))), 200
+
+@app.route('/api/vessels/<imo>/track', methods=['GET'])
+@token_required
+def get_vessel_track(imo):
+    """Vessel track from the track store: ?format=polyline (default) or array, &limit=, &since=<epoch ms>"""
+    try:
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+        since = int(request.args['since']) if 'since' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'limit and since must be integers'}), 400
+
+    track = track_store.get_track(imo, limit, since)
+    if track is None:
+        return jsonify({'error': 'Vessel not found'}), 404
+    lat, lon, ts = track
+
+    result = {'imo': imo, 'count': len(ts), 'start': int(ts[0]) if len(ts) else None, 'end': int(ts[-1]) if len(ts) else None}
+    if request.args.get('format', 'polyline') == 'array':
+        result.update({
+            'lat': np.round(lat.astype(np.float64), 5).tolist(),
+            'lon': np.round(lon.astype(np.float64), 5).tolist(),
+            'timestamp': ts.tolist()
+        })
+    else:
+        result['polyline'] = encode_polyline(lat, lon)
+    return jsonify(result), 200
 
 @app.route('/api/vessels/<imo>', methods=['PUT'])
 @token_required
@@ -592,6 +825,7 @@ def update_vessel(imo):
     if request.user.get('role') != 'admin':
         log_access(request.user['email'], 'UNAUTHORIZED_UPDATE_VESSEL', 'vessel', {'imo': imo})
         return jsonify({'error': 'Only admin can modify vessel data'}), 403
+    fleet_state.sync_to_dicts()
     vessel = data_manager.get_vessel(imo)
     if not vessel:
         return jsonify({'error': 'Vessel not found'}), 404
@@ -600,16 +834,100 @@ def update_vessel(imo):
     updated_vessel = data_manager.update_vessel(imo, data)
     if not updated_vessel:
         return jsonify({'error': 'Vessel not found'}), 404
+    live_aggregates.update_vessels({imo: updated_vessel}, data_manager.revision('vessels'))
+    fleet_state.refresh_vessel(imo)
     
     return jsonify(updated_vessel), 200
 
+@app.route('/api/admin/vessels', methods=['PATCH'])
+@token_required
+def apply_vessel_batch():
+    """Admin only: apply a batch of vessel upserts and deletes to the live store"""
+    if request.user.get('role') != 'admin':
+        log_access(request.user['email'], 'UNAUTHORIZED_VESSEL_BATCH', 'vessel')
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    data = request.json or {}
+    upserts = data.get('upserts') or {}
+    deletes = data.get('deletes') or []
+    if not isinstance(upserts, dict) or not all(isinstance(v, dict) for v in upserts.values()):
+        return jsonify({'error': 'upserts must map IMO -> vessel fields'}), 400
+    if not isinstance(deletes, list):
+        return jsonify({'error': 'deletes must be a list of IMOs'}), 400
+    
+    for imo, fields in upserts.items():
+        fields.setdefault('imo', imo)
+    changes = apply_vessel_changes(upserts, deletes)
+    counts = {key: len(imos) for key, imos in changes.items()}
+    log_access(request.user['email'], 'APPLY_VESSEL_BATCH', 'vessel', counts)
+    
+    return jsonify(counts), 200
+
+@app.route('/api/admin/ais/sync', methods=['POST'])
+@token_required
+def start_ais_sync():
+    """Admin only: incremental AIS sync into the running server (changed files / vessels only)"""
+    if request.user.get('role') != 'admin':
+        log_access(request.user['email'], 'UNAUTHORIZED_AIS_SYNC', 'vessel')
+        return jsonify({'error': 'Admin access required'}), 403
+    if not KAGGLE_ENABLED:
+        return jsonify({'error': 'Kaggle integration not available'}), 503
+    if ais_sync_status['running']:
+        return jsonify({'error': 'AIS sync already running'}), 409
+    
+    data = request.json or {}
+    dataset_name = data.get('dataset') or KAGGLE_DATASETS.get('default')
+    download = bool(data.get('download', True))
+    try:
+        workers = int(data.get('workers', 1))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'workers must be an integer'}), 400
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    
+    ais_sync_status['running'] = True
+    socketio.start_background_task(run_ais_sync, dataset_name, download, workers)
+    log_access(request.user['email'], 'START_AIS_SYNC', 'vessel', {'dataset': dataset_name, 'download': download})
+    
+    return jsonify({'message': 'AIS sync started', 'dataset': dataset_name}), 202
+
+@app.route('/api/admin/ais/sync', methods=['GET'])
+@token_required
+def get_ais_sync_status():
+    """Admin only: state and summary of the last incremental AIS sync"""
+    if request.user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify(ais_sync_status), 200
+
+@app.route('/api/admin/forecast-cache', methods=['GET'])
+@token_required
+def get_forecast_cache_stats():
+    """Admin only: forecast cache size and hit/miss/eviction counters"""
+    if request.user.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify(forecast_cache.stats()), 200
+
+@app.route('/api/admin/forecast-cache', methods=['DELETE'])
+@token_required
+def clear_forecast_cache():
+    """Admin only: drop cached forecasts (all, or those of ?spill_id=)"""
+    if request.user.get('role') != 'admin':
+        log_access(request.user['email'], 'UNAUTHORIZED_FORECAST_CACHE_CLEAR', 'oil_spill')
+        return jsonify({'error': 'Admin access required'}), 403
+    spill_id = request.args.get('spill_id')
+    if spill_id:
+        forecast_cache.invalidate(spill_id)
+    else:
+        forecast_cache.clear()
+    log_access(request.user['email'], 'CLEAR_FORECAST_CACHE', 'oil_spill', {'spill_id': spill_id})
+    return jsonify(forecast_cache.stats()), 200
+
 @app.route('/api/oil-spills', methods=['GET'])
 @token_required
 def get_oil_spills():
     """Get all oil spill incidents - viewable by all roles"""
     log_access(request.user['email'], 'VIEW', 'oil_spills_list')
-    spills_dict = data_manager.get_oil_spills()
-    return jsonify(list(spills_dict.values())), 200
+    return cached_json_response('oil_spills', data_manager.revision('oil_spills'),
+                                lambda: list(data_manager.get_oil_spills().values()))
 
 @app.route('/api/oil-spills/<spill_id>', methods=['GET'])
 @token_required
@@ -630,7 +948,130 @@ def get_marine_strikes():
     strikes = data_manager.get_marine_strikes()
     return jsonify(strikes), 200
 
+def parse_geo_query():
+    """
+    Read the query center and extent from the query string.
+    Center: lat/lon, or spill_id to search around an oil spill. Extent: radius_km, or k for nearest.
+    Returns (lat, lon, radius_km, k); raises LookupError for an unknown spill, ValueError for bad input.
+    """
+    spill_id = request.args.get('spill_id')
+    if spill_id:
+        spill = data_manager.get_oil_spill(spill_id)
+        if not spill:
+            raise LookupError('Spill ID not found')
+        lat, lon = float(spill['lat']), float(spill['lon'])
+    else:
+        lat = request.args.get('lat', type=float)
+        lon = request.args.get('lon', type=float)
+        if lat is None or lon is None:
+            raise ValueError('lat and lon (or spill_id) required')
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('lat/lon out of range')
+
+    k = request.args.get('k', type=int)
+    radius_km = request.args.get('radius_km', type=float)
+    if k is None and radius_km is None:
+        radius_km = 20.0
+    if (radius_km is not None and radius_km <= 0) or (k is not None and k <= 0):
+        raise ValueError('radius_km and k must be positive')
+    return lat, lon, radius_km, min(k, 1000) if k else None
+
+def run_geo_query(index, lat, lon, radius_km, k):
+    """Radius query (optionally capped to the k nearest) or plain k-nearest"""
+    if radius_km is None:
+        return index.nearest(lat, lon, k)
+    rows, dist = index.query_radius(lat, lon, radius_km)
+    return (rows[:k], dist[:k]) if k else (rows, dist)
+
+@app.route('/api/vessels/near', methods=['GET'])
+@token_required
+def get_vessels_near():
+    """Vessels within radius_km of a point or spill (or the k nearest)"""
+    try:
+        lat, lon, radius_km, k = parse_geo_query()
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    fleet_state.ensure_loaded(data_manager.get_vessels())
+    sync_vessel_index()
+    rows, dist = run_geo_query(fleet_grid, lat, lon, radius_km, k)
+
+    vessels = []
+    for v, d in zip(fleet_state.live_rows(rows.tolist()), dist.tolist()):
+        vessels.append({
+            'imo': v.get('imo'),
+            'name': v.get('name', 'Unknown'),
+            'type': v.get('type', 'Unknown'),
+            'lat': v.get('lat'),
+            'lon': v.get('lon'),
+            'speed': v.get('speed', 0),
+            'course': v.get('course', 0),
+            'risk_level': v.get('risk_level', 'Unknown'),
+            'distance_km': round(d, 3)
+        })
+
+    log_access(request.user['email'], 'VIEW', 'vessels_near', {'lat': lat, 'lon': lon, 'radius_km': radius_km, 'k': k})
+    return jsonify({
+        'center': {'lat': lat, 'lon': lon},
+        'radius_km': radius_km,
+        'count': len(vessels),
+        'vessels': vessels
+    }), 200
+
+@app.route('/api/oil-spills/near', methods=['GET'])
+@token_required
+def get_oil_spills_near():
+    """Oil spills within radius_km of a point (or the k nearest)"""
+    try:
+        lat, lon, radius_km, k = parse_geo_query()
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    index = get_spill_index()
+    rows, dist = run_geo_query(index, lat, lon, radius_km, k)
+    spills = []
+    for row, d in zip(rows.tolist(), dist.tolist()):
+        spill = data_manager.get_oil_spill(index.keys[row])
+        if spill:
+            spills.append({**spill, 'distance_km': round(d, 3)})
+
+    return jsonify({
+        'center': {'lat': lat, 'lon': lon},
+        'radius_km': radius_km,
+        'count': len(spills),
+        'oil_spills': spills
+    }), 200
+
+@app.route('/api/marine-strikes/within', methods=['GET'])
+@token_required
+def get_marine_strikes_within():
+    """Marine strikes inside a bounding box (south, west, north, east; west > east crosses the antimeridian)"""
+    try:
+        south, west, north, east = (float(request.args[k]) for k in ('south', 'west', 'north', 'east'))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'south, west, north and east required'}), 400
+    if south > north:
+        return jsonify({'error': 'south must not exceed north'}), 400
+
+    index = get_strike_index()
+    rows = index.query_bbox(south, west, north, east)
+    strikes = [index.keys[row] for row in rows.tolist()]
+    return jsonify({
+        'bbox': {'south': south, 'west': west, 'north': north, 'east': east},
+        'count': len(strikes),
+        'strikes': strikes
+    }), 200
+
 # New endpoint to simulate oil spill detection and trigger secure alert
+def max_spill_number():
+    """Highest OS-<n> spill number in the store (seeds the spill ID counter once)"""
+    numbers = [int(sid[3:]) for sid in data_manager.get_oil_spills() if sid.startswith('OS-') and sid[3:].isdigit()]
+    return max(numbers, default=0)
+
 @app.route('/api/simulate-oil-spill', methods=['POST'])
 @token_required
 @role_required('operator') # Only operators or admins can simulate spills
@@ -649,7 +1090,7 @@ def simulate_oil_spill():
         return jsonify({'error': 'Vessel not found'}), 404
 
     # Simulate spill data
-    spill_id = f"OS-{len(data_manager.get_oil_spills()) + 1:05d}"
+    spill_id = f"OS-{data_manager.ids.next('spill', seed=max_spill_number):05d}"
     spill_data = {
         'spill_id': spill_id,
         'vessel_imo': imo,
@@ -664,7 +1105,12 @@ def simulate_oil_spill():
         'reported_at': datetime.utcnow().isoformat(),
         'radius': random.randint(100, 500) # in meters
     }
+    # Build the index (first spill after startup) before storing, so the new spill is added exactly once
+    spill_index = get_spill_index()
     data_manager.add_oil_spill(spill_data)
+    forecast_cache.invalidate(spill_id)
+    live_aggregates.update_spill(spill_data, data_manager.revision('oil_spills'))
+    spill_index.add(spill_id, lat, lon)
     
     # Trigger Secure Alert
     send_secure_alert(
@@ -684,13 +1130,16 @@ def simulate_oil_spill():
 @token_required
 def check_ais_anomalies():
     """Analyze current vessel traffic for anomalies using Pandas/NumPy"""
-    vessels = list(data_manager.get_vessels().values())
-    anomalies = ais_analyzer.detect_anomalies(vessels)
+    fleet_state.ensure_loaded(data_manager.get_vessels())
+    records = ais_analyzer.detect_fleet_anomalies(fleet_state)
+    names = [v.get('name') for v in fleet_state.vessels]
+    anomalies = ais_analyzer.to_records(records, fleet_state.imos, names)
     
     # If POST, we might be filtering or running specific checks
     return jsonify({
         'anomalies': anomalies,
         'count': len(anomalies),
+        'speed_baselines': speed_stats.type_summary(),
         'timestamp': datetime.utcnow().isoformat()
     }), 200
 
@@ -710,46 +1159,83 @@ def predict_spill_spread():
     data = request.json or {}
     spill_id = data.get('spill_id')
     
-    # Defaults
-    env = {
-        'wind_speed': float(data.get('wind_speed', 10)),
-        'wind_dir': float(data.get('wind_direction', 0)),
-        'current_speed': float(data.get('current_speed', 1)),
-        'current_dir': float(data.get('current_direction', 90))
-    }
-    hours = float(data.get('hours', 24))
+    # Quantized so slider positions already seen reuse the cached forecast
+    env = quantize_env(env_conditions_from(data))
+    hours = int(float(data.get('hours', 24)))
     
     # Get initial spill location
     spill = data_manager.get_oil_spill(spill_id)
     if not spill:
         return jsonify({'error': 'Spill ID not found'}), 404
         
-    prediction = spill_forecaster.run_simulation(spill, env, duration_hours=int(hours))
-    
-    # Calculate impacts (simplified)
-    # Area based on final radius
-    final_radius = prediction[-1]['radius_km']
-    final_area = 3.14159 * (final_radius ** 2)
-    
-    # Economic Impact Estimator
-    cleanup_rate = 50000 
-    rehab_rate = 35000
-    econ_rate = 25000
-    
-    impact = {
-        'cleanup_cost': final_area * cleanup_rate,
-        'marine_rehab': final_area * rehab_rate,
-        'tourism_fisheries_loss': final_area * econ_rate,
-        'total_estimated_cost': final_area * (cleanup_rate + rehab_rate + econ_rate)
-    }
+    try:
+        key = forecast_key(spill_id, spill, env, hours)
+        result = forecast_cache.get_or_compute(key, lambda: spill_forecaster.what_if(spill, env, duration_hours=hours))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    return jsonify({
-        'spill_id': spill_id,
-        'prediction': prediction,
-        'final_area_km2': final_area,
-        'economic_impact': impact
-    }), 200
+    return jsonify({'spill_id': spill_id, **result}), 200
 
+@app.route('/api/simulate/batch', methods=['POST'])
+@token_required
+def start_forecast_batch():
+    """
+    Batch what-if forecasts: every spill under every scenario (base scenarios x sweep axes).
+    Runs on the forecast worker processes; results stream to the 'forecast_batch_<id>' Socket.IO
+    room as 'forecast_result' events, then 'forecast_batch_complete'. Pass 'sid' to be subscribed
+    right away, or join later with 'subscribe_forecast_batch'.
+    """
+    data = request.json or {}
+    spill_ids = data.get('spill_ids') or []
+    if not isinstance(spill_ids, list) or not spill_ids:
+        return jsonify({'error': 'spill_ids must be a non-empty list'}), 400
+    
+    spills = [data_manager.get_oil_spill(spill_id) for spill_id in spill_ids]
+    missing = [spill_id for spill_id, spill in zip(spill_ids, spills) if not spill]
+    if missing:
+        return jsonify({'error': 'Spill ID not found', 'missing': missing}), 404
+    
+    try:
+        scenarios = expand_scenarios(data.get('scenarios'), data.get('sweep'))
+        batch = forecast_batches.create(spills, scenarios, user=request.user['email'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    batch_id = batch['batch_id']
+    room = f'forecast_batch_{batch_id}'
+    if data.get('sid'):
+        # Subscribe the caller's socket before the first result can arrive
+        join_room(room, sid=data['sid'], namespace='/')
+    forecast_batches.run(batch_id, lambda event, payload: socketio.emit(event, payload, room=room))
+    log_access(request.user['email'], 'START_FORECAST_BATCH', 'oil_spill', {'batch_id': batch_id, 'forecasts': batch['total']})
+    
+    return jsonify({'batch_id': batch_id, 'total': batch['total'], 'room': room}), 202
+
+def get_own_forecast_batch(batch_id, offset=None):
+    """Batch status if it belongs to the current user (admins see every batch)"""
+    batch = forecast_batches.status(batch_id, offset)
+    if batch is None or (batch['user'] != request.user['email'] and request.user.get('role') != 'admin'):
+        return None
+    return batch
+
+@app.route('/api/simulate/batch/<batch_id>', methods=['GET'])
+@token_required
+def get_forecast_batch(batch_id):
+    """Progress of a forecast batch, plus its results from ?offset= on (default 0)"""
+    batch = get_own_forecast_batch(batch_id, max(0, request.args.get('offset', 0, type=int)))
+    if batch is None:
+        return jsonify({'error': 'Forecast batch not found'}), 404
+    return jsonify(batch), 200
+
+@app.route('/api/simulate/batch/<batch_id>', methods=['DELETE'])
+@token_required
+def cancel_forecast_batch(batch_id):
+    """Cancel the forecasts of a batch that have not started yet"""
+    if get_own_forecast_batch(batch_id) is None:
+        return jsonify({'error': 'Forecast batch not found'}), 404
+    if not forecast_batches.cancel(batch_id):
+        return jsonify({'error': 'Forecast batch already finished'}), 409
+    return jsonify(forecast_batches.status(batch_id)), 200
 
 @app.route('/api/chat', methods=['POST'])
 @token_required
@@ -762,7 +1248,7 @@ def chat_bot():
     
     # Build context from Data Manager
     context = {
-        'vessels': data_manager.get_vessels(),
+        'vessels': get_live_vessels(),
         'spills': data_manager.get_oil_spills(),
         'alerts': [] # could fetch alerts if implemented
     }
@@ -823,7 +1309,7 @@ def generate_report():
         if report_type in ['realtime', 'vessels', 'comprehensive']:
             elements.append(Paragraph("Real-Time Vessel Locations & Movement", heading_style))
             
-            vessels_data = list(data_manager.get_vessels().values())
+            vessels_data = list(get_live_vessels().values())
             vessel_data = [['Vessel Name', 'Company', 'Location', 'Speed', 'Risk', 'Status']]
             for vessel in vessels_data:
                 try:
@@ -890,15 +1376,16 @@ def generate_report():
         if report_type in ['realtime', 'comprehensive']:
             elements.append(Paragraph("Summary Statistics", heading_style))
             
-            vessels_data = list(data_manager.get_vessels().values())
-            oil_spills_data = list(data_manager.get_oil_spills().values())
+            live_aggregates.sync(data_manager)
+            vessel_summary = live_aggregates.vessel_summary()
+            spill_summary = live_aggregates.spill_summary()
             
             summary_data = [
-                ['Total Vessels Monitored', str(len(vessels_data))],
-                ['Active Oil Spill Incidents', str(len(oil_spills_data))],
-                ['High Risk Vessels', str(sum(1 for v in vessels_data if v.get('risk_level') == 'High'))],
-                ['Average Compliance Rating', f"{sum(v.get('compliance_rating', 0) for v in vessels_data) / len(vessels_data):.1f}/10" if vessels_data else "0/10"],
-                ['High Severity Spills', str(sum(1 for s in oil_spills_data if s.get('severity') == 'High'))]
+                ['Total Vessels Monitored', str(vessel_summary['total'])],
+                ['Active Oil Spill Incidents', str(spill_summary['total'])],
+                ['High Risk Vessels', str(vessel_summary['by_risk_level'].get('High', 0))],
+                ['Average Compliance Rating', f"{vessel_summary['avg_compliance']:.1f}/10" if vessel_summary['total'] else "0/10"],
+                ['High Severity Spills', str(spill_summary['by_severity'].get('High', 0))]
             ]
             
             summary_table = Table(summary_data, colWidths=[3.0*inch, 1.5*inch])
@@ -933,29 +1420,27 @@ def get_dashboard_data():
     """Get aggregated dashboard data"""
     user_role = request.user.get('role', 'viewer')
     
-    vessels_dict = data_manager.get_vessels()
-    vessels_data = list(vessels_dict.values())
+    # Counters are maintained as vessels and spills change; nothing is rescanned here
+    live_aggregates.sync(data_manager)
+    vessel_summary = live_aggregates.vessel_summary()
     
     # All roles can see basic dashboard
     data = {
-        'total_vessels': len(vessels_data),
-        'active_vessels': len([v for v in vessels_data if v.get('status') == 'Active']),
-        'high_risk_vessels': len([v for v in vessels_data if v.get('risk_level') in ['High', 'Critical']]),
-        'avg_compliance': round(sum(v.get('compliance_rating', 0) for v in vessels_data) / len(vessels_data), 1) if vessels_data else 0
+        'total_vessels': vessel_summary['total'],
+        'active_vessels': vessel_summary['by_status'].get('Active', 0),
+        'high_risk_vessels': vessel_summary['high_risk'],
+        'avg_compliance': round(vessel_summary['avg_compliance'], 1),
+        'vessels_by_type': vessel_summary['by_type'],
+        'vessels_by_risk_level': vessel_summary['by_risk_level']
     }
     
     # Operators and admins see additional data
     if user_role != 'viewer':
-        oil_spills_dict = data_manager.get_oil_spills()
-        oil_spills_data = list(oil_spills_dict.values())
+        spill_summary = live_aggregates.spill_summary()
         data['oil_spills'] = {
-            'total': len(oil_spills_data),
-            'by_severity': {
-                'High': len([s for s in oil_spills_data if s['severity'] == 'High']),
-                'Medium': len([s for s in oil_spills_data if s['severity'] == 'Medium']),
-                'Low': len([s for s in oil_spills_data if s['severity'] == 'Low'])
-            },
-            'incidents': oil_spills_data
+            'total': spill_summary['total'],
+            'by_severity': {severity: spill_summary['by_severity'].get(severity, 0) for severity in ('High', 'Medium', 'Low')},
+            'incidents': list(data_manager.get_oil_spills().values())
         }
     
     return jsonify(data), 200
@@ -991,7 +1476,7 @@ secure_alerts = []
 def send_secure_alert(subject, body, recipient="confidential@seatrace.gov"):
     """Simulate sending a secure/confidential email alert"""
     timestamp = datetime.utcnow().isoformat()
-    alert_id = f"ALERT-{len(secure_alerts) + 1:04d}"
+    alert_id = f"ALERT-{data_manager.ids.next('alert', seed=lambda: len(secure_alerts)):04d}"
     
     alert = {
         "id": alert_id,
@@ -1094,45 +1579,47 @@ def predict_spread():
     if not start_lat or not start_lon:
         return jsonify({'error': 'Location required'}), 400
         
-    # Simulate Lagrangian Particle Tracking results
-    # Generate simple polygons (circles/ellipses) expanding over time
+    env = env_conditions_from(data)
+    spill = {'lat': start_lat, 'lon': start_lon, 'size_tons': data.get('size_tons', 10)}
+
+    # Lagrangian particle tracking: hull of the core of the particle cloud per horizon
+    try:
+        forecast = spill_forecaster.simulate_particles(spill, env, duration_hours=72, horizons=[24, 48, 72],
+                                                       n_particles=data.get('particles'), grid=bool(data.get('grid')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     predictions = []
-    
-    # Drift direction (randomized but consistent for the call)
-    drift_lat = random.uniform(0.01, 0.05)
-    drift_lon = random.uniform(0.01, 0.05)
-    
-    periods = [24, 48, 72]
-    for hours in periods:
-        # Move center point based on drift
-        center_lat = start_lat + (drift_lat * (hours/24))
-        center_lon = start_lon + (drift_lon * (hours/24))
-        
-        # Increase radius
-        radius = 0.02 + (0.01 * (hours/24))
-        
-        # Create a simple polygon approximation (diamond shape for simplicity)
-        polygon = [
-            [center_lat + radius, center_lon],
-            [center_lat, center_lon + radius],
-            [center_lat - radius, center_lon],
-            [center_lat, center_lon - radius],
-            [center_lat + radius, center_lon] # Close loop
-        ]
-        
-        predictions.append({
+    for horizon in forecast['horizons']:
+        hours = int(horizon['hours'])
+        prediction = {
             'time_horizon_hours': hours,
-            'predicted_at': (datetime.utcnow() + timedelta(hours=hours)).isoformat(),
+            'predicted_at': horizon['timestamp'],
             'impact_risk': 'High' if hours == 72 else 'Medium',
             'sensitive_areas_at_risk': ['Coral Reef Alpha'] if hours > 24 else [],
-            'polygon': polygon
-        })
-        
+            'polygon': horizon['polygon'],
+            'centroid': horizon['centroid'],
+            'area_km2': horizon['area_km2'],
+            'mass_remaining_pct': horizon['mass_remaining_pct']
+        }
+        if 'concentration' in horizon:
+            prediction['concentration'] = horizon['concentration']
+        predictions.append(prediction)
+
     return jsonify({
         'incident_location': {'lat': start_lat, 'lon': start_lon},
+        'n_particles': forecast['n_particles'],
         'predictions': predictions
     }), 200
 
+@app.route('/api/environment/fields', methods=['GET'])
+@token_required
+def get_environment_fields():
+    """Gridded wind/current field files usable as 'wind_field' / 'current_field' in forecasts"""
+    return jsonify({
+        'fields': available_fields(),
+        'tile_cache': field_tile_cache.stats()
+    }), 200
+
 def get_secure_history():
     """View sent confidential alerts (Admin/Operator only)"""
     current_user = request.user
@@ -1157,14 +1644,20 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     print(f'Client disconnected: {request.sid}')
+    legacy_movement_sids.discard(request.sid)
+    vessel_stream.unsubscribe(request.sid)
+    realtime_snapshots.unsubscribe(request.sid)
 
 @socketio.on('subscribe_vessels')
 def handle_subscribe_vessels():
     """Subscribe to real-time vessel position updates"""
     join_room('vessels')
+    if request.sid not in vessel_stream.clients:
+        join_room('vessel_movement')
+        legacy_movement_sids.add(request.sid)
     emit('status', {'data': 'Subscribed to vessel updates'})
     # Send current vessel positions immediately
-    vessels_dict = data_manager.get_vessels()
+    vessels_dict = get_live_vessels()
     vessel_list = [{
         'imo': v['imo'],
         'name': v['name'],
@@ -1177,6 +1670,40 @@ def handle_subscribe_vessels():
     } for v in vessels_dict.values()]
     emit('vessel_batch_update', {'vessels': vessel_list, 'timestamp': datetime.utcnow().isoformat()})
 
+@socketio.on('subscribe_vessel_stream')
+def handle_subscribe_vessel_stream(data=None):
+    """
+    Switch to the compact binary movement stream (see vessel_stream.py for the frame layout).
+    Optional 'epoch': the stream index the client already holds; repeated subscriptions keep the viewport.
+    """
+    leave_room('vessel_movement')
+    legacy_movement_sids.discard(request.sid)
+    epoch = (data or {}).get('epoch') if isinstance(data, dict) else None
+    vessel_stream.subscribe(request.sid, epoch if isinstance(epoch, int) else None)
+    emit('status', {'data': 'Subscribed to binary vessel stream'})
+
+@socketio.on('subscribe_viewport')
+def handle_subscribe_viewport(data):
+    """Only stream vessels inside the client's map bounds (clusters when zoomed out)"""
+    data = data or {}
+    try:
+        bbox = (float(data['south']), float(data['west']), float(data['north']), float(data['east']))
+        zoom = int(data.get('zoom', 10))
+    except (KeyError, TypeError, ValueError):
+        emit('status', {'error': 'Viewport requires south, west, north, east and zoom'})
+        return
+    
+    if request.sid not in vessel_stream.clients:
+        handle_subscribe_vessel_stream()
+    # Normalize to [-90, 90] / [-180, 180]; a world-wrapping view is treated as the whole globe
+    south, west, north, east = bbox
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west = ((west + 180) % 360) - 180
+        east = ((east + 180) % 360) - 180
+    vessel_stream.set_viewport(request.sid, (max(south, -90.0), west, min(north, 90.0), east), zoom)
+
 @socketio.on('subscribe_alerts')
 def handle_subscribe_alerts():
     """Subscribe to real-time alerts"""
@@ -1203,44 +1730,53 @@ def handle_subscribe_spills():
     emit('spill_batch_update', {'spills': spill_list, 'timestamp': datetime.utcnow().isoformat()})
 
 @socketio.on('subscribe_realtime_analysis')
-def handle_subscribe_realtime():
-    """Subscribe to real-time analysis for all users"""
-    join_room('realtime_analysis')
+def handle_subscribe_realtime(data=None):
+    """
+    Subscribe to real-time analysis for all users. One full snapshot ('realtime_analysis_update'),
+    then 'realtime_analysis_delta' events since the last revision the client acked with
+    'realtime_analysis_ack'. A reconnecting client passes {'revision': n} to get a delta instead.
+    """
     emit('status', {'data': 'Subscribed to real-time analysis'})
-    # Send initial analysis snapshot
-    vessels_dict = data_manager.get_vessels()
-    oil_spills_dict = data_manager.get_oil_spills()
-    analysis_data = {
-        'vessels': [{
-            'imo': v.get('imo'),
-            'name': v.get('name', 'Unknown'),
-            'lat': v.get('lat', 0.0),
-            'lon': v.get('lon', 0.0),
-            'speed': v.get('speed', 0),
-            'course': v.get('course', 0),
-            'destination': v.get('destination', 'Unknown'),
-            'compliance_rating': v.get('compliance_rating', 0),
-            'risk_level': v.get('risk_level', 'Unknown'),
-            'last_inspection': v.get('last_inspection', 'N/A')
-        } for v in vessels_dict.values()],
-        'oil_spills': [{
-            'spill_id': s['spill_id'],
-            'vessel_name': s['vessel_name'],
-            'lat': s['lat'],
-            'lon': s['lon'],
-            'severity': s['severity'],
-            'size_tons': s['size_tons'],
-            'estimated_area_km2': s['estimated_area_km2'],
-            'status': s['status'],
-            'confidence': s['confidence']
-        } for s in oil_spills_dict.values()],
-        'timestamp': datetime.utcnow().isoformat()
-    }
-    emit('realtime_analysis_update', analysis_data)
+    refresh_realtime_snapshot(max_age=REALTIME_SNAPSHOT_MAX_AGE)
+    held = (data or {}).get('revision')
+    if isinstance(held, int):
+        payload = realtime_snapshots.delta(held, realtime_positions, realtime_positions_key())
+    else:
+        payload = realtime_snapshots.snapshot(realtime_positions, realtime_positions_key())
+    revision = payload['revision'] if payload else held
+
+    # The snapshot goes out on this connection ahead of any later delta, so it counts as acked
+    previous = realtime_snapshots.subscribe(request.sid, revision)
+    if previous is not None:
+        leave_room(revision_room(previous))
+    join_room(revision_room(revision))
+    if payload:
+        emit('realtime_analysis_update' if payload['full'] else 'realtime_analysis_delta', payload)
+
+@socketio.on('realtime_analysis_ack')
+def handle_realtime_analysis_ack(data):
+    """Client applied a snapshot/delta; later deltas are computed from this revision"""
+    moved = realtime_snapshots.ack(request.sid, (data or {}).get('revision'))
+    if moved:
+        leave_room(revision_room(moved[0]))
+        join_room(revision_room(moved[1]))
+
+@socketio.on('subscribe_forecast_batch')
+def handle_subscribe_forecast_batch(data):
+    """
+    Receive the results of a forecast batch. Results finished so far come in one
+    'forecast_batch_status' (a result may arrive both ways; 'job' identifies it).
+    """
+    batch_id = (data or {}).get('batch_id')
+    if not batch_id or forecast_batches.status(batch_id) is None:
+        emit('status', {'error': 'Forecast batch not found'})
+        return
+    join_room(f'forecast_batch_{batch_id}')
+    emit('forecast_batch_status', forecast_batches.status(batch_id, offset=0))
 
 def broadcast_vessel_update(imo):
     """Broadcast vessel position/status update to all subscribers"""
-    vessel = data_manager.get_vessel(imo)
+    vessel = get_live_vessel(imo)
     if vessel:
         socketio.emit('vessel_update', {
             'imo': imo,
@@ -1248,38 +1784,34 @@ def broadcast_vessel_update(imo):
             'timestamp': datetime.utcnow().isoformat()
         }, room='vessels')
 
+def refresh_realtime_snapshot(max_age=None):
+    """Diff live vessels/spills into the snapshot service (skipped if refreshed within max_age seconds)"""
+    age = realtime_snapshots.age()
+    if max_age is not None and age is not None and age <= max_age:
+        return realtime_snapshots.revision
+    # Analysis fields only: positions are not part of a revision, so the simulator's ticks are not changes
+    return realtime_snapshots.refresh(
+        [vessel_payload(v) for v in data_manager.get_vessels().values()],
+        [spill_payload(s) for s in data_manager.get_oil_spills().values()]
+    )
+
+def realtime_positions():
+    """Live position, course and recent track of every vessel, merged into full analysis snapshots"""
+    vessels_dict = get_live_vessels()
+    tracks = track_store.polylines(list(vessels_dict.keys()))
+    return {imo: vessel_position(v, tracks[imo]) for imo, v in vessels_dict.items()}
+
+def realtime_positions_key():
+    return (fleet_state.epoch, fleet_state.version)
+
 def broadcast_realtime_analysis():
-    """Broadcast real-time analysis update to all analysis subscribers"""
-    vessels_dict = data_manager.get_vessels()
-    oil_spills_dict = data_manager.get_oil_spills()
-    analysis_data = {
-        'vessels': [{
-            'imo': v.get('imo'),
-            'name': v.get('name', 'Unknown'),
-            'lat': v.get('lat', 0.0),
-            'lon': v.get('lon', 0.0),
-            'history': v.get('history', []),
-            'speed': v.get('speed', 0),
-            'course': v.get('course', 0),
-            'destination': v.get('destination', 'Unknown'),
-            'compliance_rating': v.get('compliance_rating', 0),
-            'risk_level': v.get('risk_level', 'Unknown'),
-            'last_inspection': v.get('last_inspection', 'N/A')
-        } for v in vessels_dict.values()],
-        'oil_spills': [{
-            'spill_id': s['spill_id'],
-            'vessel_name': s['vessel_name'],
-            'lat': s['lat'],
-            'lon': s['lon'],
-            'severity': s['severity'],
-            'size_tons': s['size_tons'],
-            'estimated_area_km2': s['estimated_area_km2'],
-            'status': s['status'],
-            'confidence': s['confidence']
-        } for s in oil_spills_dict.values()],
-        'timestamp': datetime.utcnow().isoformat()
-    }
-    socketio.emit('realtime_analysis_update', analysis_data, room='realtime_analysis')
+    """Push what changed since each subscriber's acked revision (one delta per revision room, encoded once)"""
+    refresh_realtime_snapshot()
+    for base in realtime_snapshots.client_revisions():
+        payload = realtime_snapshots.delta(base, realtime_positions, realtime_positions_key())
+        if payload is not None:
+            event = 'realtime_analysis_update' if payload['full'] else 'realtime_analysis_delta'
+            socketio.emit(event, payload, room=revision_room(base))
 
 @app.route('/api/chat', methods=['POST'])
 @token_required
@@ -1295,7 +1827,7 @@ def chat_endpoint():
         # Build System Context from Live Data
         # We can fetch fresh data here to ensure AI is up-to-date
         context = {
-            'vessels': data_manager.get_vessels(),
+            'vessels': get_live_vessels(),
             'spills': data_manager.get_oil_spills(),
             'user': request.user
         }
@@ -0,0 +1,91 @@
+"""
+Audit Log Store for SeaTrace
+Append-ordered audit entries with a per-user index and time-range seeking, so pages cost O(log n + k).
+"""
+import bisect
+import os
+import threading
+
+AUDIT_LOG_RETENTION = int(os.environ.get('AUDIT_LOG_RETENTION', 20000))  # Entries kept, oldest dropped first
+TRIM_BATCH = 0.1    # Old entries are dropped in batches of 10% of the retention (amortized O(1) per append)
+
+
+class AuditLogStore:
+    """
+    Entries are kept in append order next to a list of non-decreasing timestamps (an entry
+    stamped earlier than its predecessor is indexed at the predecessor's time), so a time
+    range is two bisections. Each entry has a sequence number; every user has the ascending
+    sequence numbers and timestamps of their entries, searched the same way.
+    """
+
+    def __init__(self, entries=(), retention=AUDIT_LOG_RETENTION):
+        self.retention = max(1, int(retention))
+        self.lock = threading.Lock()
+        self.entries = []
+        self.times = []
+        self.first_seq = 0          # Sequence number of self.entries[0]
+        self.by_user = {}           # email -> ([seq, ...], [timestamp, ...])
+        # Logs written before this store existed are not guaranteed to be in order
+        for entry in sorted(entries, key=lambda e: str(e.get('timestamp') or '')):
+            self._append(entry)
+        self._trim(force=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _append(self, entry):
+        timestamp = str(entry.get('timestamp') or '')
+        if self.times and timestamp < self.times[-1]:
+            timestamp = self.times[-1]
+        seq = self.first_seq + len(self.entries)
+        self.entries.append(entry)
+        self.times.append(timestamp)
+        seqs, times = self.by_user.setdefault(entry.get('user_email'), ([], []))
+        seqs.append(seq)
+        times.append(timestamp)
+
+    def _trim(self, force=False):
+        excess = len(self.entries) - self.retention
+        if excess <= 0 or (not force and excess < max(1, int(self.retention * TRIM_BATCH))):
+            return
+        del self.entries[:excess]
+        del self.times[:excess]
+        self.first_seq += excess
+        for email in list(self.by_user):
+            seqs, times = self.by_user[email]
+            dropped = bisect.bisect_left(seqs, self.first_seq)
+            del seqs[:dropped]
+            del times[:dropped]
+            if not seqs:
+                del self.by_user[email]
+
+    def append(self, entry):
+        with self.lock:
+            self._append(entry)
+            self._trim()
+
+    def entries_list(self):
+        """Every retained entry, oldest first (a copy)"""
+        with self.lock:
+            return list(self.entries)
+
+    def query(self, user_email=None, since=None, until=None, offset=0, limit=100):
+        """
+        Newest entries first, optionally of one user and within [since, until] (ISO timestamps).
+        Returns (total matching, page of at most `limit` entries starting `offset` from the newest).
+        """
+        with self.lock:
+            if user_email is None:
+                seqs, times = None, self.times
+            else:
+                seqs, times = self.by_user.get(user_email, ([], []))
+            lo = bisect.bisect_left(times, since) if since else 0
+            hi = bisect.bisect_right(times, until) if until else len(times)
+            total = max(0, hi - lo)
+            end = hi - max(0, offset)
+            start = max(lo, end - max(0, limit))
+            if end <= start:
+                return total, []
+            if seqs is None:
+                return total, self.entries[start:end][::-1]
+            return total, [self.entries[seq - self.first_seq] for seq in reversed(seqs[start:end])]
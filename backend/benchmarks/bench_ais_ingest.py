@@ -0,0 +1,85 @@
+"""
+AIS ingest benchmark
+Generates a synthetic AIS dump and times CSV streaming (serial and on a process pool)
+against the partitioned Parquet cache.
+
+Usage: python benchmarks/bench_ais_ingest.py [n_rows] [n_vessels] [workers]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kaggle_ais_processor import KaggleAISProcessor
+from kaggle_config import REGION_FILTER
+
+
+def make_dump(path, n_rows, n_vessels, n_files=4, seed=3):
+    rng = np.random.default_rng(seed)
+    per_file = n_rows // n_files
+    for i in range(n_files):
+        mmsi = rng.integers(200000000, 200000000 + n_vessels, per_file)
+        df = pd.DataFrame({
+            'MMSI': mmsi,
+            'BaseDateTime': (pd.Timestamp('2024-01-01') + pd.to_timedelta(i * 86400 + rng.integers(0, 86400, per_file), unit='s')).strftime('%Y-%m-%dT%H:%M:%S'),
+            'LAT': np.round(rng.uniform(-60, 60, per_file), 5),
+            'LON': np.round(rng.uniform(-180, 180, per_file), 5),
+            'SOG': np.round(rng.uniform(0, 22, per_file), 1),
+            'COG': np.round(rng.uniform(0, 360, per_file), 1),
+            'Heading': rng.integers(0, 360, per_file),
+            'VesselName': np.char.add('VESSEL ', (mmsi % 100000).astype(str)),
+            'IMO': '',
+            'CallSign': 'ABCD',
+            'VesselType': rng.choice([70, 80, 30, 60], per_file),
+            'Status': 0,
+            'Length': rng.uniform(50, 300, per_file).round(1),
+            'Width': rng.uniform(10, 50, per_file).round(1),
+            'Draft': rng.uniform(5, 15, per_file).round(1),
+            'Cargo': 70,
+        })
+        df.drop(columns=['IMO']).to_csv(path / f"AIS_2024_01_0{i + 1}.csv", index=False)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<34} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    n_vessels = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    work = Path(tempfile.mkdtemp(prefix='seatrace_ais_'))
+    try:
+        dataset = work / 'dataset'
+        dataset.mkdir()
+        make_dump(dataset, n_rows, n_vessels)
+        processor = KaggleAISProcessor(data_dir=work, kaggle_dir=work / 'kaggle')
+        print(f"Rows: {n_rows:,}  Vessels: {n_vessels:,}  Workers: {workers}")
+
+        timed('csv whole-file load (legacy)', lambda: processor.load_ais_data(dataset))
+        serial = timed('csv streaming latest-per-vessel', lambda: processor.stream_latest_records(dataset, region_filter=REGION_FILTER))
+        parallel = timed(f'  ... on {workers} workers', lambda: processor.stream_latest_records(dataset, region_filter=REGION_FILTER, workers=workers))
+        assert serial.sort_values('MMSI').reset_index(drop=True).equals(parallel.sort_values('MMSI').reset_index(drop=True))
+        cache = processor.parquet_cache(dataset)
+        timed('parquet cache build (first load)', lambda: cache.build(dataset))
+        timed(f'  ... on {workers} workers', lambda: cache.build(dataset, workers=workers))
+        timed('parquet latest-per-vessel (region)', lambda: cache.latest_records(REGION_FILTER))
+        timed('parquet region positions', lambda: cache.query(REGION_FILTER, ['MMSI', 'LAT', 'LON', 'SOG']))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+AIS transform benchmark
+Compares the original per-group transform_ais_to_vessels loop with the vectorized transform.
+
+Usage: python benchmarks/bench_ais_transform.py [n_vessels ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kaggle_ais_processor import KaggleAISProcessor, detect_ais_columns
+
+# Fields that do not depend on random numbers
+DETERMINISTIC = ['imo', 'name', 'mmsi', 'type', 'flag', 'company_name', 'company_logo', 'lat', 'lon',
+                 'speed', 'course', 'risk_level', 'destination', 'image']
+
+NAMES = ['MSC AURORA', 'EVER GIVEN', 'MAERSK KOLKATA', 'CMA CGM MARCO POLO', 'OCEAN TANKER 7',
+         'PACIFIC BULK', 'BLUE CONTAINER', 'SEA STAR', 'nan', '']
+
+
+def legacy_transform(self, ais_df, max_vessels=None):
+    """The previous implementation: one Python iteration and a dozen latest.get() calls per vessel"""
+    actual_columns = detect_ais_columns(ais_df.columns)
+    # Get unique vessels (by IMO or MMSI)
+    id_col = actual_columns.get('imo') or actual_columns.get('mmsi')
+    if not id_col:
+        print("No IMO or MMSI column found")
+        return []
+
+    # Group by vessel ID and get latest position
+    vessels_list = []
+    vessel_groups = ais_df.groupby(id_col)
+
+    vessel_type_mapping = {
+        '70': 'Cargo', '71': 'Cargo', '72': 'Cargo', '73': 'Cargo', '74': 'Cargo', '75': 'Cargo',
+        '76': 'Cargo', '77': 'Cargo', '78': 'Cargo', '79': 'Cargo',
+        '80': 'Tanker', '81': 'Tanker', '82': 'Tanker', '83': 'Tanker',
+        '60': 'Passenger', '61': 'Passenger', '62': 'Passenger', '63': 'Passenger',
+        '30': 'Fishing', '31': 'Fishing', '32': 'Fishing',
+        '50': 'Pilot', '51': 'Pilot', '52': 'Pilot',
+        '37': 'Pleasure Craft', '36': 'Pleasure Craft',
+        '90': 'Other', '91': 'Other'
+    }
+
+    for n_vessels, (vessel_id, group) in enumerate(vessel_groups):
+        if max_vessels is not None and n_vessels >= max_vessels:
+            break
+        try:
+            # Get latest record for this vessel
+            latest = group.iloc[-1]
+
+            # Extract vessel information
+            imo = str(vessel_id) if actual_columns.get('imo') else f"MMSI{str(vessel_id)}"
+            mmsi = str(latest.get(actual_columns.get('mmsi', ''), vessel_id))
+            name = str(latest.get(actual_columns.get('name', ''), f"Vessel {vessel_id}")).strip()
+
+            if not name or name == 'nan' or name == 'None':
+                name = f"Vessel {vessel_id}"
+
+            lat = float(latest.get(actual_columns.get('lat', ''), 0))
+            lon = float(latest.get(actual_columns.get('lon', ''), 0))
+
+            # Skip if invalid coordinates
+            if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+                continue
+
+            speed = float(latest.get(actual_columns.get('speed', ''), 0))
+            course = float(latest.get(actual_columns.get('course', ''), 0))
+
+            # Normalize speed (convert from m/s to knots if needed)
+            if speed > 50:  # Likely in m/s, convert to knots
+                speed = speed * 1.944
+
+            vessel_type_code = str(latest.get(actual_columns.get('type', ''), '70'))
+            vessel_type = vessel_type_mapping.get(vessel_type_code[:2], 'Cargo Ship')
+
+            if 'Container' in name or 'CONTAINER' in name.upper():
+                vessel_type = 'Container Ship'
+            elif 'Tanker' in name or 'TANKER' in name.upper():
+                vessel_type = 'Tanker'
+            elif 'Bulk' in name or 'BULK' in name.upper():
+                vessel_type = 'Bulk Carrier'
+
+            flag = str(latest.get(actual_columns.get('flag', ''), 'Unknown')).strip()
+            if not flag or flag == 'nan':
+                flag = 'Unknown'
+
+            destination = str(latest.get(actual_columns.get('destination', ''), 'Unknown')).strip()
+            if not destination or destination == 'nan':
+                destination = 'Unknown'
+
+            # Calculate derived fields
+            length = float(latest.get(actual_columns.get('length', ''), 0))
+            width = float(latest.get(actual_columns.get('width', ''), 0))
+            dwt = self._estimate_dwt(length, width, vessel_type)
+
+            # Create vessel object
+            vessel = {
+                'imo': f"IMO{imo}" if not imo.startswith('IMO') else imo,
+                'name': name,
+                'mmsi': mmsi,
+                'type': vessel_type,
+                'flag': flag,
+                'company_name': self._get_company_name(name),
+                'company_logo': f"https://via.placeholder.com/50x50?text={name[:3].upper()}",
+                'lat': round(lat, 4),
+                'lon': round(lon, 4),
+                'speed': round(speed, 1),
+                'course': round(course % 360, 1),
+                'status': 'Active',
+                'compliance_rating': round(random.uniform(7.0, 9.8), 1),
+                'risk_level': self._calculate_risk_level(speed, compliance_rating=8.5),
+                'last_inspection': (datetime.now() - timedelta(days=random.randint(1, 90))).strftime('%Y-%m-%d'),
+                'violations': random.randint(0, 2),
+                'dwt': int(dwt),
+                'destination': destination[:50],
+                'eta': latest.get(actual_columns.get('eta', ''), ''),
+                'image': self._get_vessel_image_url(vessel_type)
+            }
+
+            vessels_list.append(vessel)
+        except Exception as e:
+            pass
+            continue
+
+    return vessels_list
+
+
+def same(a, b):
+    """Equal, both NaN, or floats within one unit of the last rounded digit (numpy vs builtin round ties)"""
+    if isinstance(a, float) and isinstance(b, float):
+        return a == b or (a != a and b != b) or abs(a - b) <= 1.0001e-4
+    return a == b
+
+
+def make_positions(n_vessels, fixes_per_vessel, rng):
+    n = n_vessels * fixes_per_vessel
+    mmsi = np.repeat(np.arange(200000000, 200000000 + n_vessels), fixes_per_vessel)
+    return pd.DataFrame({
+        'MMSI': mmsi,
+        'BaseDateTime': np.tile(np.arange(fixes_per_vessel), n_vessels),
+        'LAT': np.round(rng.uniform(-95, 95, n), 5),
+        'LON': np.round(rng.uniform(-180, 180, n), 5),
+        'SOG': np.round(rng.uniform(0, 60, n), 1),
+        'COG': np.round(rng.uniform(0, 720, n), 1),
+        'VesselName': rng.choice(NAMES, n),
+        'VesselType': rng.choice(['70', '80', '30', '61', '99', 'nan'], n),
+        'Length': rng.choice([0.0, 120.0, 250.0, np.nan], n),
+        'Width': rng.choice([0.0, 20.0, 40.0], n),
+        'Destination': rng.choice(['SINGAPORE', 'COLOMBO', '', 'nan'], n),
+    }).sample(frac=1.0, random_state=1).sort_values('BaseDateTime', kind='stable')
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    legacy_limit = 100_000
+    rng = np.random.default_rng(5)
+    processor = KaggleAISProcessor(data_dir='.', kaggle_dir=str(Path(__file__).resolve().parent.parent / 'kaggle_data'))
+
+    # DWT from known dimensions (unknown dimensions draw a random DWT on both paths)
+    length = pd.Series([120.0, 250.0, 40.0, 400.0])
+    width = pd.Series([20.0, 40.0, 8.0, 60.0])
+    types = pd.Series(['Tanker', 'Container Ship', 'Cargo', 'Tanker'])
+    assert processor._estimate_dwt_array(length, width, types, rng).tolist() == \
+        [processor._estimate_dwt(l, w, t) for l, w, t in zip(length, width, types)]
+
+    print(f"{'vessels':>10} {'legacy':>11} {'vectorized':>11} {'speedup':>8}")
+    for n in sizes:
+        df = make_positions(n, 2, rng)
+
+        start = time.perf_counter()
+        vectorized = processor.transform_ais_to_vessels(df, max_vessels=None)
+        vectorized_s = time.perf_counter() - start
+
+        if n <= legacy_limit:
+            start = time.perf_counter()
+            legacy = legacy_transform(processor, df)
+            legacy_s = time.perf_counter() - start
+            for old, new in zip(legacy, vectorized):
+                for key in DETERMINISTIC:
+                    assert same(old[key], new[key]), (key, old[key], new[key])
+            assert len(legacy) == len(vectorized)
+            print(f"{n:>10,} {legacy_s:>9.2f} s {vectorized_s:>9.2f} s {legacy_s / vectorized_s:>7.0f}x")
+        else:
+            print(f"{n:>10,} {'(skipped)':>11} {vectorized_s:>9.2f} s")
+
+
+if __name__ == "__main__":
+    main()
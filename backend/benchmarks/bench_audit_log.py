@@ -0,0 +1,66 @@
+"""
+Audit log pagination benchmark
+Sorting (and filtering) the whole retained log on every admin request against pages served
+from the audit log store's time and per-user indexes.
+
+Usage: python benchmarks/bench_audit_log.py [n_entries] [n_queries]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from audit_log import AuditLogStore
+
+USERS = [f'user{i}@seatrace.com' for i in range(200)]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    random.seed(7)
+    start_time = datetime(2026, 1, 1)
+    logs = [{
+        'timestamp': (start_time + timedelta(seconds=i * 5)).isoformat(),
+        'user_email': random.choice(USERS), 'action': 'VIEW', 'resource': 'vessels_list'
+    } for i in range(n)]
+    store = AuditLogStore(logs, retention=n)
+    since = logs[n // 2]['timestamp']
+    until = logs[n * 3 // 4]['timestamp']
+    queries = [
+        ('newest page', {}),
+        ('page at offset 5000', {'offset': 5000}),
+        ('one user', {'user_email': USERS[3]}),
+        ('one user, time range', {'user_email': USERS[3], 'since': since, 'until': until}),
+        ('time range', {'since': since, 'until': until}),
+    ]
+
+    def scan(user_email=None, since=None, until=None, offset=0, limit=100):
+        matches = [log for log in logs
+                   if (user_email is None or log['user_email'] == user_email)
+                   and (since is None or log['timestamp'] >= since) and (until is None or log['timestamp'] <= until)]
+        return len(matches), sorted(matches, key=lambda x: x['timestamp'], reverse=True)[offset:offset + limit]
+
+    print(f"{n:,} audit entries, {len(USERS)} users")
+    print(f"{'query':<24} {'matches':>8} {'scan':>10} {'store':>10}")
+    for label, kwargs in queries:
+        total, page = store.query(**kwargs)
+        assert (total, page) == scan(**kwargs)
+
+        timings = []
+        for fn in (scan, store.query):
+            runs = max(1, n_queries // 20) if fn is scan else n_queries
+            start = time.perf_counter()
+            for _ in range(runs):
+                fn(**kwargs)
+            timings.append((time.perf_counter() - start) / runs * 1000.0)
+        print(f"{label:<24} {total:>8,} {timings[0]:>7.2f} ms {timings[1]:>7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Gridded environmental field benchmark
+Builds synthetic wind/current NPZ fields, checks that a uniform field reproduces the scalar
+forecast, then times 72 h particle forecasts on a time-varying field (cold and warm tile cache).
+
+Usage: python benchmarks/bench_env_fields.py [n_particles ...]
+"""
+
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+FIELDS_DIR = tempfile.mkdtemp()
+os.environ['ENV_FIELDS_DIR'] = FIELDS_DIR
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from env_fields import MS_TO_KNOTS, field_tile_cache, write_npz_field
+from spill_forecasting import SpillForecaster
+
+SPILL = {'lat': 19.0, 'lon': 72.8, 'size_tons': 25}
+ENV = {'wind_speed': 15, 'wind_dir': 225, 'current_speed': 0.8, 'current_dir': 120,
+       'start_time': '2026-10-01T06:00:00Z'}
+DURATION_HOURS = 72
+
+
+def make_fields():
+    """0.1 deg, 3-hourly grid over the Arabian Sea: one uniform file, one with a rotating wind"""
+    lat = np.arange(5.0, 30.0001, 0.1)
+    lon = np.arange(55.0, 80.0001, 0.1)
+    times = np.arange(np.datetime64('2026-10-01T00'), np.datetime64('2026-10-06T00'), np.timedelta64(3, 'h'))
+    shape = (len(times), len(lat), len(lon))
+
+    def vector(speed_knots, direction_deg):
+        rad = math.radians(direction_deg)
+        return (np.full(shape, speed_knots * math.sin(rad) / MS_TO_KNOTS, dtype=np.float32),
+                np.full(shape, speed_knots * math.cos(rad) / MS_TO_KNOTS, dtype=np.float32))
+
+    u10, v10 = vector(ENV['wind_speed'], ENV['wind_dir'])
+    uo, vo = vector(ENV['current_speed'], ENV['current_dir'])
+    write_npz_field(Path(FIELDS_DIR) / 'uniform.npz', lat, lon, times, u10=u10, v10=v10, uo=uo, vo=vo)
+
+    # Wind veering 90 degrees over the run and strengthening to the north; eddying current
+    hours = ((times - times[0]) / np.timedelta64(1, 'h')).astype(np.float32)[:, None, None]
+    veer = np.radians(225 + 90 * hours / hours.max())
+    speed = (6 + 0.2 * (lat[None, :, None] - 5)).astype(np.float32)
+    phase = np.radians(lon[None, None, :] * 20)
+    write_npz_field(Path(FIELDS_DIR) / 'monsoon.npz', lat, lon, times,
+                    u10=np.broadcast_to(speed * np.sin(veer), shape), v10=np.broadcast_to(speed * np.cos(veer), shape),
+                    uo=np.broadcast_to(0.4 * np.cos(phase), shape), vo=np.broadcast_to(0.4 * np.sin(phase), shape))
+    return shape
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    shape = make_fields()
+    forecaster = SpillForecaster()
+    print(f"Fields: {shape[0]} steps x {shape[1]} x {shape[2]} cells, 4 variables, in {FIELDS_DIR}")
+
+    # A uniform field has to reproduce the scalar run
+    scalar = forecaster.simulate_particles(SPILL, ENV, DURATION_HOURS, n_particles=10_000, seed=1)
+    uniform_env = dict(ENV, wind_speed=0, current_speed=0, wind_field='uniform.npz', current_field='uniform.npz')
+    uniform = forecaster.simulate_particles(SPILL, uniform_env, DURATION_HOURS, n_particles=10_000, seed=1)
+    for a, b in zip(scalar['horizons'], uniform['horizons']):
+        assert abs(a['centroid']['lat'] - b['centroid']['lat']) < 1e-6
+        assert abs(a['centroid']['lon'] - b['centroid']['lon']) < 1e-6
+        assert abs(a['area_km2'] - b['area_km2']) < 1e-3 * a['area_km2']
+
+    field_env = dict(ENV, wind_field='monsoon.npz', current_field='monsoon.npz')
+    print(f"{'particles':>10}  {'scalar':>8}  {'cold':>8}  {'warm':>8}  {'centroid 72h':>20}")
+    for n in sizes:
+        _, t_scalar = timed(lambda: forecaster.simulate_particles(SPILL, ENV, DURATION_HOURS, n_particles=n, seed=1))
+        field_tile_cache.clear()
+        _, t_cold = timed(lambda: forecaster.simulate_particles(SPILL, field_env, DURATION_HOURS, n_particles=n, seed=1))
+        forecast, t_warm = timed(lambda: forecaster.simulate_particles(SPILL, field_env, DURATION_HOURS, n_particles=n, seed=1))
+        c = forecast['horizons'][-1]['centroid']
+        print(f"{n:>10,}  {t_scalar:>6.2f} s  {t_cold:>6.2f} s  {t_warm:>6.2f} s  {c['lat']:>9.4f} {c['lon']:>9.4f}")
+    print(f"\nTile cache: {field_tile_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Forecast cache benchmark
+Replays a user dragging the wind slider back and forth over a few positions: every what-if
+forecast computed from scratch vs. looked up in ForecastCache.
+
+Usage: python benchmarks/bench_forecast_cache.py [requests] [hours]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from forecast_cache import ForecastCache, forecast_key, quantize_env
+from spill_forecasting import env_conditions_from, spill_forecaster
+
+SPILL_ID = 'OS-00001'
+SPILL = {'spill_id': SPILL_ID, 'lat': 19.0, 'lon': 72.8, 'size_tons': 25}
+SLIDER_POSITIONS = [5, 7.5, 10, 12.5, 15, 17.5, 20]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    hours = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    rng = random.Random(7)
+    # Slider values jitter a little around the positions (UI float noise), quantization absorbs it
+    requests = [{'wind_speed': rng.choice(SLIDER_POSITIONS) + rng.uniform(-0.04, 0.04),
+                 'wind_direction': rng.choice([0, 90, 180])} for _ in range(n)]
+
+    start = time.perf_counter()
+    for params in requests:
+        spill_forecaster.what_if(SPILL, env_conditions_from(params), duration_hours=hours)
+    t_plain = time.perf_counter() - start
+
+    cache = ForecastCache()
+    latencies = []
+    for params in requests:
+        t = time.perf_counter()
+        env = quantize_env(env_conditions_from(params))
+        key = forecast_key(SPILL_ID, SPILL, env, hours)
+        cache.get_or_compute(key, lambda: spill_forecaster.what_if(SPILL, env, duration_hours=hours))
+        latencies.append(time.perf_counter() - t)
+    t_cached = sum(latencies)
+    stats = cache.stats()
+    hit_latencies = sorted(latencies)[:stats['hits']]
+
+    print(f"{n} what-if requests, {hours} h forecasts")
+    print(f"uncached : {t_plain:7.2f} s  ({t_plain / n * 1000:.1f} ms each)")
+    print(f"cached   : {t_cached:7.2f} s  (hits {stats['hits']}, misses {stats['misses']}, "
+          f"median hit {hit_latencies[len(hit_latencies) // 2] * 1e6:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
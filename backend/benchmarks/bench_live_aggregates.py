@@ -0,0 +1,87 @@
+"""
+Live aggregates benchmark
+Dashboard numbers from rescanning every vessel and spill (the old endpoint) against the
+incrementally maintained counters, plus the cost of one incremental update.
+
+Usage: python benchmarks/bench_live_aggregates.py [n_vessels] [n_spills]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from live_aggregates import LiveAggregates
+
+RUNS = 50
+
+
+def rescan(vessels, spills):
+    vessels_data = list(vessels.values())
+    spills_data = list(spills.values())
+    return {
+        'total_vessels': len(vessels_data),
+        'active_vessels': len([v for v in vessels_data if v.get('status') == 'Active']),
+        'high_risk_vessels': len([v for v in vessels_data if v.get('risk_level') in ['High', 'Critical']]),
+        'avg_compliance': round(sum(v.get('compliance_rating', 0) for v in vessels_data) / len(vessels_data), 1),
+        'by_severity': {sev: len([s for s in spills_data if s['severity'] == sev]) for sev in ('High', 'Medium', 'Low')}
+    }
+
+
+def from_aggregates(aggregates):
+    vessels = aggregates.vessel_summary()
+    spills = aggregates.spill_summary()
+    return {
+        'total_vessels': vessels['total'],
+        'active_vessels': vessels['by_status'].get('Active', 0),
+        'high_risk_vessels': vessels['high_risk'],
+        'avg_compliance': round(vessels['avg_compliance'], 1),
+        'by_severity': {sev: spills['by_severity'].get(sev, 0) for sev in ('High', 'Medium', 'Low')}
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        result = fn()
+    return result, (time.perf_counter() - start) / RUNS * 1000.0
+
+
+def main():
+    n_vessels = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_spills = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    random.seed(42)
+    vessels = {str(i): {'status': random.choice(['Active', 'Docked']), 'risk_level': random.choice(['Low', 'Medium', 'High']),
+                        'type': random.choice(['Tanker', 'Cargo', 'Fishing']), 'compliance_rating': random.uniform(0, 10)}
+               for i in range(n_vessels)}
+    spills = {f'SP{i}': {'spill_id': f'SP{i}', 'severity': random.choice(['High', 'Medium', 'Low']), 'status': 'Active'}
+              for i in range(n_spills)}
+
+    aggregates = LiveAggregates()
+    start = time.perf_counter()
+    aggregates.load_vessels(vessels, 0)
+    aggregates.load_spills(spills, 0)
+    load_ms = (time.perf_counter() - start) * 1000.0
+
+    expected, rescan_ms = timed(lambda: rescan(vessels, spills))
+    actual, aggregate_ms = timed(lambda: from_aggregates(aggregates))
+    assert expected == actual, (expected, actual)
+
+    start = time.perf_counter()
+    for i in range(1000):
+        imo = str(i)
+        vessels[imo]['risk_level'] = 'High'
+        aggregates.update_vessels({imo: vessels[imo]})
+    update_us = (time.perf_counter() - start) / 1000 * 1e6
+    assert rescan(vessels, spills) == from_aggregates(aggregates)
+
+    print(f"{n_vessels:,} vessels, {n_spills:,} spills (initial count {load_ms:.0f} ms)")
+    print(f"{'rescan':>12}: {rescan_ms:8.2f} ms/request")
+    print(f"{'aggregates':>12}: {aggregate_ms:8.4f} ms/request, {update_us:.1f} us per vessel update")
+
+
+if __name__ == "__main__":
+    main()
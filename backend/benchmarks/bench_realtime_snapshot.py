@@ -0,0 +1,85 @@
+"""
+Realtime analysis snapshot benchmark
+Compares rebuilding and serializing the full vessel/spill list on every broadcast with the
+versioned snapshot service (diff + one shared delta). Every event moves the whole fleet one
+FleetState.step() and changes the risk level of a few vessels.
+
+Usage: python benchmarks/bench_realtime_snapshot.py [n_vessels] [changed_per_event]
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fleet_state import FleetState
+from realtime_snapshot import RealtimeSnapshotService, spill_payload, vessel_payload, vessel_position
+
+EVENTS = 20
+RISK_LEVELS = ['Low', 'Medium', 'High']
+
+
+def make_fleet(n):
+    random.seed(1)
+    vessels = {str(9000000 + i): {
+        'imo': str(9000000 + i), 'name': f'Vessel {i}', 'lat': random.uniform(-60, 60), 'lon': random.uniform(-180, 180),
+        'speed': round(random.uniform(0, 25), 1), 'course': random.randint(0, 359), 'destination': 'Mumbai',
+        'compliance_rating': 8.0, 'risk_level': 'Low', 'last_inspection': '2026-01-01'
+    } for i in range(n)}
+    spills = {f'SP{i}': {
+        'spill_id': f'SP{i}', 'vessel_name': f'Vessel {i}', 'lat': 10.0, 'lon': 70.0, 'severity': 'High',
+        'size_tons': 5, 'estimated_area_km2': 1.2, 'status': 'Active', 'confidence': 0.9
+    } for i in range(100)}
+    return vessels, spills
+
+
+def full_payload(vessels, spills):
+    """What broadcast_realtime_analysis used to build and encode for every event"""
+    return json.dumps({
+        'vessels': [dict(vessel_payload(v), **vessel_position(v)) for v in vessels.values()],
+        'oil_spills': [spill_payload(s) for s in spills.values()]
+    })
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    changed = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    vessels, spills = make_fleet(n)
+    fleet = FleetState(seed=1)
+    fleet.load(vessels)
+    imos = list(vessels)
+    service = RealtimeSnapshotService()
+    service.refresh([vessel_payload(v) for v in vessels.values()], [spill_payload(s) for s in spills.values()])
+
+    full_time = snap_time = 0.0
+    full_bytes = delta_bytes = 0
+    for _ in range(EVENTS):
+        fleet.step()
+        fleet.sync_to_dicts()
+        for imo in random.sample(imos, changed):
+            vessels[imo]['risk_level'] = random.choice(RISK_LEVELS)
+
+        start = time.perf_counter()
+        encoded = full_payload(vessels, spills)
+        full_time += time.perf_counter() - start
+        full_bytes += len(encoded)
+
+        base = service.revision
+        start = time.perf_counter()
+        service.refresh([vessel_payload(v) for v in vessels.values()], [spill_payload(s) for s in spills.values()])
+        encoded = json.dumps(service.delta(base))
+        snap_time += time.perf_counter() - start
+        delta_bytes += len(encoded)
+
+    print(f"{n:,} vessels all moving, {changed} risk changes per event, {EVENTS} events")
+    print(f"{'full rebuild':>14}: {full_time / EVENTS * 1000:8.2f} ms/event  {full_bytes / EVENTS / 1024:10.1f} KiB/event")
+    print(f"{'snapshot+delta':>14}: {snap_time / EVENTS * 1000:8.2f} ms/event  {delta_bytes / EVENTS / 1024:10.1f} KiB/event")
+    print("(the full rebuild is paid per event; the delta is encoded once per revision room, not per client)")
+
+
+if __name__ == "__main__":
+    main()
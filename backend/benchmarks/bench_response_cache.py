@@ -0,0 +1,59 @@
+"""
+Serialized response cache benchmark
+Per-request json serialization of the vessel list (what jsonify did for every poll) against the
+shared snapshot: one serialization per revision, then cached bytes and a lazily built gzip body.
+
+Usage: python benchmarks/bench_response_cache.py [n_vessels] [requests_per_revision]
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from response_cache import ORJSON_AVAILABLE, ResponseCache
+
+REVISIONS = 5
+
+
+def make_vessels(n):
+    random.seed(1)
+    return {str(9000000 + i): {
+        'imo': str(9000000 + i), 'name': f'Vessel {i}', 'type': 'Tanker', 'flag': 'Panama',
+        'lat': random.uniform(-60, 60), 'lon': random.uniform(-180, 180), 'speed': random.uniform(0, 25),
+        'course': random.uniform(0, 360), 'destination': 'Mumbai', 'risk_level': 'Low', 'status': 'Active',
+        'compliance_rating': 8.0, 'track': 'o~hjEsrbrLq@w@' * 8
+    } for i in range(n)}
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    polls = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    vessels = make_vessels(n)
+    cache = ResponseCache()
+
+    start = time.perf_counter()
+    for _ in range(REVISIONS * polls):
+        body = json.dumps(list(vessels.values())).encode()
+    per_request = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for revision in range(REVISIONS):
+        for poll in range(polls):
+            snapshot = cache.get('vessels', revision, lambda: list(vessels.values()))
+            snapshot.body_for('gzip' if poll % 2 else 'identity')
+    cached = time.perf_counter() - start
+
+    requests = REVISIONS * polls
+    print(f"{n:,} vessels, {REVISIONS} revisions x {polls} polls (orjson: {ORJSON_AVAILABLE})")
+    print(f"{'per request':>12}: {per_request / requests * 1000:8.2f} ms/request  ({len(body) / 1024:.0f} KiB)")
+    print(f"{'cached':>12}: {cached / requests * 1000:8.2f} ms/request  "
+          f"(gzip {len(snapshot.body_for('gzip')) / 1024:.0f} KiB, {cache.metrics})")
+
+
+if __name__ == "__main__":
+    main()
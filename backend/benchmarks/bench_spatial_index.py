@@ -0,0 +1,74 @@
+"""
+Spatial index benchmark
+Times bbox, radius and k-nearest queries against a brute-force scan at 100k vessels.
+
+Usage: python benchmarks/bench_spatial_index.py [n_vessels] [n_queries]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from spatial_index import GridIndex, haversine_km
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    return (time.perf_counter() - start) / len(queries) * 1000.0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rng = np.random.default_rng(42)
+
+    lat = rng.uniform(-80, 80, n)
+    lon = rng.uniform(-180, 180, n)
+    index = GridIndex(cell_deg=1.0)
+
+    start = time.perf_counter()
+    index.build(lat, lon)
+    build_ms = (time.perf_counter() - start) * 1000.0
+
+    # One simulation tick worth of movement
+    lat2 = lat + rng.uniform(-0.0005, 0.0005, n)
+    lon2 = lon + rng.uniform(-0.0005, 0.0005, n)
+    start = time.perf_counter()
+    index.move(lat2, lon2)
+    move_ms = (time.perf_counter() - start) * 1000.0
+
+    centers = [(float(a), float(b)) for a, b in zip(rng.uniform(-60, 60, n_queries), rng.uniform(-180, 180, n_queries))]
+    boxes = [(a - 1.0, b - 1.0, a + 1.0, b + 1.0) for a, b in centers]
+
+    bbox_ms = timed(index.query_bbox, boxes)
+    radius_ms = timed(lambda a, b: index.query_radius(a, b, 20.0), centers)
+    knn_ms = timed(lambda a, b: index.nearest(a, b, 10), centers)
+
+    def brute_radius(a, b):
+        d = haversine_km(a, b, index.lat, index.lon)
+        return np.nonzero(d <= 20.0)[0]
+    brute_ms = timed(brute_radius, centers[:50])
+
+    # Sanity check against the brute-force answer
+    for a, b in centers[:20]:
+        rows, _ = index.query_radius(a, b, 20.0)
+        assert set(rows.tolist()) == set(brute_radius(a, b).tolist())
+
+    print(f"Vessels: {n:,}  Queries: {n_queries}")
+    print(f"  build               {build_ms:8.2f} ms")
+    print(f"  move (1 tick)       {move_ms:8.2f} ms")
+    print(f"  bbox 2x2 deg        {bbox_ms:8.3f} ms/query")
+    print(f"  radius 20 km        {radius_ms:8.3f} ms/query")
+    print(f"  10-nearest          {knn_ms:8.3f} ms/query")
+    print(f"  brute-force radius  {brute_ms:8.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
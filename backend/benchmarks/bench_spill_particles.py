@@ -0,0 +1,51 @@
+"""
+Spill particle engine benchmark
+Times SpillForecaster.simulate_particles for a 72 h forecast (24/48/72 h hulls) at several
+ensemble sizes, with and without concentration grids.
+
+Usage: python benchmarks/bench_spill_particles.py [n_particles ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from spill_forecasting import SpillForecaster
+
+SPILL = {'lat': 19.0, 'lon': 72.8, 'size_tons': 25}
+ENV = {'wind_speed': 15, 'wind_dir': 225, 'current_speed': 0.8, 'current_dir': 120}
+DURATION_HOURS = 72
+REPEATS = 3
+
+
+def timed(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    forecaster = SpillForecaster()
+
+    print(f"{'particles':>10}  {'hulls':>8}  {'+grids':>8}  {'area 72h':>10}  {'mass 72h':>8}")
+    for n in sizes:
+        forecast, t_hull = timed(lambda: forecaster.simulate_particles(
+            SPILL, ENV, DURATION_HOURS, n_particles=n, seed=1))
+        _, t_grid = timed(lambda: forecaster.simulate_particles(
+            SPILL, ENV, DURATION_HOURS, n_particles=n, seed=1, grid=True))
+        last = forecast['horizons'][-1]
+        assert [h['hours'] for h in forecast['horizons']] == [24, 48, 72]
+        assert last['polygon'][0] == last['polygon'][-1]
+        print(f"{n:>10,}  {t_hull:>6.2f} s  {t_grid:>6.2f} s  {last['area_km2']:>7.0f} km2  "
+              f"{last['mass_remaining_pct']:>6.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Marine strike transform benchmark
+Times the vectorized MarineStrikeProcessor.transform_to_strikes against the original
+per-row iterrows() version, then a chunked CSV stream at full size.
+
+Usage: python benchmarks/bench_strike_transform.py [n_rows ...]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from marine_strike_processor import MarineStrikeProcessor
+
+LEGACY_MAX_ROWS = 100_000   # iterrows() gets too slow to wait for beyond this
+COMPARED_FIELDS = ('date', 'species', 'outcome', 'vessel_type', 'severity')
+
+
+def legacy_transform(df):
+    """The original per-row transform (kept here for comparison)"""
+    strikes = []
+    for _, row in df.iterrows():
+        try:
+            year = row.get('YEAR') or row.get('Year') or datetime.now().year
+            month = row.get('MONTH') or row.get('Month') or 1
+            day = row.get('DAY') or row.get('Day') or 1
+            try:
+                date_str = f"{int(year)}-{int(month):02d}-{int(day):02d}"
+            except:
+                date_str = datetime.now().strftime('%Y-%m-%d')
+            lat = row.get('LATITUDE') or row.get('Latitude') or row.get('lat')
+            lon = row.get('LONGITUDE') or row.get('Longitude') or row.get('lon')
+            if pd.isna(lat) or pd.isna(lon):
+                lat = random.uniform(5.0, 25.0)
+                lon = random.uniform(65.0, 100.0)
+            species = row.get('COMMON_NAME') or row.get('Species') or row.get('SPECIES') or "Unknown Whale"
+            outcome = row.get('OUTCOME') or row.get('Outcome') or "Strike"
+            strikes.append({
+                'id': f"STR-{random.randint(10000, 99999)}",
+                'date': date_str,
+                'lat': float(lat),
+                'lon': float(lon),
+                'species': str(species),
+                'outcome': str(outcome),
+                'vessel_type': str(row.get('VESSEL_TYPE', 'Unknown')),
+                'severity': 'High' if 'Mortality' in str(outcome) else 'Medium'
+            })
+        except Exception:
+            continue
+    return strikes
+
+
+def make_strikes(n, seed=11):
+    """NOAA-style export: some rows without coordinates or month"""
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(-60, 60, n).round(4)
+    lon = rng.uniform(-180, 180, n).round(4)
+    lat[rng.random(n) < 0.05] = np.nan
+    month = rng.integers(1, 13, n).astype(np.float64)
+    month[rng.random(n) < 0.02] = np.nan
+    return pd.DataFrame({
+        'YEAR': rng.integers(1990, 2024, n),
+        'MONTH': month,
+        'DAY': rng.integers(1, 29, n),
+        'LATITUDE': lat,
+        'LONGITUDE': lon,
+        'COMMON_NAME': rng.choice(['Humpback Whale', 'Fin Whale', 'Right Whale', 'Sea Turtle'], n),
+        'OUTCOME': rng.choice(['Mortality', 'Serious Injury', 'Non-serious Injury', 'Unknown'], n),
+        'VESSEL_TYPE': rng.choice(['Container Ship', 'Tanker', 'Ferry', 'Recreational'], n),
+    })
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    work_dir = tempfile.mkdtemp()
+    processor = MarineStrikeProcessor(data_dir=work_dir, kaggle_dir=work_dir)
+
+    print(f"{'rows':>10}  {'legacy':>10}  {'vectorized':>10}  {'speedup':>7}")
+    for n in sizes:
+        df = make_strikes(n)
+        strikes, t_new = timed(lambda: processor.transform_to_strikes(df))
+        assert len(strikes) == n
+        assert len({s['id'] for s in strikes}) == n, "duplicate strike IDs"
+
+        if n <= LEGACY_MAX_ROWS:
+            legacy, t_old = timed(lambda: legacy_transform(df))
+            assert len(legacy) == n
+            for old, new in zip(legacy, strikes):
+                assert all(old[k] == new[k] for k in COMPARED_FIELDS), (old, new)
+            has_coords = df['LATITUDE'].notna().to_numpy()
+            lat_new = np.array([s['lat'] for s in strikes])
+            lat_old = np.array([s['lat'] for s in legacy])
+            assert np.array_equal(lat_new[has_coords], lat_old[has_coords])
+            print(f"{n:>10,}  {t_old:>8.2f} s  {t_new:>8.2f} s  {t_old / t_new:>6.0f}x")
+        else:
+            print(f"{n:>10,}  {'(skipped)':>10}  {t_new:>8.2f} s")
+
+    # End to end: chunked read of a CSV with the largest size
+    n = max(sizes)
+    with tempfile.TemporaryDirectory() as tmp:
+        make_strikes(n).to_csv(Path(tmp) / 'strikes.csv', index=False)
+        strikes, t_stream = timed(lambda: processor.stream_strikes(Path(tmp)))
+        assert len(strikes) == n
+    print(f"\nstream_strikes over a {n:,}-row CSV: {t_stream:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
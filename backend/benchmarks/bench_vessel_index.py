@@ -0,0 +1,81 @@
+"""
+Vessel listing index benchmark
+Filtered, cursor-paginated pages from the secondary indexes against filtering and sorting the
+vessel dicts on every request, at 100k vessels.
+
+Usage: python benchmarks/bench_vessel_index.py [n_vessels] [n_queries]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fleet_state import FleetState
+from spatial_index import GridIndex
+from vessel_index import VesselIndex
+
+TYPES = ['Tanker', 'Cargo', 'Container Ship', 'Fishing', 'Passenger', 'Tug']
+FLAGS = ['Panama', 'Liberia', 'Marshall Islands', 'India', 'Singapore', 'Malta', 'Bahamas', 'Greece']
+QUERIES = [
+    ({'type': ['Tanker']}, None, (None, None)),
+    ({'type': ['Tanker'], 'flag': ['India']}, None, (None, None)),
+    ({'risk_level': ['High']}, None, (None, None)),
+    ({'type': ['Cargo', 'Container Ship']}, (0.0, 40.0, 30.0, 100.0), (5.0, 15.0)),
+]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    random.seed(42)
+    vessels = {str(9000000 + i): {
+        'imo': str(9000000 + i), 'name': f'Vessel {i}', 'type': random.choice(TYPES), 'flag': random.choice(FLAGS),
+        'risk_level': 'High' if random.random() < 0.02 else 'Low', 'status': 'Active',
+        'lat': random.uniform(-60, 60), 'lon': random.uniform(-180, 180), 'speed': random.uniform(0, 25)
+    } for i in range(n)}
+
+    fleet = FleetState(seed=1)
+    fleet.load(vessels)
+    grid = GridIndex(cell_deg=1.0)
+    grid.build(fleet.lat, fleet.lon, keys=fleet.imos, epoch=fleet.epoch)
+    index = VesselIndex()
+    start = time.perf_counter()
+    index.sync(fleet, 0)
+    build_ms = (time.perf_counter() - start) * 1000.0
+
+    def indexed(filters, bbox, speed_range):
+        rows = grid.query_bbox(*bbox) if bbox else None
+        return index.query(filters, rows=rows, speed=fleet.speed, speed_range=speed_range, limit=100)
+
+    def scan(filters, bbox, speed_range):
+        low, high = speed_range
+        matches = [v for v in vessels.values()
+                   if all(v[f] in values for f, values in filters.items())
+                   and (bbox is None or (bbox[0] <= v['lat'] <= bbox[2] and bbox[1] <= v['lon'] <= bbox[3]))
+                   and (low is None or v['speed'] >= low) and (high is None or v['speed'] <= high)]
+        return sorted(matches, key=lambda v: v['imo'])[:100], len(matches)
+
+    print(f"{n:,} vessels, index build {build_ms:.1f} ms")
+    print(f"{'query':<48} {'matches':>8} {'scan':>10} {'index':>10}")
+    for filters, bbox, speed_range in QUERIES:
+        page, total, _ = indexed(filters, bbox, speed_range)
+        scanned, scan_total = scan(filters, bbox, speed_range)
+        assert total == scan_total and [index.imos[r] for r in page] == [v['imo'] for v in scanned]
+
+        timings = []
+        for fn in (scan, indexed):
+            runs = max(1, n_queries // 20) if fn is scan else n_queries
+            start = time.perf_counter()
+            for _ in range(runs):
+                fn(filters, bbox, speed_range)
+            timings.append((time.perf_counter() - start) / runs * 1000.0)
+        label = ' '.join(f"{k}={','.join(v)}" for k, v in filters.items()) + (' +bbox+speed' if bbox else '')
+        print(f"{label:<48} {total:>8,} {timings[0]:>7.2f} ms {timings[1]:>7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,34 @@
 """
 SeaTrace Data Manager
-Handles persistent storage of application data using JSON files
+Handles persistent storage of application data using JSON snapshots plus append-only journals
 """
 
+import atexit
 import json
 import os
 import threading
 from datetime import datetime
 from pathlib import Path
 
+from audit_log import AuditLogStore
+from id_allocator import IDAllocator
+from journal import CollectionJournal, JournalWriter
+
+# Group commit / compaction settings
+JOURNAL_FLUSH_INTERVAL_MS = int(os.environ.get('JOURNAL_FLUSH_INTERVAL_MS', 200))
+JOURNAL_FLUSH_MAX_RECORDS = int(os.environ.get('JOURNAL_FLUSH_MAX_RECORDS', 256))
+JOURNAL_COMPACT_EVERY = int(os.environ.get('JOURNAL_COMPACT_EVERY', 5000))
+
 class DataManager:
     def __init__(self, data_dir="data"):
-        self.data_dir = Path(data_dir)
+        self.data_dir = Path(data_dir).resolve()  # Journals / counters are still written at exit, after any chdir
         self.data_dir.mkdir(exist_ok=True)
         self.lock = threading.Lock()
+        self.journal_writer = JournalWriter(
+            flush_interval_ms=JOURNAL_FLUSH_INTERVAL_MS,
+            flush_max_records=JOURNAL_FLUSH_MAX_RECORDS,
+            compact_every=JOURNAL_COMPACT_EVERY
+        )
 
         # Data file paths
         self.vessels_file = self.data_dir / "vessels.json"
@@ -24,8 +39,16 @@ class DataManager:
         self.audit_logs_file = self.data_dir / "audit_logs.json"
         self.company_users_file = self.data_dir / "company_users.json"
 
+        # Persisted ID counters (users, spills, alerts, strikes)
+        self.ids = IDAllocator(self.data_dir / "id_counters.json")
+
+        # Mutations per collection, so cached serializations know when they are stale
+        self.revisions = {}
+
         # Initialize data structures
         self._load_all_data()
+        self.journal_writer.start()
+        atexit.register(self.journal_writer.stop)
 
     def _load_json_file(self, file_path, default=None):
         """Load data from JSON file with error handling"""
@@ -52,26 +75,39 @@ class DataManager:
         except IOError as e:
             print(f"Error saving {file_path}: {e}")
 
+    def _load_collection(self, name, file_path, default):
+        """Load a snapshot, replay its journal on top and register it for group commit"""
+        data = self._load_json_file(file_path, default)
+        journal = CollectionJournal(file_path, lambda: getattr(self, name), self.lock)
+        replayed = journal.replay(data)
+        if replayed:
+            print(f"Replayed {replayed} journal records for {name}")
+        self.journal_writer.register(name, journal)
+        return data
+
     def _load_all_data(self):
         """Load all data from files"""
-        self.vessels = self._load_json_file(self.vessels_file, {})
-        self.oil_spills = self._load_json_file(self.oil_spills_file, {})
-        self.users = self._load_json_file(self.users_file, {})
-        self.credentials = self._load_json_file(self.credentials_file, {})
-        self.audit_logs = self._load_json_file(self.audit_logs_file, [])
-        self.company_users = self._load_json_file(self.company_users_file, {})
-        self.marine_strikes = self._load_json_file(self.marine_strikes_file, [])
+        self.vessels = self._load_collection('vessels', self.vessels_file, {})
+        self.oil_spills = self._load_collection('oil_spills', self.oil_spills_file, {})
+        self.users = self._load_collection('users', self.users_file, {})
+        self.credentials = self._load_collection('credentials', self.credentials_file, {})
+        self.audit_log = AuditLogStore(self._load_collection('audit_logs', self.audit_logs_file, []))
+        self.company_users = self._load_collection('company_users', self.company_users_file, {})
+        self.marine_strikes = self._load_collection('marine_strikes', self.marine_strikes_file, [])
+
+    def _journal(self, name, op, key=None, value=None):
+        """Record a mutation (caller holds self.lock). Disk I/O happens in the journal writer."""
+        self.revisions[name] = self.revisions.get(name, 0) + 1
+        pending = self.journal_writer.journals[name].append(op, key, value)
+        self.journal_writer.notify(pending)
+
+    def revision(self, name):
+        """Mutation count of a collection since startup"""
+        return self.revisions.get(name, 0)
 
     def save_all_data(self):
-        """Save all data to files"""
-        with self.lock:
-            self._save_json_file(self.vessels_file, self.vessels)
-            self._save_json_file(self.oil_spills_file, self.oil_spills)
-            self._save_json_file(self.users_file, self.users)
-            self._save_json_file(self.credentials_file, self.credentials)
-            self._save_json_file(self.audit_logs_file, self.audit_logs)
-            self._save_json_file(self.company_users_file, self.company_users)
-            self._save_json_file(self.marine_strikes_file, self.marine_strikes)
+        """Flush pending journal records and compact every collection into its snapshot"""
+        self.journal_writer.compact_all()
 
     # User operations
     def get_users(self):
@@ -88,14 +124,14 @@ class DataManager:
         """Add new user"""
         with self.lock:
             self.users[email] = user_data
-            self._save_json_file(self.users_file, self.users)
+            self._journal('users', 'set', email, user_data)
 
     def update_user(self, email, updates):
         """Update existing user"""
         with self.lock:
             if email in self.users:
                 self.users[email].update(updates)
-                self._save_json_file(self.users_file, self.users)
+                self._journal('users', 'update', email, updates)
                 return self.users[email]
             return None
 
@@ -104,21 +140,98 @@ class DataManager:
         with self.lock:
             if email in self.users:
                 del self.users[email]
-                self._save_json_file(self.users_file, self.users)
+                self._journal('users', 'delete', email)
                 return True
             return False
 
     def get_next_user_id(self):
-        """Generate next user ID"""
+        """Allocate the next user ID (existing users are scanned only to seed the counter once)"""
+        # The allocator may wait on the cross-process file lock and write the counter file, so the
+        # data lock is only taken for the seed scan
+        def max_user_id():
+            with self.lock:
+                return max((int(user.get('id', 0)) for user in self.users.values()), default=0)
+        return self.ids.next('user', seed=max_user_id)
+
+    # Vessel operations
+    def get_vessels(self):
+        """Get all vessels"""
+        with self.lock:
+            return self.vessels
+
+    def get_vessel(self, imo):
+        """Get vessel by IMO"""
+        with self.lock:
+            return self.vessels.get(imo)
+
+    def update_vessel(self, imo, updates):
+        """Update existing vessel"""
+        with self.lock:
+            if imo in self.vessels:
+                self.vessels[imo].update(updates)
+                self._journal('vessels', 'update', imo, updates)
+                return self.vessels[imo]
+            return None
+
+    def apply_vessel_changes(self, upserts, deletes=()):
+        """
+        Apply a batch of vessel changes: {imo: vessel or changed fields} and IMOs to delete.
+        New IMOs are inserted whole, existing ones updated in place (dicts stay shared with
+        the simulation); only the touched vessels are journaled.
+        """
+        added, updated, deleted = [], [], []
         with self.lock:
-            if not self.users:
-                return 1
-            ids = [int(user.get('id', 0)) for user in self.users.values()]
-            return max(ids) + 1
+            for imo, fields in upserts.items():
+                if imo in self.vessels:
+                    self.vessels[imo].update(fields)
+                    self._journal('vessels', 'update', imo, fields)
+                    updated.append(imo)
+                else:
+                    self.vessels[imo] = fields
+                    self._journal('vessels', 'set', imo, fields)
+                    added.append(imo)
+            for imo in deletes:
+                if self.vessels.pop(imo, None) is not None:
+                    self._journal('vessels', 'delete', imo)
+                    deleted.append(imo)
+        return {'added': added, 'updated': updated, 'deleted': deleted}
 
-    # ... (Keep existing methods)
+    def replace_vessels(self, vessels):
+        """Replace the whole vessel collection (full AIS sync / seeding)"""
+        self._replace_collection('vessels', vessels)
+
+    def _replace_collection(self, name, data):
+        """Swap a collection and write it straight to its snapshot (the journal restarts empty)"""
+        with self.lock:
+            setattr(self, name, data)
+            self.revisions[name] = self.revisions.get(name, 0) + 1
+        self.journal_writer.journals[name].compact()
+
+    # Oil spill operations
+    def get_oil_spills(self, status=None):
+        """Get all oil spills, optionally only those with a given status"""
+        with self.lock:
+            if status is None:
+                return self.oil_spills
+            return {sid: s for sid, s in self.oil_spills.items() if s.get('status') == status}
+
+    def get_oil_spill(self, spill_id):
+        """Get oil spill by ID"""
+        with self.lock:
+            return self.oil_spills.get(spill_id)
+
+    def add_oil_spill(self, spill_data):
+        """Add new oil spill"""
+        with self.lock:
+            self.oil_spills[spill_data['spill_id']] = spill_data
+            self._journal('oil_spills', 'set', spill_data['spill_id'], spill_data)
 
     # Audit log operations
+    @property
+    def audit_logs(self):
+        """Retained audit entries as a list (what the journal compacts into the snapshot)"""
+        return self.audit_log.entries_list()
+
     def add_audit_log(self, log_entry):
         """Add audit log entry"""
         with self.lock:
@@ -126,28 +239,29 @@ class DataManager:
             if 'timestamp' not in log_entry:
                 log_entry['timestamp'] = datetime.now().isoformat()
 
-            self.audit_logs.append(log_entry)
-
-            # Keep only last 1000 entries
-            if len(self.audit_logs) > 1000:
-                self.audit_logs = self.audit_logs[-1000:]
-
-            self._save_json_file(self.audit_logs_file, self.audit_logs)
+            # Entries past AUDIT_LOG_RETENTION are dropped by the store (and from the snapshot on compaction)
+            self.audit_log.append(log_entry)
+            self._journal('audit_logs', 'append', value=log_entry)
 
     def get_audit_logs(self):
-        with self.lock:
-            return self.audit_logs
+        return self.audit_log.entries_list()
+
+    def query_audit_logs(self, user_email=None, since=None, until=None, offset=0, limit=100):
+        """(total, page) of audit entries, newest first (see AuditLogStore.query)"""
+        return self.audit_log.query(user_email=user_email, since=since, until=until, offset=offset, limit=limit)
 
     def get_marine_strikes(self):
         """Get list of marine strikes"""
         with self.lock:
             return self.marine_strikes
 
+    def replace_marine_strikes(self, strikes):
+        """Replace the marine strike list (Kaggle sync)"""
+        self._replace_collection('marine_strikes', strikes)
+
     def get_user_audit_logs(self, email, limit=50):
-        """Get audit logs for specific user"""
-        with self.lock:
-            user_logs = [log for log in self.audit_logs if log.get('user_email') == email]
-            return user_logs[-limit:]
+        """Get audit logs for specific user (oldest first)"""
+        return self.audit_log.query(user_email=email, limit=limit)[1][::-1]
 
     # Company operations
     def get_company_users(self, company):
@@ -160,5 +274,13 @@ class DataManager:
         with self.lock:
             return list(self.company_users.keys())
 
+def create_data_manager(data_dir="data"):
+    """Build the configured storage backend (STORAGE_BACKEND=json|sqlite)"""
+    backend = os.environ.get('STORAGE_BACKEND', 'json').lower()
+    if backend == 'sqlite':
+        from sqlite_storage import SQLiteDataManager
+        return SQLiteDataManager(data_dir=data_dir, db_path=os.environ.get('SQLITE_PATH'))
+    return DataManager(data_dir=data_dir)
+
 # Global data manager instance
-data_manager = DataManager()
+data_manager = create_data_manager()
@@ -0,0 +1,342 @@
+"""
+Gridded Environmental Fields for SeaTrace
+Wind/current u/v on lat x lon x time grids from local NPZ/NetCDF files, memory-mapped and read in cached tiles.
+"""
+import os
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import netCDF4
+    NETCDF_AVAILABLE = True
+except ImportError:
+    NETCDF_AVAILABLE = False
+    print("Warning: netCDF4 not available, NetCDF environment fields disabled. Install with: pip install netCDF4")
+
+ENV_FIELDS_DIR = Path(os.environ.get('ENV_FIELDS_DIR') or Path(__file__).parent / 'data' / 'env_fields')
+ENV_TILE_SIZE = int(os.environ.get('ENV_TILE_SIZE', 64))               # Grid cells per tile side
+ENV_TILE_CACHE_TILES = int(os.environ.get('ENV_TILE_CACHE_TILES', 512))  # Tiles kept in memory (16 KB each at 64)
+
+MS_TO_KNOTS = 1.943844
+KNOT_UNITS = ('knots', 'knot', 'kt', 'kts', 'kn')
+TIME_UNITS = {'seconds': 1, 'second': 1, 'minutes': 60, 'minute': 60, 'hours': 3600, 'hour': 3600, 'days': 86400, 'day': 86400}
+
+# u/v variable names, checked in order (ERA5 / CMEMS / HYCOM conventions and plain names)
+WIND_VARIABLES = (('u10', 'v10'), ('wind_u', 'wind_v'), ('uwnd', 'vwnd'))
+CURRENT_VARIABLES = (('uo', 'vo'), ('current_u', 'current_v'), ('water_u', 'water_v'))
+LAT_NAMES = ('lat', 'latitude')
+LON_NAMES = ('lon', 'longitude')
+TIME_NAMES = ('time',)
+ZIP_LOCAL_HEADER = struct.Struct('<4s5H3I2H')  # Fixed part of a zip local file header (30 bytes)
+
+
+def npz_arrays(path):
+    """
+    Members of an .npz file. Stored (np.savez) members are returned as read-only np.memmap
+    views into the archive; compressed (np.savez_compressed) members have to be read fully.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with zf.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+
+            f.seek(info.header_offset)
+            header = ZIP_LOCAL_HEADER.unpack(f.read(ZIP_LOCAL_HEADER.size))
+            f.seek(info.header_offset + ZIP_LOCAL_HEADER.size + header[-2] + header[-1])
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+
+            if dtype.hasobject or 0 in shape:
+                with zf.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                         order='F' if fortran else 'C')
+    return arrays
+
+
+def write_npz_field(path, lat, lon, times=None, units='m s-1', **variables):
+    """
+    Write a field file this module can memory-map (uncompressed .npz).
+    times: datetime64 values or epoch seconds; variables: name -> (time, lat, lon) or (lat, lon) array.
+    """
+    arrays = {'lat': np.asarray(lat, dtype=np.float64), 'lon': np.asarray(lon, dtype=np.float64), 'units': np.array(units)}
+    if times is not None:
+        arrays['time'] = np.asarray(times)
+    for name, values in variables.items():
+        arrays[name] = np.asarray(values, dtype=np.float32)
+    np.savez(path, **arrays)
+
+
+def _epoch_seconds(values, units=None):
+    """Time coordinate -> float epoch seconds (datetime64, '<unit> since <date>' or plain epoch seconds)"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ms]').astype(np.int64) / 1000.0
+    values = values.astype(np.float64)
+    if units and ' since ' in units:
+        unit, _, origin = units.partition(' since ')
+        origin = np.datetime64(origin.strip().replace(' ', 'T')[:19], 'ms').astype(np.int64) / 1000.0
+        return origin + values * TIME_UNITS.get(unit.strip().lower(), 1)
+    return values
+
+
+def _knots_factor(units):
+    return 1.0 if str(units or '').strip().lower() in KNOT_UNITS else MS_TO_KNOTS
+
+
+def _first(names, available):
+    return next((name for name in names if name in available), None)
+
+
+class _Axis:
+    """Coordinate axis: fractional grid indices of arbitrary positions (arithmetic on uniform grids)"""
+
+    def __init__(self, coords):
+        coords = np.asarray(coords, dtype=np.float64)
+        self.descending = len(coords) > 1 and coords[0] > coords[-1]
+        self.coords = coords[::-1] if self.descending else coords
+        self.size = len(coords)
+        steps = np.diff(self.coords)
+        self.uniform = len(steps) > 0 and np.allclose(steps, steps[0], rtol=1e-6, atol=1e-9)
+        self.step = float(steps[0]) if len(steps) else 1.0
+
+    def index(self, values, clamp=False):
+        """Fractional index per value; NaN outside the axis unless clamp"""
+        values = np.asarray(values, dtype=np.float64)
+        if self.size == 1:
+            return np.zeros_like(values)
+        if self.uniform:
+            fi = (values - self.coords[0]) / self.step
+            if clamp:
+                fi = np.clip(fi, 0, self.size - 1)
+            else:
+                fi[(fi < 0) | (fi > self.size - 1)] = np.nan
+        else:
+            fill = None if clamp else np.nan
+            fi = np.interp(values, self.coords, np.arange(self.size, dtype=np.float64), left=fill, right=fill)
+        return (self.size - 1) - fi if self.descending else fi
+
+
+class TileCache:
+    """LRU of field tiles shared by all fields (one read per tile until evicted)"""
+
+    def __init__(self, capacity=ENV_TILE_CACHE_TILES):
+        self.capacity = max(1, int(capacity))
+        self.tiles = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        with self.lock:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+        tile = load()
+        with self.lock:
+            self.tiles[key] = tile
+            self.tiles.move_to_end(key)
+            while len(self.tiles) > self.capacity:
+                self.tiles.popitem(last=False)
+        return tile
+
+    def clear(self):
+        with self.lock:
+            self.tiles.clear()
+
+    def stats(self):
+        with self.lock:
+            return {'tiles': len(self.tiles), 'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses}
+
+
+class GriddedField:
+    """
+    One u/v vector field (wind or current) of a field file, sampled in knots.
+    Data stays on disk (np.memmap / NetCDF variable); only the tiles around the sampled
+    positions are read, through the shared TileCache.
+    """
+
+    def __init__(self, path, variable_names, cache=None, tile_size=ENV_TILE_SIZE):
+        self.path = Path(path)
+        self.cache = cache or field_tile_cache
+        self.tile_size = max(2, int(tile_size))
+        self.read_lock = threading.Lock()   # NetCDF handles are not thread-safe
+        self.dataset = None
+        mtime = self.path.stat().st_mtime_ns
+
+        if self.path.suffix.lower() in ('.nc', '.nc4', '.netcdf'):
+            if not NETCDF_AVAILABLE:
+                raise ValueError(f"netCDF4 is required to read {self.path.name}")
+            self.dataset = netCDF4.Dataset(self.path)
+            source = self.dataset.variables
+        else:
+            source = npz_arrays(self.path)
+
+        lat_name, lon_name, time_name = _first(LAT_NAMES, source), _first(LON_NAMES, source), _first(TIME_NAMES, source)
+        if lat_name is None or lon_name is None:
+            raise ValueError(f"{self.path.name}: lat/lon coordinates not found")
+        lat, lon = np.asarray(source[lat_name][:]), np.asarray(source[lon_name][:])
+        times = None
+        if time_name:
+            times = _epoch_seconds(np.asarray(source[time_name][:]), getattr(source[time_name], 'units', None))
+        names = next(((u, v) for u, v in variable_names if u in source and v in source), None)
+        if names is None:
+            raise ValueError(f"{self.path.name}: none of {list(variable_names)} found")
+
+        self.names = names
+        self.variables = [source[name] for name in names]
+        self.lat_axis = _Axis(lat)
+        self.lon_axis = _Axis(lon)
+        self.time_axis = _Axis(times if times is not None else [0.0])
+        self.wraps = float(np.max(lon)) > 180          # 0..360 longitudes
+        if self.dataset is not None:
+            units = getattr(self.variables[0], 'units', None)
+        else:
+            units = str(source['units']) if 'units' in source else 'm s-1'
+        self.factor = _knots_factor(units)
+        self.key = (str(self.path), mtime, names)
+
+        shape = self.variables[0].shape
+        self.has_time = len(shape) >= 3
+        self.has_depth = len(shape) == 4   # (time, depth, lat, lon): surface layer only
+        if shape[-2:] != (self.lat_axis.size, self.lon_axis.size):
+            raise ValueError(f"{self.path.name}: {names[0]} shape {shape} does not match the lat/lon grid")
+
+    def close(self):
+        if self.dataset is not None:
+            self.dataset.close()
+            self.dataset = None
+
+    def _read_tile(self, v, t, ti, tj):
+        size = self.tile_size
+        i0, j0 = ti * size, tj * size
+        i1, j1 = min(i0 + size, self.lat_axis.size), min(j0 + size, self.lon_axis.size)
+        var = self.variables[v]
+        with self.read_lock:
+            if self.has_depth:
+                block = var[t, 0, i0:i1, j0:j1]
+            elif self.has_time:
+                block = var[t, i0:i1, j0:j1]
+            else:
+                block = var[i0:i1, j0:j1]
+        block = np.ma.filled(np.ma.asarray(block, dtype=np.float32), np.nan) if np.ma.isMaskedArray(block) else block
+        return np.array(block, dtype=np.float32) * np.float32(self.factor)
+
+    def _window(self, v, t, i_min, i_max, j_min, j_max):
+        """Grid rows i_min..i_max and columns j_min..j_max of variable v at time index t, from tiles"""
+        size = self.tile_size
+        window = np.empty((i_max - i_min + 1, j_max - j_min + 1), dtype=np.float32)
+        for ti in range(i_min // size, i_max // size + 1):
+            for tj in range(j_min // size, j_max // size + 1):
+                tile = self.cache.get(self.key + (v, t, ti, tj), lambda: self._read_tile(v, t, ti, tj))
+                r0, r1 = max(i_min, ti * size), min(i_max, ti * size + tile.shape[0] - 1)
+                c0, c1 = max(j_min, tj * size), min(j_max, tj * size + tile.shape[1] - 1)
+                window[r0 - i_min:r1 - i_min + 1, c0 - j_min:c1 - j_min + 1] = \
+                    tile[r0 - ti * size:r1 - ti * size + 1, c0 - tj * size:c1 - tj * size + 1]
+        return window
+
+    def sample(self, lat, lon, when):
+        """
+        Trilinear (bilinear in space, linear in time) u/v in knots at particle positions.
+        when: epoch seconds (clamped to the field's time range). NaN outside the grid or on land.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        if self.wraps:
+            lon = np.where(lon < 0, lon + 360, lon)
+        fi = self.lat_axis.index(lat)
+        fj = self.lon_axis.index(lon)
+        outside = np.isnan(fi) | np.isnan(fj)
+        inside = np.flatnonzero(~outside) if outside.any() else None
+        if inside is not None:
+            if len(inside) == 0:
+                return np.full(len(lat), np.nan), np.full(len(lat), np.nan)
+            fi, fj = fi[inside], fj[inside]
+
+        i0 = np.minimum(fi.astype(np.int64), max(self.lat_axis.size - 2, 0))
+        j0 = np.minimum(fj.astype(np.int64), max(self.lon_axis.size - 2, 0))
+        wi, wj = fi - i0, fj - j0
+        i_min, i_max = int(i0.min()), min(int(i0.max()) + 1, self.lat_axis.size - 1)
+        j_min, j_max = int(j0.min()), min(int(j0.max()) + 1, self.lon_axis.size - 1)
+
+        # Blend the two bracketing time steps over the (small) window the particles cover
+        ft = float(self.time_axis.index(np.array([float(when)]), clamp=True)[0])
+        t0 = int(ft)
+        t1 = min(t0 + 1, self.time_axis.size - 1)
+        wt = ft - t0
+        windows = []
+        for component in (0, 1):
+            window = self._window(component, t0, i_min, i_max, j_min, j_max)
+            if wt > 0 and t1 != t0:
+                window = (1 - wt) * window + wt * self._window(component, t1, i_min, i_max, j_min, j_max)
+            windows.append(window.ravel())
+        windows = np.stack(windows)
+
+        # Bilinear: gather the four corners of both components with flat indices
+        width = j_max - j_min + 1
+        di = 1 if i_max > i_min else 0
+        dj = 1 if j_max > j_min else 0
+        corner = (i0 - i_min) * width + (j0 - j_min)
+        values = ((1 - wi) * (1 - wj)) * windows.take(corner, axis=1)
+        values += ((1 - wi) * wj) * windows.take(corner + dj, axis=1)
+        values += (wi * (1 - wj)) * windows.take(corner + di * width, axis=1)
+        values += (wi * wj) * windows.take(corner + di * width + dj, axis=1)
+
+        if inside is None:
+            return values[0], values[1]
+        u = np.full(len(lat), np.nan)
+        v = np.full(len(lat), np.nan)
+        u[inside] = values[0]
+        v[inside] = values[1]
+        return u, v
+
+
+field_tile_cache = TileCache()
+_fields = {}
+_fields_lock = threading.Lock()
+
+
+def resolve_field_path(name):
+    """File name inside ENV_FIELDS_DIR (directories in `name` are ignored)"""
+    path = ENV_FIELDS_DIR / Path(str(name)).name
+    if not path.is_file():
+        raise ValueError(f"Environment field '{name}' not found")
+    return path
+
+
+def load_field(name, variable_names):
+    """Open (or reuse) the wind/current field of a file in ENV_FIELDS_DIR; reopened when the file changes"""
+    path = resolve_field_path(name)
+    key = (str(path), tuple(variable_names))
+    mtime = path.stat().st_mtime_ns
+    with _fields_lock:
+        field = _fields.get(key)
+        if field is None or field.key[1] != mtime:
+            if field is not None:
+                field.close()
+            field = _fields[key] = GriddedField(path, variable_names)
+        return field
+
+
+def available_fields():
+    """Field files in ENV_FIELDS_DIR"""
+    if not ENV_FIELDS_DIR.is_dir():
+        return []
+    suffixes = ('.npz', '.nc', '.nc4') if NETCDF_AVAILABLE else ('.npz',)
+    return sorted(p.name for p in ENV_FIELDS_DIR.iterdir() if p.suffix.lower() in suffixes)
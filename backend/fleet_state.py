@@ -0,0 +1,172 @@
+"""
+Fleet State Engine for SeaTrace
+Keeps vessel kinematics in contiguous NumPy arrays and advances the whole fleet in one batched step.
+"""
+import threading
+import numpy as np
+
+# Movement model (matches the original per-vessel simulation)
+DEG_PER_TICK_PER_10KTS = 0.0005  # ~visual movement per tick
+LAT_LIMIT = 80.0                 # Boundary bounce latitude
+BOUNCE_JITTER_DEG = 20.0         # Course jitter applied on bounce
+WANDER_PROBABILITY = 0.05        # Chance per tick of a small course change
+WANDER_DEG = 2.0
+
+
+class FleetState:
+    def __init__(self, seed=None):
+        self.lock = threading.Lock()
+        self.rng = np.random.default_rng(seed)
+        self._source = None
+
+        # IMO -> row index, plus row-aligned views
+        self.index = {}
+        self.imos = []
+        self.vessels = []
+
+        self.lat = np.zeros(0, dtype=np.float64)
+        self.lon = np.zeros(0, dtype=np.float64)
+        self.speed = np.zeros(0, dtype=np.float64)
+        self.course = np.zeros(0, dtype=np.float64)
+
+        # Vessel type as a code into self.types, and the current high-risk flag
+        self.types = []
+        self.type_code = np.zeros(0, dtype=np.int32)
+        self.high_risk = np.zeros(0, dtype=bool)
+
+        # Bumped whenever rows are rebuilt, so row indices handed to clients can be invalidated
+        self.epoch = 0
+
+        # True when the arrays hold positions not yet written back to the dicts
+        self.dirty = False
+
+        # Bumped on every step and risk flag change, so cached serializations of the fleet know when they are stale
+        self.version = 0
+
+    def __len__(self):
+        return len(self.imos)
+
+    def load(self, vessels_dict):
+        """Rebuild the arrays from a {imo: vessel} dict"""
+        with self.lock:
+            self._source = vessels_dict
+            self.imos = list(vessels_dict.keys())
+            self.vessels = [vessels_dict[imo] for imo in self.imos]
+            self.index = {imo: row for row, imo in enumerate(self.imos)}
+
+            n = len(self.imos)
+            self.lat = np.fromiter((float(v.get('lat', 0)) for v in self.vessels), dtype=np.float64, count=n)
+            self.lon = np.fromiter((float(v.get('lon', 0)) for v in self.vessels), dtype=np.float64, count=n)
+            self.speed = np.fromiter((float(v.get('speed', 10)) for v in self.vessels), dtype=np.float64, count=n)
+            self.course = np.fromiter((float(v.get('course', 0)) for v in self.vessels), dtype=np.float64, count=n)
+
+            type_codes = {}
+            self.type_code = np.fromiter(
+                (type_codes.setdefault(str(v.get('type') or ''), len(type_codes)) for v in self.vessels),
+                dtype=np.int32, count=n
+            )
+            self.types = list(type_codes)
+            self.high_risk = np.fromiter((v.get('risk_level') == 'High' for v in self.vessels), dtype=bool, count=n)
+            self.epoch += 1
+            self.dirty = False
+
+    def ensure_loaded(self, vessels_dict):
+        """Reload if the underlying vessel collection was replaced or resized"""
+        if vessels_dict is not self._source or len(vessels_dict) != len(self.imos):
+            self.sync_to_dicts()
+            self.load(vessels_dict)
+            return True
+        return False
+
+    def refresh_vessel(self, imo):
+        """Pick up external edits (e.g. PUT /api/vessels/<imo>) for a single row"""
+        with self.lock:
+            row = self.index.get(imo)
+            if row is None:
+                return False
+            v = self.vessels[row]
+            self.lat[row] = float(v.get('lat', self.lat[row]))
+            self.lon[row] = float(v.get('lon', self.lon[row]))
+            self.speed[row] = float(v.get('speed', self.speed[row]))
+            self.course[row] = float(v.get('course', self.course[row]))
+            self.type_code[row] = self._type_code(str(v.get('type') or ''))
+            self.high_risk[row] = v.get('risk_level') == 'High'
+            return True
+
+    def _type_code(self, vessel_type):
+        try:
+            return self.types.index(vessel_type)
+        except ValueError:
+            self.types.append(vessel_type)
+            return len(self.types) - 1
+
+    def step(self):
+        """Advance every vessel by one tick (bounce, wrap and wander included)"""
+        with self.lock:
+            n = len(self.imos)
+            if n == 0:
+                return
+
+            course_rad = np.radians(self.course)
+            speed_factor = self.speed * (DEG_PER_TICK_PER_10KTS / 10.0)
+            self.lat += speed_factor * np.cos(course_rad)
+            self.lon += speed_factor * np.sin(course_rad)
+
+            # Boundary bounce: reverse course with some jitter and clamp latitude
+            out = np.abs(self.lat) > LAT_LIMIT
+            n_out = int(np.count_nonzero(out))
+            if n_out:
+                jitter = self.rng.uniform(-BOUNCE_JITTER_DEG, BOUNCE_JITTER_DEG, n_out)
+                self.course[out] = (self.course[out] + 180.0 + jitter) % 360.0
+                np.clip(self.lat, -LAT_LIMIT, LAT_LIMIT, out=self.lat)
+
+            # Wrap longitude for Pacific crossing
+            self.lon[self.lon > 180.0] = -180.0
+            self.lon[self.lon < -180.0] = 180.0
+
+            # Random course adjustment for realism (Wander)
+            wander = self.rng.random(n) < WANDER_PROBABILITY
+            n_wander = int(np.count_nonzero(wander))
+            if n_wander:
+                delta = self.rng.uniform(-WANDER_DEG, WANDER_DEG, n_wander)
+                self.course[wander] = (self.course[wander] + delta) % 360.0
+
+            self.dirty = True
+            self.version += 1
+
+    def live_rows(self, rows):
+        """Copies of the vessel dicts of some rows with their simulated position (the dicts are not written)"""
+        with self.lock:
+            return [dict(self.vessels[row], lat=self.lat[row].item(), lon=self.lon[row].item(),
+                         course=self.course[row].item()) for row in rows]
+
+    def live_vessel(self, imo):
+        """Copy of one vessel with its simulated position (None if it is not in the fleet)"""
+        with self.lock:
+            row = self.index.get(imo)
+        return self.live_rows([row])[0] if row is not None else None
+
+    def sync_to_dicts(self):
+        """Write simulated positions back into the vessel dicts (only if changed)"""
+        with self.lock:
+            if not self.dirty:
+                return
+            for v, lat, lon, course in zip(self.vessels, self.lat.tolist(), self.lon.tolist(), self.course.tolist()):
+                v['lat'] = lat
+                v['lon'] = lon
+                v['course'] = course
+            self.dirty = False
+
+    def movement_batch(self):
+        """Lightweight per-vessel update list for the frontend (rounded coordinates)"""
+        with self.lock:
+            lat = np.round(self.lat, 4).tolist()
+            lon = np.round(self.lon, 4).tolist()
+            course = np.round(self.course, 1).tolist()
+            speed = self.speed.tolist()
+        return [
+            {'imo': imo, 'lat': la, 'lon': lo, 'course': c, 'speed': s}
+            for imo, la, lo, c, s in zip(self.imos, lat, lon, course, speed)
+        ]
+
+fleet_state = FleetState()
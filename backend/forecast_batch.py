@@ -0,0 +1,263 @@
+"""
+Batch Spill Forecasting for SeaTrace
+Spill x scenario what-if forecasts (with parameter sweeps) run on a pool of worker processes, results streamed as they finish.
+"""
+import atexit
+import itertools
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from forecast_cache import forecast_cache, forecast_key, quantize_env
+from spill_forecasting import ENV_FIELD_KEYS, env_conditions_from, spill_forecaster
+
+FORECAST_WORKERS = int(os.environ.get('FORECAST_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+FORECAST_BATCH_MAX_JOBS = int(os.environ.get('FORECAST_BATCH_MAX_JOBS', 1000))  # Spills x scenarios per batch
+FORECAST_BATCH_KEEP = 20          # Finished batches kept for status polling
+FORECAST_WORKER_NICE = 10         # Workers yield the CPU to the server process (vessel broadcasting)
+FORECAST_MAX_HOURS = 168
+
+# Parameters a scenario (or a sweep axis) may set
+SCENARIO_FIELDS = ('wind_speed', 'wind_direction', 'current_speed', 'current_direction', 'hours') + ENV_FIELD_KEYS
+
+
+def expand_scenarios(scenarios=None, sweep=None):
+    """
+    Base scenarios x the cartesian product of the sweep axes.
+    scenarios: [{param: value}], sweep: {param: [values]}; unknown parameters raise ValueError.
+    """
+    scenarios = list(scenarios or [{}])
+    sweep = sweep or {}
+    for params in scenarios + [sweep]:
+        if not isinstance(params, dict):
+            raise ValueError('Scenarios must be objects of forecast parameters')
+        unknown = set(params) - set(SCENARIO_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown scenario parameters: {', '.join(sorted(unknown))}")
+    if not all(isinstance(values, list) and values for values in sweep.values()):
+        raise ValueError('Sweep axes must be non-empty lists of values')
+
+    names = list(sweep)
+    combos = [dict(zip(names, values)) for values in itertools.product(*sweep.values())]
+    return [{**base, **combo} for base in scenarios for combo in combos]
+
+
+def scenario_params(scenario):
+    """(quantized env_conditions, hours) of a scenario, as used for the forecast and its cache key"""
+    hours = min(max(int(float(scenario.get('hours', 24))), 1), FORECAST_MAX_HOURS)
+    return quantize_env(env_conditions_from(scenario)), hours
+
+
+def job_key(job):
+    spill, scenario = job
+    env, hours = scenario_params(scenario)
+    return forecast_key(spill.get('spill_id'), spill, env, hours)
+
+
+def run_forecast_job(job):
+    """One what-if forecast (same output as /api/simulate/predict)"""
+    spill, scenario = job
+    env, hours = scenario_params(scenario)
+    return spill_forecaster.what_if(spill, env, duration_hours=hours)
+
+
+class ForecastWorker:
+    """
+    A separate interpreter running forecast_worker.py. Fresh processes rather than forks of the
+    server, so they share no event loop, locks or sockets with it; restarted if one dies.
+    """
+
+    def __init__(self):
+        self.process = None
+
+    def _start(self):
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        self.process = subprocess.Popen([sys.executable, os.path.join(backend_dir, 'forecast_worker.py')],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=backend_dir)
+
+    def run(self, job):
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+        try:
+            pickle.dump(job, self.process.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+            self.process.stdin.flush()
+            return pickle.load(self.process.stdout)
+        except (EOFError, OSError, pickle.UnpicklingError) as e:
+            self.stop()
+            return ('error', f"Forecast worker failed: {e}")
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.process = None
+
+
+class ForecastBatchRunner:
+    """
+    Batches are split into jobs on one shared queue. Each worker process is driven by a thread
+    that only waits on its pipes, so the event loop keeps running while forecasts compute.
+    """
+
+    def __init__(self, workers=FORECAST_WORKERS, cache=forecast_cache):
+        self.n_workers = max(1, int(workers))
+        self.cache = cache
+        self.jobs = queue.Queue()
+        self.workers = []
+        self.batches = OrderedDict()
+        self.emitters = {}   # batch_id -> emit(event, payload)
+        self.lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def _ensure_workers(self):
+        with self.lock:
+            while len(self.workers) < self.n_workers:
+                worker = ForecastWorker()
+                self.workers.append(worker)
+                threading.Thread(target=self._drive, args=(worker,), daemon=True).start()
+
+    def _drive(self, worker):
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                break
+            batch_id, index, job, key = item
+            with self.lock:
+                batch = self.batches[batch_id]
+                cancelled = batch['status'] == 'cancelled'
+                if cancelled:
+                    batch['cancelled'] += 1
+            if cancelled:
+                self._finish_if_done(batch_id)
+                continue
+
+            status, value = worker.run(job)
+            if status == 'ok':
+                self.cache.put(key, value)
+            self._record(batch_id, index, job, status, value)
+
+    def _record(self, batch_id, index, job, status, value):
+        spill, scenario = job
+        result = {'batch_id': batch_id, 'job': index, 'spill_id': spill.get('spill_id'), 'scenario': scenario}
+        if status == 'ok':
+            result.update(value)
+        else:
+            result['error'] = value
+        with self.lock:
+            batch = self.batches[batch_id]
+            batch['results'].append(result)
+            batch['completed' if status == 'ok' else 'failed'] += 1
+            emit = self.emitters.get(batch_id)
+        if emit:
+            emit('forecast_result', result)
+        self._finish_if_done(batch_id)
+
+    def _finish_if_done(self, batch_id):
+        with self.lock:
+            batch = self.batches[batch_id]
+            if batch['finished_at'] or batch['completed'] + batch['failed'] + batch['cancelled'] < batch['total']:
+                return
+            if batch['status'] == 'running':
+                batch['status'] = 'finished'
+            batch['finished_at'] = datetime.utcnow().isoformat()
+            batch['elapsed_seconds'] = round(time.time() - batch['_started'], 3)
+            emit = self.emitters.pop(batch_id, None)
+        if emit:
+            emit('forecast_batch_complete', self.status(batch_id))
+
+    def create(self, spills, scenarios, user=None):
+        """Register a batch of every spill under every scenario; run() queues it"""
+        jobs = [(spill, scenario) for spill in spills for scenario in scenarios]
+        if not jobs:
+            raise ValueError('No forecasts to run')
+        if len(jobs) > FORECAST_BATCH_MAX_JOBS:
+            raise ValueError(f"Batch has {len(jobs)} forecasts, the limit is {FORECAST_BATCH_MAX_JOBS}")
+
+        batch = {
+            'batch_id': uuid.uuid4().hex[:12],
+            'user': user,
+            'status': 'queued',
+            'total': len(jobs),
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'created_at': datetime.utcnow().isoformat(),
+            'finished_at': None,
+            'elapsed_seconds': None,
+            'results': [],
+            '_jobs': jobs
+        }
+        with self.lock:
+            # Only finished batches are evicted; running ones are still referenced by queued jobs
+            finished = [bid for bid, b in self.batches.items() if b['finished_at']]
+            for bid in finished[:max(0, len(finished) + 1 - FORECAST_BATCH_KEEP)]:
+                del self.batches[bid]
+            self.batches[batch['batch_id']] = batch
+        return batch
+
+    def run(self, batch_id, emit=None):
+        """
+        Queue a created batch. emit(event, payload) is called with 'forecast_result' as each
+        forecast finishes and 'forecast_batch_complete' at the end (from the worker threads, or
+        right here for cached forecasts).
+        """
+        self._ensure_workers()
+        with self.lock:
+            batch = self.batches[batch_id]
+            jobs = batch.pop('_jobs')
+            batch['status'] = 'running'
+            batch['_started'] = time.time()
+            if emit:
+                self.emitters[batch_id] = emit
+        # Forecasts already in the cache are answered right away; the rest go to the workers
+        for index, job in enumerate(jobs):
+            try:
+                key = job_key(job)
+            except ValueError as e:
+                self._record(batch_id, index, job, 'error', str(e))
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record(batch_id, index, job, 'ok', cached)
+            else:
+                self.jobs.put((batch_id, index, job, key))
+
+    def cancel(self, batch_id):
+        """Skip the forecasts of a batch that have not started yet (False if it already finished)"""
+        with self.lock:
+            batch = self.batches.get(batch_id)
+            if batch is None or batch['finished_at']:
+                return False
+            batch['status'] = 'cancelled'
+            return True
+
+    def status(self, batch_id, offset=None):
+        """Progress of a batch; with offset, also the results from that position on"""
+        with self.lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return None
+            summary = {k: v for k, v in batch.items() if k != 'results' and not k.startswith('_')}
+            if offset is not None:
+                summary['results'] = batch['results'][offset:]
+            return summary
+
+    def shutdown(self):
+        for _ in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.stop()
+
+
+forecast_batches = ForecastBatchRunner()
@@ -0,0 +1,124 @@
+"""
+Forecast Cache for SeaTrace
+Memoized what-if forecasts keyed by spill, spill revision, quantized environment and duration (LRU + TTL).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from env_fields import resolve_field_path
+
+FORECAST_CACHE_SIZE = int(os.environ.get('FORECAST_CACHE_SIZE', 1024))          # Forecasts kept
+FORECAST_CACHE_TTL_SECONDS = float(os.environ.get('FORECAST_CACHE_TTL_SECONDS', 900))
+
+# Environment quantization: values closer than this share one forecast
+SPEED_STEP_KNOTS = 0.1
+DIRECTION_STEP_DEG = 1.0
+
+# Spill fields the forecast depends on; a change to any of them is a new spill revision
+SPILL_FORECAST_FIELDS = ('lat', 'lon', 'size_tons')
+
+
+def spill_revision(spill):
+    """Short fingerprint of the forecast-relevant fields of a spill record"""
+    values = json.dumps([spill.get(field) for field in SPILL_FORECAST_FIELDS], default=str)
+    return hashlib.blake2b(values.encode(), digest_size=8).hexdigest()
+
+
+def quantize_env(env_conditions):
+    """
+    env_conditions with speeds / directions snapped to the cache grid (the forecast is then run
+    on exactly these values, so a cached result is the true result for its key).
+    Gridded fields are identified by file name and modification time.
+    """
+    env = dict(env_conditions)
+    for key in ('wind_speed', 'current_speed'):
+        if key in env:
+            env[key] = round(round(float(env[key]) / SPEED_STEP_KNOTS) * SPEED_STEP_KNOTS, 3)
+    for key in ('wind_dir', 'current_dir'):
+        if key in env:
+            env[key] = round(round((float(env[key]) % 360) / DIRECTION_STEP_DEG) * DIRECTION_STEP_DEG, 3) % 360
+    return env
+
+
+def forecast_key(spill_id, spill, env_conditions, duration_hours):
+    """(spill_id, spill revision, quantized env, duration) - env_conditions must already be quantized"""
+    env_items = []
+    for key, value in sorted(env_conditions.items()):
+        if key in ('wind_field', 'current_field') and value:
+            value = (str(value), resolve_field_path(value).stat().st_mtime_ns)
+        env_items.append((key, value))
+    return (spill_id, spill_revision(spill), tuple(env_items), int(duration_hours))
+
+
+class ForecastCache:
+    """Thread-safe LRU with a time-to-live per entry and hit/miss/eviction counters"""
+
+    def __init__(self, max_entries=FORECAST_CACHE_SIZE, ttl_seconds=FORECAST_CACHE_TTL_SECONDS):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.entries = OrderedDict()    # key -> (expires_at, value)
+        self.lock = threading.Lock()
+        self.metrics = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key):
+        """Cached value or None (expired entries count as misses)"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self.entries[key]
+                self.metrics['expirations'] += 1
+                entry = None
+            if entry is None:
+                self.metrics['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.metrics['hits'] += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.metrics['evictions'] += 1
+
+    def get_or_compute(self, key, compute):
+        """Cached value, or compute() stored under key"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, spill_id):
+        """Drop every forecast of a spill (its record changed or was removed)"""
+        with self.lock:
+            stale = [key for key in self.entries if key[0] == spill_id]
+            for key in stale:
+                del self.entries[key]
+            self.metrics['invalidations'] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.metrics['hits'] + self.metrics['misses']
+            return {
+                **self.metrics,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hit_rate': round(self.metrics['hits'] / lookups, 4) if lookups else None
+            }
+
+
+forecast_cache = ForecastCache()
@@ -0,0 +1,37 @@
+"""
+Forecast Worker for SeaTrace
+Worker process of the batch forecast pool: pickled jobs on stdin, pickled ('ok', result) / ('error', message) on stdout.
+"""
+import os
+import pickle
+import sys
+
+# Results go to a private copy of stdout; fd 1 itself (prints, import warnings) is pointed at stderr
+RESULTS = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+from forecast_batch import FORECAST_WORKER_NICE, run_forecast_job
+
+
+def main():
+    try:
+        os.nice(FORECAST_WORKER_NICE)
+    except (AttributeError, OSError):
+        pass
+
+    jobs = sys.stdin.buffer
+    while True:
+        try:
+            job = pickle.load(jobs)
+        except EOFError:
+            break
+        try:
+            outcome = ('ok', run_forecast_job(job))
+        except Exception as e:
+            outcome = ('error', str(e))
+        pickle.dump(outcome, RESULTS, protocol=pickle.HIGHEST_PROTOCOL)
+        RESULTS.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+ID Allocator for SeaTrace
+Persisted monotonic counters per sequence (users, spills, alerts, strikes), handed out in blocks so each ID is O(1).
+"""
+import atexit
+import json
+import os
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No cross-process file lock (Windows); one writer process is assumed
+
+ID_BLOCK_SIZE = int(os.environ.get('ID_BLOCK_SIZE', 100))  # IDs reserved on disk per write
+
+
+class IDAllocator:
+    """
+    Counters are stored as the high-water mark of IDs reserved so far. A process reserves a
+    block of IDs with one file write and hands them out from memory; after a crash the unused
+    rest of a block is skipped, so IDs can have gaps but are never reused.
+    """
+
+    def __init__(self, path, block_size=ID_BLOCK_SIZE):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self.block_size = max(1, int(block_size))
+        self.lock = threading.Lock()
+
+        # Sequence -> next ID to hand out / end of the block reserved by this process
+        self.next_ids = {}
+        self.reserved = {}
+        atexit.register(self.release)
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, counters):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(counters, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _locked_update(self, update):
+        """Read-modify-write the counter file, serialized across processes where possible"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                counters = self._read()
+                result = update(counters)
+                self._write(counters)
+                return result
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def allocate(self, name, count=1, seed=None):
+        """
+        Reserve `count` consecutive IDs of sequence `name` and return the first one.
+        seed: callable returning the highest ID already in use; only consulted the first
+        time a sequence is seen, so existing data never has to be scanned again.
+        """
+        count = int(count)
+        with self.lock:
+            start = self.next_ids.get(name)
+            if start is None or start + count > self.reserved[name]:
+                def reserve(counters):
+                    high_water = counters.get(name)
+                    if high_water is None:
+                        high_water = (int(seed()) if seed else 0) + 1
+                    # Continue this process's block unless another process reserved past it
+                    first = start if start is not None and high_water == self.reserved[name] else high_water
+                    counters[name] = first + count + self.block_size
+                    return first, counters[name]
+                start, self.reserved[name] = self._locked_update(reserve)
+            self.next_ids[name] = start + count
+            return start
+
+    def next(self, name, seed=None):
+        """Single ID of sequence `name`"""
+        return self.allocate(name, 1, seed)
+
+    def release(self):
+        """Hand the unused rest of this process's blocks back (only where nobody reserved after us)"""
+        with self.lock:
+            if not self.next_ids:
+                return
+
+            def give_back(counters):
+                for name, next_id in self.next_ids.items():
+                    if counters.get(name) == self.reserved[name]:
+                        counters[name] = next_id
+                        self.reserved[name] = next_id
+            try:
+                self._locked_update(give_back)
+            except OSError as e:
+                print(f"Error releasing ID blocks: {e}")
@@ -0,0 +1,219 @@
+"""
+SeaTrace Write-Ahead Journal
+Append-only per-collection journals with group commit and periodic compaction into the JSON snapshots.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def apply_record(data, record):
+    """Apply a single journal record to an in-memory collection (dict or list)"""
+    op = record.get('op')
+    key = record.get('key')
+    value = record.get('value')
+
+    if op == 'set':
+        data[key] = value
+    elif op == 'update':
+        if key in data:
+            data[key].update(value)
+    elif op == 'delete':
+        data.pop(key, None)
+    elif op == 'append':
+        data.append(value)
+
+
+def snapshot_digest(content):
+    """Fingerprint of a snapshot's bytes, recorded in the header of the journal written against it"""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def _header_line(digest):
+    return json.dumps({'op': 'header', 'snapshot': digest})
+
+
+class CollectionJournal:
+    """
+    Journal for one collection, stored as <snapshot>.journal.jsonl next to the snapshot. Its first
+    line is a header with the digest of the snapshot it applies to; a journal whose snapshot was
+    replaced by another writer (full Kaggle sync, seeding) is discarded instead of replayed.
+    """
+
+    def __init__(self, snapshot_path, get_data, data_lock):
+        self.snapshot_path = snapshot_path
+        self.path = snapshot_path.with_name(snapshot_path.stem + '.journal.jsonl')
+        self.get_data = get_data      # Returns the live collection (may be rebound by the owner)
+        self.data_lock = data_lock    # Owner's lock guarding the collection
+
+        self.pending = []             # Serialized lines waiting for the next group commit
+        self.pending_lock = threading.Lock()
+        self.io_lock = threading.Lock()  # Serializes disk I/O on this journal only
+        self.records_since_compaction = 0
+        self.snapshot_digest = None   # Digest of the snapshot on disk, written as the journal header
+        self.needs_header = True      # Journal file is empty or missing
+
+    def _snapshot_digest(self):
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                return snapshot_digest(f.read())
+        except IOError:
+            return None
+
+    def replay(self, data):
+        """Apply every record in the journal file to the loaded snapshot"""
+        self.snapshot_digest = self._snapshot_digest()
+        if not self.path.exists():
+            return 0
+
+        count = 0
+        stale = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for number, line in enumerate(f):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final write after a crash - everything before it is valid
+                        print(f"Skipping corrupt record in {self.path}")
+                        continue
+                    self.needs_header = False
+                    if record.get('op') == 'header':
+                        if number == 0 and record.get('snapshot') != self.snapshot_digest:
+                            # Written against an earlier snapshot: its records would resurrect stale data
+                            print(f"Discarding {self.path}: {self.snapshot_path.name} was replaced after it was written")
+                            stale = True
+                            break
+                        continue
+                    # Journals from before headers were introduced have none and are replayed as-is
+                    apply_record(data, record)
+                    count += 1
+            if stale:
+                open(self.path, 'w').close()
+                self.needs_header = True
+        except IOError as e:
+            print(f"Error replaying {self.path}: {e}")
+
+        self.records_since_compaction = count
+        return count
+
+    def append(self, op, key=None, value=None):
+        """Queue a record. Caller holds the data lock; cost is O(record), no disk I/O."""
+        record = {'op': op, 'value': value}
+        if key is not None:
+            record['key'] = key
+        line = json.dumps(record, ensure_ascii=False)
+
+        with self.pending_lock:
+            self.pending.append(line)
+            self.records_since_compaction += 1
+            return len(self.pending)
+
+    def flush(self, fsync=False):
+        """Write all pending records to the journal file"""
+        with self.io_lock:
+            with self.pending_lock:
+                lines, self.pending = self.pending, []
+            if not lines:
+                return 0
+            if self.needs_header:
+                lines.insert(0, _header_line(self.snapshot_digest))
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+                    f.flush()
+                    if fsync:
+                        os.fsync(f.fileno())
+                self.needs_header = False
+            except IOError as e:
+                print(f"Error writing journal {self.path}: {e}")
+            return len(lines)
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot and truncate it"""
+        with self.io_lock:
+            # Serialize under the data lock so the snapshot matches the journal position,
+            # then drop pending records (they are already part of the snapshot).
+            with self.data_lock:
+                text = json.dumps(self.get_data(), indent=2, ensure_ascii=False)
+                with self.pending_lock:
+                    self.pending = []
+                    self.records_since_compaction = 0
+
+            # Disk I/O happens outside the data lock. The journal restarts with a header naming
+            # the new snapshot, so a crash between the rename and that rewrite leaves a journal
+            # whose header no longer matches, and it is discarded rather than replayed twice.
+            content = text.encode('utf-8')
+            digest = snapshot_digest(content)
+            tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, self.snapshot_path)
+                self.snapshot_digest = digest
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    f.write(_header_line(digest) + '\n')
+                self.needs_header = False
+            except IOError as e:
+                print(f"Error compacting {self.snapshot_path}: {e}")
+
+
+class JournalWriter:
+    """Background group-commit flusher shared by all collection journals"""
+
+    def __init__(self, flush_interval_ms=200, flush_max_records=256, compact_every=5000, fsync=False):
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.flush_max_records = flush_max_records
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.journals = {}
+
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def register(self, name, journal):
+        self.journals[name] = journal
+
+    def notify(self, pending_count):
+        """Called after an append; wakes the writer early once a batch is full"""
+        if pending_count >= self.flush_max_records:
+            self._wakeup.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='journal-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+        self.flush_all()
+
+    def flush_all(self):
+        for journal in self.journals.values():
+            journal.flush(fsync=self.fsync)
+
+    def compact_all(self):
+        for journal in self.journals.values():
+            journal.flush(fsync=self.fsync)
+            journal.compact()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            for journal in self.journals.values():
+                try:
+                    journal.flush(fsync=self.fsync)
+                    if journal.records_since_compaction >= self.compact_every:
+                        journal.compact()
+                except Exception as e:
+                    print(f"Journal writer error ({journal.path}): {e}")
+                time.sleep(0)
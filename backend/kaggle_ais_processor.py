@@ -12,6 +12,7 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import random
+from concurrent.futures import ProcessPoolExecutor
 
 try:
     from kaggle.api.kaggle_api_extended import KaggleApi
@@ -21,6 +22,235 @@ except ImportError:
     print("Warning: Kaggle API not available. Install with: pip install kaggle")
 
 
+# Common AIS column name mappings (adjust based on your dataset)
+AIS_COLUMN_MAPPINGS = {
+    'imo': ['IMO', 'imo', 'Imo', 'vessel_imo', 'Vessel_IMO'],
+    'mmsi': ['MMSI', 'mmsi', 'Mmsi', 'vessel_mmsi', 'Vessel_MMSI'],
+    'name': ['VesselName', 'vessel_name', 'Vessel_Name', 'name', 'Name', 'SHIPNAME'],
+    'lat': ['LAT', 'lat', 'Lat', 'latitude', 'Latitude', 'LATITUDE'],
+    'lon': ['LON', 'lon', 'Lon', 'longitude', 'Longitude', 'LONGITUDE'],
+    'speed': ['SOG', 'sog', 'Speed', 'speed', 'SPEED', 'SpeedOverGround'],
+    'course': ['COG', 'cog', 'Course', 'course', 'COURSE', 'CourseOverGround'],
+    'heading': ['Heading', 'heading', 'HEADING'],
+    'type': ['VesselType', 'vessel_type', 'Vessel_Type', 'Type', 'SHIPTYPE'],
+    'flag': ['Flag', 'flag', 'FLAG', 'Country', 'country'],
+    'length': ['Length', 'length', 'LENGTH'],
+    'width': ['Width', 'width', 'WIDTH'],
+    'draft': ['Draft', 'draft', 'DRAFT'],
+    'destination': ['Destination', 'destination', 'DEST', 'dest'],
+    'eta': ['ETA', 'eta', 'Eta'],
+    'timestamp': ['Timestamp', 'timestamp', 'TIMESTAMP', 'BaseDateTime', 'DateTime']
+}
+
+# Compact dtypes for the streaming loader (everything else is read as str)
+AIS_FLOAT_FIELDS = ('lat', 'lon', 'speed', 'course', 'heading', 'length', 'width', 'draft')
+
+AIS_CHUNK_ROWS = int(os.environ.get('AIS_CHUNK_ROWS', 500000))
+AIS_SPLIT_BYTES = int(os.environ.get('AIS_SPLIT_BYTES', 64 * 1024 * 1024))  # Larger files are split across workers
+AIS_INGEST_WORKERS = int(os.environ.get('AIS_INGEST_WORKERS', 1))
+
+
+# AIS ship type code (first two digits) -> SeaTrace vessel type
+AIS_VESSEL_TYPES = {
+    '70': 'Cargo', '71': 'Cargo', '72': 'Cargo', '73': 'Cargo', '74': 'Cargo', '75': 'Cargo',
+    '76': 'Cargo', '77': 'Cargo', '78': 'Cargo', '79': 'Cargo',
+    '80': 'Tanker', '81': 'Tanker', '82': 'Tanker', '83': 'Tanker',
+    '60': 'Passenger', '61': 'Passenger', '62': 'Passenger', '63': 'Passenger',
+    '30': 'Fishing', '31': 'Fishing', '32': 'Fishing',
+    '50': 'Pilot', '51': 'Pilot', '52': 'Pilot',
+    '37': 'Pleasure Craft', '36': 'Pleasure Craft',
+    '90': 'Other', '91': 'Other'
+}
+
+# Upper-cased vessel name patterns, checked in order -> operator
+COMPANY_PATTERNS = [
+    ('MSC', 'MSC Cruises'),
+    ('EVER', 'Evergreen Marine'),
+    ('MAERSK', 'Maersk Line'),
+    ('CMA|CGM', 'CMA CGM'),
+    ('COSCO', 'COSCO Shipping'),
+    ('HAPAG', 'Hapag-Lloyd'),
+]
+
+VESSEL_IMAGES = {
+    'Container Ship': 'https://images.unsplash.com/photo-1587284079863-4a4f6f5c4c0f?w=400&h=300&fit=crop',
+    'Tanker': 'https://images.unsplash.com/photo-1558618047-3c8c76ca7d13?w=400&h=300&fit=crop',
+    'Bulk Carrier': 'https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=400&h=300&fit=crop',
+    'Cargo Ship': 'https://images.unsplash.com/photo-1558618666-fcd25c85cd64?w=400&h=300&fit=crop'
+}
+DEFAULT_VESSEL_IMAGE = 'https://images.unsplash.com/photo-1558618047-3c8c76ca7d13?w=400&h=300&fit=crop'
+
+
+def detect_ais_columns(columns) -> Dict[str, str]:
+    """Map SeaTrace field -> actual column name using AIS_COLUMN_MAPPINGS"""
+    columns = set(columns)
+    actual_columns = {}
+    for key, possible_names in AIS_COLUMN_MAPPINGS.items():
+        for name in possible_names:
+            if name in columns:
+                actual_columns[key] = name
+                break
+    return actual_columns
+
+
+def vessel_imos(vessel_ids: pd.Series, from_imo: bool) -> pd.Series:
+    """SeaTrace vessel keys ('IMO...') for IMO numbers or MMSIs"""
+    imo = vessel_ids if from_imo else 'MMSI' + vessel_ids
+    return imo.where(imo.str.startswith('IMO'), 'IMO' + imo)
+
+
+def apply_region_filter(df: pd.DataFrame, lat_col: str, lon_col: str, region_filter: Dict) -> pd.DataFrame:
+    """Rows inside the region box (defaults match the Indian Ocean REGION_FILTER)"""
+    mask = (
+        (df[lat_col] >= region_filter.get('lat_min', 5)) &
+        (df[lat_col] <= region_filter.get('lat_max', 25)) &
+        (df[lon_col] >= region_filter.get('lon_min', 65)) &
+        (df[lon_col] <= region_filter.get('lon_max', 100))
+    )
+    return df[mask]
+
+
+class _RangeReader:
+    """Read-only file view limited to [start, end) so pandas can parse one byte range of a CSV"""
+
+    def __init__(self, path, start: int, end: int):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        if self._remaining <= 0 or not data:
+            self.close()
+        return data
+
+    def close(self):
+        self._remaining = 0
+        self._file.close()
+
+
+def split_csv_ranges(csv_file: Path, parts: int) -> List[tuple]:
+    """
+    Split a CSV into byte ranges that start and end on line boundaries (header excluded).
+    Assumes no quoted newlines inside fields, which holds for AIS position dumps.
+    """
+    size = csv_file.stat().st_size
+    with open(csv_file, 'rb') as f:
+        f.readline()
+        bounds = [f.tell()]
+        for i in range(1, parts):
+            f.seek(max(size * i // parts, bounds[-1]))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def ingest_tasks(csv_files: List[Path], workers: int, region_filter: Optional[Dict],
+                 chunk_rows: int, split_bytes: int = AIS_SPLIT_BYTES) -> List[tuple]:
+    """
+    Work units in file order: whole files, or byte ranges of files larger than split_bytes
+    when running with several workers. Task order is what "file order" means when merging.
+    """
+    tasks = []
+    for csv_file in csv_files:
+        size = csv_file.stat().st_size
+        parts = min(workers, -(-size // split_bytes)) if workers > 1 else 1
+        if parts > 1:
+            for start, end in split_csv_ranges(csv_file, parts):
+                tasks.append((str(csv_file), start, end, region_filter, chunk_rows))
+        else:
+            tasks.append((str(csv_file), None, None, region_filter, chunk_rows))
+    return tasks
+
+
+def run_ingest_tasks(fn, tasks: List[tuple], workers: int):
+    """Run tasks serially or on a process pool; results come back in task order"""
+    if workers <= 1 or len(tasks) <= 1:
+        return map(fn, tasks)
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+    try:
+        return list(executor.map(fn, tasks))
+    finally:
+        executor.shutdown()
+
+
+def read_ais_chunks(csv_file, start=None, end=None, chunk_rows: int = AIS_CHUNK_ROWS):
+    """
+    Chunked reader over a CSV file or one byte range of it, mapped columns only.
+    Returns (actual_columns, chunk iterator with canonical column names) or (None, None).
+    """
+    header = pd.read_csv(csv_file, nrows=0).columns
+    actual_columns = detect_ais_columns(header)
+    if not ('imo' in actual_columns or 'mmsi' in actual_columns) or 'lat' not in actual_columns or 'lon' not in actual_columns:
+        return None, None
+    
+    dtypes = {col: 'float32' if key in AIS_FLOAT_FIELDS else str for key, col in actual_columns.items()}
+    rename = {col: AIS_COLUMN_MAPPINGS[key][0] for key, col in actual_columns.items()}
+    usecols = list(actual_columns.values())
+    
+    if start is None:
+        reader = pd.read_csv(csv_file, usecols=usecols, dtype=dtypes, chunksize=chunk_rows)
+    else:
+        reader = pd.read_csv(_RangeReader(csv_file, start, end), header=None, names=list(header),
+                             usecols=usecols, dtype=dtypes, chunksize=chunk_rows)
+    return actual_columns, (chunk.rename(columns=rename) for chunk in reader)
+
+
+def merge_latest(latest: Optional[pd.DataFrame], chunk: pd.DataFrame, id_col: str) -> pd.DataFrame:
+    """Keep the latest record per vessel: by '_ts' when present, else the later frame wins"""
+    if latest is None:
+        merged = chunk
+    else:
+        merged = pd.concat([latest, chunk], ignore_index=True)
+    if '_ts' in merged.columns:
+        merged = merged.sort_values('_ts', kind='stable', na_position='first')
+    return merged.drop_duplicates(id_col, keep='last')
+
+
+def read_latest_task(task: tuple):
+    """
+    Worker: reduce one file / byte range to its latest record per vessel.
+    Returns (latest DataFrame or None, id column, rows read).
+    """
+    csv_file, start, end, region_filter, chunk_rows = task
+    name = Path(csv_file).name if start is None else f"{Path(csv_file).name} [{start}:{end}]"
+    latest = None
+    total_rows = 0
+    lat_col = AIS_COLUMN_MAPPINGS['lat'][0]
+    lon_col = AIS_COLUMN_MAPPINGS['lon'][0]
+    ts_col = AIS_COLUMN_MAPPINGS['timestamp'][0]
+    try:
+        actual_columns, chunks = read_ais_chunks(csv_file, start, end, chunk_rows)
+        if actual_columns is None:
+            print(f"Skipping {name}: no IMO/MMSI or position columns")
+            return None, None, 0
+        id_col = AIS_COLUMN_MAPPINGS['imo' if 'imo' in actual_columns else 'mmsi'][0]
+        
+        print(f"Loading {name}...")
+        for chunk in chunks:
+            total_rows += len(chunk)
+            chunk = chunk.dropna(subset=[id_col])
+            if region_filter:
+                chunk = apply_region_filter(chunk, lat_col, lon_col, region_filter)
+            if chunk.empty:
+                continue
+            
+            # Latest record wins: by timestamp when present, else by file order
+            if ts_col in chunk.columns:
+                chunk = chunk.assign(_ts=pd.to_datetime(chunk[ts_col], errors='coerce'))
+            latest = merge_latest(latest, merge_latest(None, chunk, id_col), id_col)
+        return latest, id_col, total_rows
+    except Exception as e:
+        print(f"Error loading {name}: {e}")
+        return None, None, total_rows
+
+
 class KaggleAISProcessor:
     """Process AIS data from Kaggle datasets"""
     
@@ -38,6 +268,10 @@ class KaggleAISProcessor:
                 print(f"Warning: Could not authenticate Kaggle API: {e}")
                 print("Make sure ~/.kaggle/kaggle.json exists with your API credentials")
     
+    def local_dataset_path(self, dataset_name: str) -> Path:
+        """Directory a Kaggle dataset is (or will be) downloaded to"""
+        return self.kaggle_dir / dataset_name.replace('/', '_')
+    
     def download_dataset(self, dataset_name: str, unzip: bool = True) -> Optional[Path]:
         """
         Download a Kaggle dataset
@@ -54,7 +288,7 @@ class KaggleAISProcessor:
             return None
         
         try:
-            dataset_path = self.kaggle_dir / dataset_name.replace('/', '_')
+            dataset_path = self.local_dataset_path(dataset_name)
             dataset_path.mkdir(parents=True, exist_ok=True)
             
             print(f"Downloading dataset: {dataset_name}")
@@ -106,13 +340,245 @@ class KaggleAISProcessor:
         print(f"Loaded {len(combined_df)} AIS records")
         return combined_df
     
-    def transform_ais_to_vessels(self, ais_df: pd.DataFrame, region_filter: Optional[Dict] = None) -> List[Dict]:
+    def stream_latest_records(self, dataset_path: Path, file_pattern: str = "*.csv",
+                              region_filter: Optional[Dict] = None,
+                              chunk_rows: int = AIS_CHUNK_ROWS, workers: int = 1) -> Optional[pd.DataFrame]:
+        """
+        Streaming ingest: latest AIS record per vessel across every CSV file
+        
+        Only the mapped columns are read (compact dtypes, in chunks of chunk_rows), the region
+        filter is applied per chunk and a running latest-per-IMO/MMSI table is kept, so memory
+        is bounded by the number of vessels rather than the file size.
+        
+        Args:
+            dataset_path: Path to dataset directory
+            file_pattern: File pattern to match (default: *.csv)
+            region_filter: Optional dict with 'lat_min', 'lat_max', 'lon_min', 'lon_max' for filtering
+            chunk_rows: Rows per chunk
+            workers: Worker processes; files (and byte ranges of large files) are reduced in
+                     parallel and the partial latest tables merged by timestamp
+            
+        Returns:
+            DataFrame with one row per vessel, columns renamed to the first name in AIS_COLUMN_MAPPINGS
+        """
+        csv_files = sorted(dataset_path.glob(file_pattern))
+        if not csv_files:
+            print(f"No CSV files found in {dataset_path}")
+            return None
+        
+        tasks = ingest_tasks(csv_files, workers, region_filter, chunk_rows)
+        print(f"Streaming {len(csv_files)} CSV files as {len(tasks)} tasks on {workers} worker(s) ({chunk_rows} rows per chunk)")
+        
+        latest = None
+        total_rows = 0
+        for partial, id_col, rows in run_ingest_tasks(read_latest_task, tasks, workers):
+            total_rows += rows
+            if partial is not None:
+                latest = merge_latest(latest, partial, id_col)
+        
+        if latest is None:
+            return None
+        
+        latest = latest.drop(columns=['_ts'], errors='ignore').reset_index(drop=True)
+        print(f"Streamed {total_rows} AIS records -> {len(latest)} vessels")
+        return latest
+    
+    def parquet_cache(self, dataset_path: Path):
+        """Parquet cache that belongs to a downloaded dataset directory"""
+        from ais_parquet_cache import AISParquetCache
+        return AISParquetCache(self.kaggle_dir / f"{Path(dataset_path).name}_parquet")
+    
+    def load_latest_cached(self, dataset_path: Path, file_pattern: str = "*.csv",
+                           region_filter: Optional[Dict] = None, workers: int = 1) -> Optional[pd.DataFrame]:
+        """
+        Latest record per vessel via the Parquet cache
+        
+        The CSVs are parsed once into a dataset partitioned by date and lat/lon tile; later loads
+        only read the partitions and columns the region needs. Falls back to streaming the CSVs
+        when pyarrow is not installed or the cache cannot be built.
+        """
+        from ais_parquet_cache import PARQUET_AVAILABLE
+        if PARQUET_AVAILABLE:
+            cache = self.parquet_cache(dataset_path)
+            if cache.is_fresh(dataset_path, file_pattern) or cache.build(dataset_path, file_pattern, workers=workers):
+                latest = cache.latest_records(region_filter)
+                if latest is not None:
+                    print(f"Loaded {len(latest)} vessels from Parquet cache {cache.cache_dir.name}")
+                return latest
+        return self.stream_latest_records(dataset_path, file_pattern, region_filter, workers=workers)
+    
+    def sync_state(self, dataset_path: Path):
+        """Incremental sync state that belongs to a downloaded dataset directory"""
+        from ais_sync_state import AISSyncState
+        return AISSyncState(self.kaggle_dir / f"{Path(dataset_path).name}_sync")
+    
+    def plan_incremental_sync(self, dataset_path: Path, current_vessels: Dict, file_pattern: str = "*.csv",
+                              region_filter: Optional[Dict] = None, chunk_rows: int = AIS_CHUNK_ROWS,
+                              workers: int = 1) -> Optional[Dict]:
+        """
+        Per-vessel diff of the dataset against the last sync and the live vessel store
+        
+        Files whose size/mtime (or, when those moved, content hash) match the last sync are not
+        read again; their latest record per vessel comes from the sync state. Vessels whose latest
+        AIS record hashes the same as last time, and that are still in the store, are skipped
+        before the transform.
+        
+        Args:
+            dataset_path: Path to dataset directory
+            current_vessels: Live {imo: vessel} store the diff is computed against
+            file_pattern: File pattern to match (default: *.csv)
+            region_filter: Optional region filter (a different filter discards the sync state)
+            chunk_rows: Rows per chunk when reading changed files
+            workers: Worker processes for changed files / byte ranges
+            
+        Returns:
+            Plan with 'upserts' ({imo: whole new vessel or changed AIS fields}), 'deletes' (IMOs)
+            and 'summary'; hand it to commit_incremental_sync once applied. None on failure.
+        """
+        from ais_sync_state import file_fingerprint, row_hashes, vessel_changes
+        started = datetime.now()
+        csv_files = sorted(Path(dataset_path).glob(file_pattern))
+        if not csv_files:
+            print(f"No CSV files found in {dataset_path}")
+            return None
+        
+        state = self.sync_state(dataset_path)
+        previous = state.load(region_filter)
+        previous_files = previous.get('files', {})
+        files = {f.name: file_fingerprint(f, previous_files.get(f.name)) for f in csv_files}
+        changed = [
+            f for f in csv_files
+            if files[f.name]['hash'] != previous_files.get(f.name, {}).get('hash') or not state.has_partial(f.name)
+        ]
+        removed = [name for name in previous_files if name not in files]
+        synced_imos, synced_hashes = state.load_vessels() if previous else (np.zeros(0, dtype=object), np.zeros(0, dtype=np.uint64))
+        
+        plan = {
+            'dataset_path': Path(dataset_path),
+            'region_filter': region_filter,
+            'files': files,
+            'upserts': {},
+            'deletes': [],
+            'imos': synced_imos,
+            'hashes': synced_hashes,
+            'summary': {
+                'files': len(csv_files),
+                'files_changed': [f.name for f in changed],
+                'files_removed': removed,
+                'vessels': len(synced_imos),
+                'added': 0,
+                'updated': 0,
+                'deleted': 0,
+                'unchanged': len(synced_imos)
+            }
+        }
+        if not changed and not removed:
+            print(f"AIS sync: {len(csv_files)} files unchanged since {previous.get('synced_at')}")
+            return plan
+        
+        # Re-read only the changed files (large ones split into byte ranges as usual)
+        imo_col, mmsi_col = AIS_COLUMN_MAPPINGS['imo'][0], AIS_COLUMN_MAPPINGS['mmsi'][0]
+        partials = {f.name: None for f in changed}
+        tasks = ingest_tasks(changed, workers, region_filter, chunk_rows)
+        print(f"AIS sync: reading {len(changed)} changed of {len(csv_files)} files as {len(tasks)} tasks")
+        for task, (partial, id_col, _) in zip(tasks, run_ingest_tasks(read_latest_task, tasks, workers)):
+            name = Path(task[0]).name
+            if partial is not None:
+                partials[name] = merge_latest(partials[name], partial, id_col)
+        for name, partial in partials.items():
+            state.save_partial(name, partial)
+        for name in removed:
+            state.remove_partial(name)
+        
+        # Latest record per vessel over every file (unchanged files from their saved partials)
+        latest = None
+        for f in csv_files:
+            partial = partials[f.name] if f.name in partials else state.load_partial(f.name)
+            if partial is not None and not partial.empty:
+                latest = merge_latest(latest, partial, imo_col if imo_col in partial.columns else mmsi_col)
+        if latest is None:
+            latest = pd.DataFrame(columns=[mmsi_col])
+        latest = latest.drop(columns=['_ts'], errors='ignore').reset_index(drop=True)
+        
+        actual_columns = detect_ais_columns(latest.columns)
+        id_col = actual_columns.get('imo') or actual_columns.get('mmsi')
+        imos = vessel_imos(latest[id_col].astype(str), 'imo' in actual_columns).to_numpy(dtype=object)
+        hashes = row_hashes(latest)
+        
+        # Unchanged record and still in the store -> nothing to do for that vessel
+        positions = pd.Index(synced_imos).get_indexer(imos)
+        same = np.zeros(len(imos), dtype=bool)
+        if len(synced_hashes):
+            same = (positions >= 0) & (synced_hashes[np.maximum(positions, 0)] == hashes)
+        in_store = np.fromiter((imo in current_vessels for imo in imos), dtype=bool, count=len(imos))
+        todo = ~(same & in_store)
+        
+        vessels = self.transform_ais_to_vessels(latest[todo], max_vessels=None) if todo.any() else []
+        produced = {v['imo']: v for v in vessels}
+        summary = plan['summary']
+        for imo, vessel in produced.items():
+            existing = current_vessels.get(imo)
+            changes = vessel_changes(existing, vessel)
+            if changes:
+                plan['upserts'][imo] = changes
+                summary['added' if existing is None else 'updated'] += 1
+        
+        # Vessels from the last sync that no longer have a (valid) record are deleted
+        keep = ~todo | pd.Index(imos).isin(list(produced))
+        plan['imos'], plan['hashes'] = imos[keep], hashes[keep]
+        kept = set(plan['imos'].tolist())
+        plan['deletes'] = [imo for imo in synced_imos.tolist() if imo not in kept and imo in current_vessels]
+        
+        summary['vessels'] = int(keep.sum())
+        summary['deleted'] = len(plan['deletes'])
+        summary['unchanged'] = summary['vessels'] - summary['added'] - summary['updated']
+        summary['seconds'] = round((datetime.now() - started).total_seconds(), 2)
+        print(f"AIS sync: {summary['added']} added, {summary['updated']} updated, {summary['deleted']} deleted, "
+              f"{summary['unchanged']} unchanged ({summary['seconds']}s)")
+        return plan
+    
+    def commit_incremental_sync(self, plan: Dict):
+        """Record a plan as synced, once its upserts/deletes have been applied to the store"""
+        self.sync_state(plan['dataset_path']).save(plan['files'], plan['region_filter'], plan['imos'], plan['hashes'])
+    
+    def incremental_sync(self, dataset_name: str, store, region_filter: Optional[Dict] = None,
+                         download: bool = True, workers: int = AIS_INGEST_WORKERS) -> Optional[Dict]:
+        """
+        Incremental pipeline: re-read changed files only and apply the vessel diff to a live store
+        
+        Unlike process_and_save, vessels.json is not rewritten and untouched vessels are left as
+        they are; only upserts and deletes go through store.apply_vessel_changes.
+        
+        Args:
+            dataset_name: Kaggle dataset name
+            store: DataManager / SQLiteDataManager holding the live vessels
+            region_filter: Optional region filter
+            download: Fetch the dataset first (False syncs the files already on disk)
+            workers: Worker processes for parsing changed files
+            
+        Returns:
+            Sync summary, or None on failure
+        """
+        dataset_path = self.download_dataset(dataset_name) if download else self.local_dataset_path(dataset_name)
+        if not dataset_path or not dataset_path.exists():
+            return None
+        
+        plan = self.plan_incremental_sync(dataset_path, store.get_vessels(), region_filter=region_filter, workers=workers)
+        if plan is None:
+            return None
+        store.apply_vessel_changes(plan['upserts'], plan['deletes'])
+        self.commit_incremental_sync(plan)
+        return plan['summary']
+    
+    def transform_ais_to_vessels(self, ais_df: pd.DataFrame, region_filter: Optional[Dict] = None,
+                                 max_vessels: Optional[int] = 200) -> List[Dict]:
         """
         Transform AIS data to SeaTrace vessel format
         
         Args:
             ais_df: DataFrame with AIS data
             region_filter: Optional dict with 'lat_min', 'lat_max', 'lon_min', 'lon_max' for filtering
+            max_vessels: Cap on vessels processed (None for no limit)
             
         Returns:
             List of vessel dictionaries in SeaTrace format
@@ -120,33 +586,8 @@ class KaggleAISProcessor:
         if ais_df.empty:
             return []
         
-        # Common AIS column name mappings (adjust based on your dataset)
-        column_mappings = {
-            'imo': ['IMO', 'imo', 'Imo', 'vessel_imo', 'Vessel_IMO'],
-            'mmsi': ['MMSI', 'mmsi', 'Mmsi', 'vessel_mmsi', 'Vessel_MMSI'],
-            'name': ['VesselName', 'vessel_name', 'Vessel_Name', 'name', 'Name', 'SHIPNAME'],
-            'lat': ['LAT', 'lat', 'Lat', 'latitude', 'Latitude', 'LATITUDE'],
-            'lon': ['LON', 'lon', 'Lon', 'longitude', 'Longitude', 'LONGITUDE'],
-            'speed': ['SOG', 'sog', 'Speed', 'speed', 'SPEED', 'SpeedOverGround'],
-            'course': ['COG', 'cog', 'Course', 'course', 'COURSE', 'CourseOverGround'],
-            'heading': ['Heading', 'heading', 'HEADING'],
-            'type': ['VesselType', 'vessel_type', 'Vessel_Type', 'Type', 'SHIPTYPE'],
-            'flag': ['Flag', 'flag', 'FLAG', 'Country', 'country'],
-            'length': ['Length', 'length', 'LENGTH'],
-            'width': ['Width', 'width', 'WIDTH'],
-            'draft': ['Draft', 'draft', 'DRAFT'],
-            'destination': ['Destination', 'destination', 'DEST', 'dest'],
-            'eta': ['ETA', 'eta', 'Eta'],
-            'timestamp': ['Timestamp', 'timestamp', 'TIMESTAMP', 'BaseDateTime', 'DateTime']
-        }
-        
         # Find actual column names in the dataframe
-        actual_columns = {}
-        for key, possible_names in column_mappings.items():
-            for name in possible_names:
-                if name in ais_df.columns:
-                    actual_columns[key] = name
-                    break
+        actual_columns = detect_ais_columns(ais_df.columns)
         
         print(f"Found columns: {actual_columns}")
         
@@ -155,13 +596,7 @@ class KaggleAISProcessor:
             lat_col = actual_columns.get('lat')
             lon_col = actual_columns.get('lon')
             if lat_col and lon_col:
-                mask = (
-                    (ais_df[lat_col] >= region_filter.get('lat_min', 5)) &
-                    (ais_df[lat_col] <= region_filter.get('lat_max', 25)) &
-                    (ais_df[lon_col] >= region_filter.get('lon_min', 65)) &
-                    (ais_df[lon_col] <= region_filter.get('lon_max', 100))
-                )
-                ais_df = ais_df[mask].copy()
+                ais_df = apply_region_filter(ais_df, lat_col, lon_col, region_filter).copy()
         
         # Get unique vessels (by IMO or MMSI)
         id_col = actual_columns.get('imo') or actual_columns.get('mmsi')
@@ -169,99 +604,87 @@ class KaggleAISProcessor:
             print("No IMO or MMSI column found")
             return []
         
-        # Group by vessel ID and get latest position
-        vessels_list = []
-        vessel_groups = ais_df.groupby(id_col)
-        
-        vessel_type_mapping = {
-            '70': 'Cargo', '71': 'Cargo', '72': 'Cargo', '73': 'Cargo', '74': 'Cargo', '75': 'Cargo',
-            '76': 'Cargo', '77': 'Cargo', '78': 'Cargo', '79': 'Cargo',
-            '80': 'Tanker', '81': 'Tanker', '82': 'Tanker', '83': 'Tanker',
-            '60': 'Passenger', '61': 'Passenger', '62': 'Passenger', '63': 'Passenger',
-            '30': 'Fishing', '31': 'Fishing', '32': 'Fishing',
-            '50': 'Pilot', '51': 'Pilot', '52': 'Pilot',
-            '37': 'Pleasure Craft', '36': 'Pleasure Craft',
-            '90': 'Other', '91': 'Other'
-        }
+        # Latest position per vessel: last row of each group (like group.iloc[-1]), in vessel id order
+        latest = ais_df.dropna(subset=[id_col]).drop_duplicates(id_col, keep='last')
+        latest = latest.sort_values(id_col, kind='stable')
+        if max_vessels is not None:
+            latest = latest.iloc[:max_vessels]
         
-        for vessel_id, group in list(vessel_groups)[:200]:  # Limit to 200 vessels
-            try:
-                # Get latest record for this vessel
-                latest = group.iloc[-1]
-                
-                # Extract vessel information
-                imo = str(vessel_id) if actual_columns.get('imo') else f"MMSI{str(vessel_id)}"
-                mmsi = str(latest.get(actual_columns.get('mmsi', ''), vessel_id))
-                name = str(latest.get(actual_columns.get('name', ''), f"Vessel {vessel_id}")).strip()
-                
-                if not name or name == 'nan' or name == 'None':
-                    name = f"Vessel {vessel_id}"
-                
-                lat = float(latest.get(actual_columns.get('lat', ''), 0))
-                lon = float(latest.get(actual_columns.get('lon', ''), 0))
-                
-                # Skip if invalid coordinates
-                if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
-                    continue
-                
-                speed = float(latest.get(actual_columns.get('speed', ''), 0))
-                course = float(latest.get(actual_columns.get('course', ''), 0))
-                
-                # Normalize speed (convert from m/s to knots if needed)
-                if speed > 50:  # Likely in m/s, convert to knots
-                    speed = speed * 1.944
-                
-                vessel_type_code = str(latest.get(actual_columns.get('type', ''), '70'))
-                vessel_type = vessel_type_mapping.get(vessel_type_code[:2], 'Cargo Ship')
-                
-                if 'Container' in name or 'CONTAINER' in name.upper():
-                    vessel_type = 'Container Ship'
-                elif 'Tanker' in name or 'TANKER' in name.upper():
-                    vessel_type = 'Tanker'
-                elif 'Bulk' in name or 'BULK' in name.upper():
-                    vessel_type = 'Bulk Carrier'
-                
-                flag = str(latest.get(actual_columns.get('flag', ''), 'Unknown')).strip()
-                if not flag or flag == 'nan':
-                    flag = 'Unknown'
-                
-                destination = str(latest.get(actual_columns.get('destination', ''), 'Unknown')).strip()
-                if not destination or destination == 'nan':
-                    destination = 'Unknown'
-                
-                # Calculate derived fields
-                length = float(latest.get(actual_columns.get('length', ''), 0))
-                width = float(latest.get(actual_columns.get('width', ''), 0))
-                dwt = self._estimate_dwt(length, width, vessel_type)
-                
-                # Create vessel object
-                vessel = {
-                    'imo': f"IMO{imo}" if not imo.startswith('IMO') else imo,
-                    'name': name,
-                    'mmsi': mmsi,
-                    'type': vessel_type,
-                    'flag': flag,
-                    'company_name': self._get_company_name(name),
-                    'company_logo': f"https://via.placeholder.com/50x50?text={name[:3].upper()}",
-                    'lat': round(lat, 4),
-                    'lon': round(lon, 4),
-                    'speed': round(speed, 1),
-                    'course': round(course % 360, 1),
-                    'status': 'Active',
-                    'compliance_rating': round(random.uniform(7.0, 9.8), 1),
-                    'risk_level': self._calculate_risk_level(speed, compliance_rating=8.5),
-                    'last_inspection': (datetime.now() - timedelta(days=random.randint(1, 90))).strftime('%Y-%m-%d'),
-                    'violations': random.randint(0, 2),
-                    'dwt': int(dwt),
-                    'destination': destination[:50],
-                    'eta': latest.get(actual_columns.get('eta', ''), ''),
-                    'image': self._get_vessel_image_url(vessel_type)
-                }
-                
-                vessels_list.append(vessel)
-            except Exception as e:
-                print(f"Error processing vessel {vessel_id}: {e}")
-                continue
+        def column(key, default):
+            col = actual_columns.get(key)
+            return latest[col] if col else pd.Series(default, index=latest.index, dtype=object)
+        
+        def numeric(key):
+            return pd.to_numeric(column(key, 0.0), errors='coerce').astype(np.float64)
+        
+        def text(key, default):
+            values = column(key, default).astype(str).str.strip()
+            return values.where(~values.isin(['', 'nan']), default)
+        
+        # Skip if invalid coordinates
+        lat = numeric('lat')
+        lon = numeric('lon')
+        valid = lat.between(-90, 90) & lon.between(-180, 180)
+        latest, lat, lon = latest[valid], lat[valid], lon[valid]
+        n = len(latest)
+        if n == 0:
+            print("Processed 0 vessels from AIS data")
+            return []
+        
+        # Extract vessel information
+        vessel_ids = latest[id_col].astype(str)
+        imo = vessel_imos(vessel_ids, bool(actual_columns.get('imo')))
+        mmsi = column('mmsi', None).astype(str) if actual_columns.get('mmsi') else vessel_ids
+        
+        name = column('name', None).astype(str).str.strip() if actual_columns.get('name') else 'Vessel ' + vessel_ids
+        name = name.where(~name.isin(['', 'nan', 'None']), 'Vessel ' + vessel_ids)
+        
+        # Normalize speed (convert from m/s to knots if needed)
+        speed = numeric('speed')
+        speed = speed.where(~(speed > 50), speed * 1.944)
+        course = numeric('course') % 360
+        
+        vessel_type = column('type', '70').astype(str).str[:2].map(AIS_VESSEL_TYPES).fillna('Cargo Ship')
+        name_upper = name.str.upper()
+        vessel_type = pd.Series(np.select(
+            [name_upper.str.contains('CONTAINER', regex=False),
+             name_upper.str.contains('TANKER', regex=False),
+             name_upper.str.contains('BULK', regex=False)],
+            ['Container Ship', 'Tanker', 'Bulk Carrier'],
+            default=vessel_type.to_numpy(dtype=object)
+        ), index=latest.index)
+        
+        # Calculate derived fields
+        rng = np.random.default_rng()
+        dwt = self._estimate_dwt_array(numeric('length'), numeric('width'), vessel_type, rng)
+        inspection_days = rng.integers(1, 91, n)
+        
+        # Create vessel objects in bulk (column lists zipped into dicts; DataFrame.to_dict is far slower)
+        columns = {
+            'imo': imo,
+            'name': name,
+            'mmsi': mmsi,
+            'type': vessel_type,
+            'flag': text('flag', 'Unknown'),
+            'company_name': self._get_company_names(name),
+            'company_logo': 'https://via.placeholder.com/50x50?text=' + name.str[:3].str.upper(),
+            'lat': lat.round(4),
+            'lon': lon.round(4),
+            'speed': speed.round(1),
+            'course': course.round(1),
+            'status': 'Active',
+            'compliance_rating': np.round(rng.uniform(7.0, 9.8, n), 1),
+            'risk_level': self._calculate_risk_levels(speed, compliance_rating=8.5),
+            'last_inspection': (pd.Timestamp.now() - pd.to_timedelta(inspection_days, unit='D')).strftime('%Y-%m-%d'),
+            'violations': rng.integers(0, 3, n),
+            'dwt': dwt,
+            'destination': text('destination', 'Unknown').str[:50],
+            'eta': column('eta', ''),
+            'image': vessel_type.map(VESSEL_IMAGES).fillna(DEFAULT_VESSEL_IMAGE)
+        }
+        keys = list(columns)
+        values = [v.tolist() if hasattr(v, 'tolist') else [v] * n for v in columns.values()]
+        vessels_list = [dict(zip(keys, row)) for row in zip(*values)]
         
         print(f"Processed {len(vessels_list)} vessels from AIS data")
         return vessels_list
@@ -278,6 +701,14 @@ class KaggleAISProcessor:
             return int(max(5000, min(base_dwt, 200000)))
         return random.randint(10000, 150000)
     
+    def _estimate_dwt_array(self, length: pd.Series, width: pd.Series, vessel_type: pd.Series, rng) -> np.ndarray:
+        """Vectorized _estimate_dwt"""
+        base_dwt = (length * width * 2.5 * 0.5).to_numpy()
+        base_dwt = base_dwt * np.select([vessel_type == 'Tanker', vessel_type == 'Container Ship'], [1.5, 1.2], 1.0)
+        known = ((length > 0) & (width > 0)).to_numpy()
+        estimated = np.clip(np.nan_to_num(base_dwt), 5000, 200000).astype(np.int64)
+        return np.where(known, estimated, rng.integers(10000, 150001, len(known)))
+    
     def _get_company_name(self, vessel_name: str) -> str:
         """Extract or generate company name from vessel name"""
         # Common shipping company patterns
@@ -301,6 +732,15 @@ class KaggleAISProcessor:
                 return f"{words[0]} Shipping"
             return 'Maritime Company'
     
+    def _get_company_names(self, vessel_names: pd.Series) -> pd.Series:
+        """Vectorized _get_company_name"""
+        upper = vessel_names.str.upper()
+        first_word = vessel_names.str.split().str[0]
+        generic = (first_word + ' Shipping').fillna('Maritime Company')
+        matches = [upper.str.contains(pattern, regex=True) for pattern, _ in COMPANY_PATTERNS]
+        return pd.Series(np.select(matches, [company for _, company in COMPANY_PATTERNS],
+                                   default=generic.to_numpy(dtype=object)), index=vessel_names.index)
+    
     def _calculate_risk_level(self, speed: float, compliance_rating: float = 8.5) -> str:
         """Calculate risk level based on speed and compliance"""
         if compliance_rating < 6.0:
@@ -312,18 +752,19 @@ class KaggleAISProcessor:
         else:
             return 'Low'
     
+    def _calculate_risk_levels(self, speed: pd.Series, compliance_rating: float = 8.5) -> np.ndarray:
+        """Vectorized _calculate_risk_level"""
+        high = (compliance_rating < 6.0) | (speed > 25)
+        medium = (compliance_rating < 7.5) | (speed > 20)
+        return np.select([high, medium], ['High', 'Medium'], default='Low').astype(object)
+    
     def _get_vessel_image_url(self, vessel_type: str) -> str:
         """Get placeholder image URL based on vessel type"""
-        image_map = {
-            'Container Ship': 'https://images.unsplash.com/photo-1587284079863-4a4f6f5c4c0f?w=400&h=300&fit=crop',
-            'Tanker': 'https://images.unsplash.com/photo-1558618047-3c8c76ca7d13?w=400&h=300&fit=crop',
-            'Bulk Carrier': 'https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=400&h=300&fit=crop',
-            'Cargo Ship': 'https://images.unsplash.com/photo-1558618666-fcd25c85cd64?w=400&h=300&fit=crop'
-        }
-        return image_map.get(vessel_type, 'https://images.unsplash.com/photo-1558618047-3c8c76ca7d13?w=400&h=300&fit=crop')
+        return VESSEL_IMAGES.get(vessel_type, DEFAULT_VESSEL_IMAGE)
     
     def process_and_save(self, dataset_name: str, output_file: str = "vessels.json", 
-                        region_filter: Optional[Dict] = None) -> bool:
+                        region_filter: Optional[Dict] = None, streaming: bool = True,
+                        use_cache: bool = True, workers: int = AIS_INGEST_WORKERS, store=None) -> bool:
         """
         Complete pipeline: download, process, and save AIS data
         
@@ -331,6 +772,13 @@ class KaggleAISProcessor:
             dataset_name: Kaggle dataset name
             output_file: Output JSON file name
             region_filter: Optional region filter
+            streaming: Chunked latest-per-vessel ingest over all files (no vessel cap);
+                       False uses the original whole-file load of the first 5 files
+            use_cache: With streaming, read through the partitioned Parquet cache
+                       (built on first load, needs pyarrow)
+            workers: Worker processes for parsing CSV files / byte ranges
+            store: Data store (DataManager / SQLiteDataManager) whose vessels are replaced;
+                   without one the vessels are written to output_file in data_dir
             
         Returns:
             True if successful
@@ -342,13 +790,21 @@ class KaggleAISProcessor:
                 return False
             
             # Load AIS data
-            ais_df = self.load_ais_data(dataset_path)
+            if streaming and use_cache:
+                ais_df = self.load_latest_cached(dataset_path, region_filter=region_filter, workers=workers)
+            elif streaming:
+                ais_df = self.stream_latest_records(dataset_path, region_filter=region_filter, workers=workers)
+            else:
+                ais_df = self.load_ais_data(dataset_path)
             if ais_df is None or ais_df.empty:
                 print("No AIS data loaded")
                 return False
             
-            # Transform to vessels
-            vessels = self.transform_ais_to_vessels(ais_df, region_filter)
+            # Transform to vessels (streamed records are already region filtered, one per vessel)
+            if streaming:
+                vessels = self.transform_ais_to_vessels(ais_df, max_vessels=None)
+            else:
+                vessels = self.transform_ais_to_vessels(ais_df, region_filter)
             if not vessels:
                 print("No vessels processed")
                 return False
@@ -358,12 +814,7 @@ class KaggleAISProcessor:
             for vessel in vessels:
                 vessels_dict[vessel['imo']] = vessel
             
-            # Save to JSON
-            output_path = self.data_dir / output_file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(vessels_dict, f, indent=2, ensure_ascii=False)
-            
-            print(f"Saved {len(vessels_dict)} vessels to {output_path}")
+            self._save_vessels(vessels_dict, output_file, store)
             return True
             
         except Exception as e:
@@ -373,9 +824,20 @@ class KaggleAISProcessor:
             
         # Fallback: Generate Mock Data if real data fails
         print("Fallback: Generating High-Fidelity Mock AIS Data due to error...")
-        return self.save_mock_data(output_file, count=50)
+        return self.save_mock_data(output_file, count=50, store=store)
 
-    def save_mock_data(self, output_file: str = "vessels.json", count: int = 50) -> bool:
+    def _save_vessels(self, vessels: Dict[str, Dict], output_file: str, store=None):
+        """Replace the vessels in the data store, or write them to output_file without one"""
+        if store is not None:
+            store.replace_vessels(vessels)
+            print(f"Saved {len(vessels)} vessels to the data store")
+            return
+        output_path = self.data_dir / output_file
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(vessels, f, indent=2, ensure_ascii=False)
+        print(f"Saved {len(vessels)} vessels to {output_path}")
+
+    def save_mock_data(self, output_file: str = "vessels.json", count: int = 50, store=None) -> bool:
         """Generate and save mock vessel data for testing/demo"""
         try:
             vessels = {}
@@ -404,10 +866,7 @@ class KaggleAISProcessor:
                     'image': self._get_vessel_image_url(v_type)
                 }
                 
-            output_path = self.data_dir / output_file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(vessels, f, indent=2)
-                
+            self._save_vessels(vessels, output_file, store)
             print(f"Saved {count} MOCK vessels (Fallback Mode)")
             return True
         except Exception as e:
@@ -0,0 +1,134 @@
+"""
+Live Aggregates for SeaTrace
+Dashboard counters (vessel status / risk / type / compliance, spill severity) maintained incrementally instead of rescanned per request.
+"""
+import threading
+from collections import Counter
+
+HIGH_RISK_LEVELS = ('High', 'Critical')
+
+
+def _bump(counter, key, sign):
+    counter[key] += sign
+    if counter[key] == 0:
+        del counter[key]
+
+
+def _label(value):
+    """Histogram key (missing values are counted as 'Unknown')"""
+    return str(value) if value not in (None, '') else 'Unknown'
+
+
+class LiveAggregates:
+    """
+    The values each vessel / spill was last counted with are kept, so an update subtracts the
+    old contribution and adds the new one. Mutation paths report the store revision they
+    produced; a collection found at any other revision (changed by a path that did not report)
+    is recounted once by sync().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.vessels = {}       # imo -> (status, risk_level, type, compliance_rating)
+        self.spills = {}        # spill_id -> (severity, status)
+        self.vessel_counts = {'status': Counter(), 'risk_level': Counter(), 'type': Counter()}
+        self.compliance_sum = 0.0
+        self.spill_counts = {'severity': Counter(), 'status': Counter()}
+        self.revisions = {'vessels': None, 'oil_spills': None}
+
+    # Vessels
+    def _count_vessel(self, key, sign):
+        status, risk_level, vessel_type, compliance = key
+        _bump(self.vessel_counts['status'], status, sign)
+        _bump(self.vessel_counts['risk_level'], risk_level, sign)
+        _bump(self.vessel_counts['type'], vessel_type, sign)
+        self.compliance_sum += sign * compliance
+
+    def _set_vessel(self, imo, vessel):
+        old = self.vessels.pop(imo, None)
+        if old is not None:
+            self._count_vessel(old, -1)
+        if vessel is not None:
+            try:
+                compliance = float(vessel.get('compliance_rating') or 0)
+            except (TypeError, ValueError):
+                compliance = 0.0
+            key = (_label(vessel.get('status')), _label(vessel.get('risk_level')), _label(vessel.get('type')), compliance)
+            self.vessels[imo] = key
+            self._count_vessel(key, 1)
+
+    def update_vessels(self, vessels, revision=None):
+        """vessels: {imo: current vessel dict, or None if deleted}; revision: store revision after the change"""
+        with self.lock:
+            for imo, vessel in vessels.items():
+                self._set_vessel(imo, vessel)
+            if revision is not None:
+                self.revisions['vessels'] = revision
+
+    def load_vessels(self, vessels_dict, revision):
+        with self.lock:
+            self.vessels = {}
+            self.vessel_counts = {name: Counter() for name in self.vessel_counts}
+            self.compliance_sum = 0.0
+            for imo, vessel in vessels_dict.items():
+                self._set_vessel(imo, vessel)
+            self.revisions['vessels'] = revision
+
+    # Oil spills
+    def _set_spill(self, spill_id, spill):
+        old = self.spills.pop(spill_id, None)
+        if old is not None:
+            _bump(self.spill_counts['severity'], old[0], -1)
+            _bump(self.spill_counts['status'], old[1], -1)
+        if spill is not None:
+            key = (_label(spill.get('severity')), _label(spill.get('status')))
+            self.spills[spill_id] = key
+            _bump(self.spill_counts['severity'], key[0], 1)
+            _bump(self.spill_counts['status'], key[1], 1)
+
+    def update_spill(self, spill, revision=None):
+        with self.lock:
+            self._set_spill(spill['spill_id'], spill)
+            if revision is not None:
+                self.revisions['oil_spills'] = revision
+
+    def load_spills(self, spills_dict, revision):
+        with self.lock:
+            self.spills = {}
+            self.spill_counts = {name: Counter() for name in self.spill_counts}
+            for spill_id, spill in spills_dict.items():
+                self._set_spill(spill_id, spill)
+            self.revisions['oil_spills'] = revision
+
+    def sync(self, store):
+        """Recount any collection whose store revision this instance was not told about"""
+        if self.revisions['vessels'] != store.revision('vessels'):
+            self.load_vessels(store.get_vessels(), store.revision('vessels'))
+        if self.revisions['oil_spills'] != store.revision('oil_spills'):
+            self.load_spills(store.get_oil_spills(), store.revision('oil_spills'))
+
+    # Reads
+    def vessel_summary(self):
+        with self.lock:
+            total = len(self.vessels)
+            risk = self.vessel_counts['risk_level']
+            return {
+                'total': total,
+                'by_status': dict(self.vessel_counts['status']),
+                'by_risk_level': dict(risk),
+                'by_type': dict(self.vessel_counts['type']),
+                'high_risk': sum(risk.get(level, 0) for level in HIGH_RISK_LEVELS),
+                'compliance_sum': self.compliance_sum,
+                'avg_compliance': self.compliance_sum / total if total else 0
+            }
+
+    def spill_summary(self):
+        with self.lock:
+            return {
+                'total': len(self.spills),
+                'by_severity': dict(self.spill_counts['severity']),
+                'by_status': dict(self.spill_counts['status'])
+            }
+
+
+live_aggregates = LiveAggregates()
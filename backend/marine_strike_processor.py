@@ -6,10 +6,13 @@ Downloads and processes Marine Mammal Strike data from Kaggle/NOAA
 import os
 import json
 import pandas as pd
+import numpy as np
 from pathlib import Path
 from datetime import datetime
 import random
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+
+from id_allocator import IDAllocator
 
 try:
     from kaggle.api.kaggle_api_extended import KaggleApi
@@ -17,6 +20,37 @@ try:
 except ImportError:
     KAGGLE_AVAILABLE = False
 
+# Column name variants across NOAA / Kaggle exports, first match wins (resolved once per file)
+STRIKE_COLUMN_MAPPINGS = {
+    'year': ['YEAR', 'Year'],
+    'month': ['MONTH', 'Month'],
+    'day': ['DAY', 'Day'],
+    'lat': ['LATITUDE', 'Latitude', 'lat'],
+    'lon': ['LONGITUDE', 'Longitude', 'lon'],
+    'species': ['COMMON_NAME', 'Species', 'SPECIES'],
+    'outcome': ['OUTCOME', 'Outcome'],
+    'vessel_type': ['VESSEL_TYPE']
+}
+
+STRIKE_CHUNK_ROWS = int(os.environ.get('STRIKE_CHUNK_ROWS', 250000))
+STRIKE_ID_START = 10000  # First STR-<n> number handed out by the ID counter
+
+# Simulated location box for strikes without coordinates (demo purposes)
+SIM_LAT_RANGE = (5.0, 25.0)
+SIM_LON_RANGE = (65.0, 100.0)
+
+
+def detect_strike_columns(columns) -> Dict[str, str]:
+    """Map strike field -> actual column name using STRIKE_COLUMN_MAPPINGS"""
+    columns = set(columns)
+    actual_columns = {}
+    for key, possible_names in STRIKE_COLUMN_MAPPINGS.items():
+        for name in possible_names:
+            if name in columns:
+                actual_columns[key] = name
+                break
+    return actual_columns
+
 class MarineStrikeProcessor:
     """Process Marine Strike data"""
     
@@ -24,6 +58,7 @@ class MarineStrikeProcessor:
         self.data_dir = Path(data_dir)
         self.kaggle_dir = Path(kaggle_dir)
         self.kaggle_dir.mkdir(exist_ok=True)
+        self.ids = IDAllocator(self.data_dir / "id_counters.json")
         self.api = None
         
         if KAGGLE_AVAILABLE:
@@ -64,85 +99,154 @@ class MarineStrikeProcessor:
             print(f"Error loading CSV: {e}")
             return None
 
-    def transform_to_strikes(self, df: pd.DataFrame) -> List[Dict]:
-        """Transform raw data to SeaTrace format"""
-        strikes = []
+    def iter_chunks(self, csv_file: Path, chunk_rows: int = STRIKE_CHUNK_ROWS) -> Iterator[tuple]:
+        """
+        Read a strike CSV in chunks of chunk_rows, only the mapped columns.
+        Yields (chunk, actual_columns); columns are resolved once from the header.
+        """
+        header = pd.read_csv(csv_file, nrows=0).columns
+        actual_columns = detect_strike_columns(header)
+        if not actual_columns:
+            print(f"Skipping {csv_file.name}: no known strike columns")
+            return
+        text_fields = ('species', 'outcome', 'vessel_type')
+        dtypes = {col: str for key, col in actual_columns.items() if key in text_fields}
+        reader = pd.read_csv(csv_file, usecols=list(actual_columns.values()), dtype=dtypes, chunksize=chunk_rows)
+        for chunk in reader:
+            yield chunk, actual_columns
+
+    def next_strike_ids(self, count: int) -> int:
+        """Reserve `count` strike IDs in one counter update, returns the first number"""
+        return self.ids.allocate('strike', count, seed=lambda: STRIKE_ID_START - 1)
+
+    def transform_to_strikes(self, df: pd.DataFrame, actual_columns: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """
+        Transform raw data to SeaTrace format (column operations over the whole frame)
         
-        # Mapping loosely based on NOAA API structure, adapting for CSV columns
-        # We look for common column names in such datasets
+        Args:
+            df: Raw strike rows
+            actual_columns: Resolved columns (detected from df if omitted)
+        """
+        n = len(df)
+        if n == 0:
+            return []
+        if actual_columns is None:
+            actual_columns = detect_strike_columns(df.columns)
+        first_id = self.next_strike_ids(n)
         
-        for _, row in df.iterrows():
-            try:
-                # Fallbacks for various dataset formats
-                year = row.get('YEAR') or row.get('Year') or datetime.now().year
-                month = row.get('MONTH') or row.get('Month') or 1
-                day = row.get('DAY') or row.get('Day') or 1
-                
-                try:
-                    date_str = f"{int(year)}-{int(month):02d}-{int(day):02d}"
-                except:
-                    date_str = datetime.now().strftime('%Y-%m-%d')
-
-                lat = row.get('LATITUDE') or row.get('Latitude') or row.get('lat')
-                lon = row.get('LONGITUDE') or row.get('Longitude') or row.get('lon')
-                
-                if pd.isna(lat) or pd.isna(lon):
-                    # Simulate location if missing (Demo purposes)
-                    lat = random.uniform(5.0, 25.0)
-                    lon = random.uniform(65.0, 100.0)
-
-                species = row.get('COMMON_NAME') or row.get('Species') or row.get('SPECIES') or "Unknown Whale"
-                
-                outcome = row.get('OUTCOME') or row.get('Outcome') or "Strike"
-                
-                strikes.append({
-                    'id': f"STR-{random.randint(10000, 99999)}",
-                    'date': date_str,
-                    'lat': float(lat),
-                    'lon': float(lon),
-                    'species': str(species),
-                    'outcome': str(outcome),
-                    'vessel_type': str(row.get('VESSEL_TYPE', 'Unknown')),
-                    'severity': 'High' if 'Mortality' in str(outcome) else 'Medium'
-                })
-            except Exception as e:
-                continue
-                
+        def numeric(key):
+            col = actual_columns.get(key)
+            if not col:
+                return pd.Series(np.nan, index=df.index)
+            return pd.to_numeric(df[col], errors='coerce')
+        
+        def text(key, default):
+            col = actual_columns.get(key)
+            if not col:
+                return pd.Series(default, index=df.index, dtype=object)
+            values = df[col].astype(str)
+            return values.where(df[col].notna() & (values.str.strip() != ''), default)
+        
+        def date_part(key, default):
+            # Missing column or 0 -> default; unparseable -> NaN (invalid date)
+            if not actual_columns.get(key):
+                return pd.Series(float(default), index=df.index)
+            values = numeric(key)
+            return values.mask(values == 0, default)
+        
+        # Date: missing parts fall back to the current year, January, the 1st; invalid ones give today's date
+        today = datetime.now()
+        year = date_part('year', today.year)
+        month = date_part('month', 1)
+        day = date_part('day', 1)
+        valid_date = (np.isfinite(year) & np.isfinite(month) & np.isfinite(day)).to_numpy()
+        
+        # Few distinct dates per export: format each (year, month, day) once, then gather
+        parts = pd.DataFrame({'y': year, 'm': month, 'd': day})[valid_date].astype(np.int64)
+        date = np.full(n, today.strftime('%Y-%m-%d'), dtype=object)
+        if len(parts):
+            codes = parts.groupby(['y', 'm', 'd'], sort=False).ngroup().to_numpy()
+            unique_parts = parts.drop_duplicates().itertuples(index=False)
+            formatted = np.array([f"{y}-{m:02d}-{d:02d}" for y, m, d in unique_parts], dtype=object)
+            date[valid_date] = formatted[codes]
+        
+        # Coordinates: non-numeric values count as missing
+        lat = numeric('lat').to_numpy(dtype=np.float64, copy=True)
+        lon = numeric('lon').to_numpy(dtype=np.float64, copy=True)
+        missing = np.isnan(lat) | np.isnan(lon)
+        n_missing = int(missing.sum())
+        if n_missing:
+            # Simulate location if missing (Demo purposes)
+            rng = np.random.default_rng()
+            lat[missing] = rng.uniform(*SIM_LAT_RANGE, n_missing)
+            lon[missing] = rng.uniform(*SIM_LON_RANGE, n_missing)
+        
+        outcome = text('outcome', 'Strike')
+        columns = {
+            'id': [f"STR-{i}" for i in range(first_id, first_id + n)],
+            'date': date,
+            'lat': lat,
+            'lon': lon,
+            'species': text('species', 'Unknown Whale'),
+            'outcome': outcome,
+            'vessel_type': text('vessel_type', 'Unknown'),
+            'severity': np.where(outcome.str.contains('Mortality', regex=False), 'High', 'Medium')
+        }
+        keys = list(columns)
+        values = [v.tolist() if hasattr(v, 'tolist') else v for v in columns.values()]
+        return [dict(zip(keys, row)) for row in zip(*values)]
+
+    def stream_strikes(self, dataset_path: Path, chunk_rows: int = STRIKE_CHUNK_ROWS) -> Optional[List[Dict]]:
+        """Chunked load + transform of the main CSV (memory bounded by chunk_rows of raw data)"""
+        csv_files = list(dataset_path.glob("*.csv"))
+        if not csv_files:
+            return None
+        
+        # Assuming the first CSV is the main data
+        print(f"Streaming {csv_files[0].name} ({chunk_rows} rows per chunk)...")
+        strikes = []
+        for chunk, actual_columns in self.iter_chunks(csv_files[0], chunk_rows):
+            strikes.extend(self.transform_to_strikes(chunk, actual_columns))
+        print(f"Processed {len(strikes)} marine strikes")
         return strikes
 
-    def process_and_save(self, dataset_name: str, output_file: str = "marine_strikes.json") -> bool:
-        """Pipeline"""
+    def process_and_save(self, dataset_name: str, output_file: str = "marine_strikes.json", store=None) -> bool:
+        """Pipeline (replaces the strikes in `store` if given, otherwise writes output_file)"""
         try:
             dataset_path = self.download_dataset(dataset_name)
             if not dataset_path:
                 # Fallback: Create mock data if download fails (for demo reliability)
                 print("Using mock marine strike data (API unavailable)")
-                self.save_mock_data(output_file)
+                self.save_mock_data(output_file, store)
                 return True
 
-            df = self.load_data(dataset_path)
-            if df is None:
-                self.save_mock_data(output_file)
+            strikes = self.stream_strikes(dataset_path)
+            if strikes is None:
+                self.save_mock_data(output_file, store)
                 return True
-
-            strikes = self.transform_to_strikes(df)
             
-            output_path = self.data_dir / output_file
-            with open(output_path, 'w') as f:
-                json.dump(strikes, f, indent=2)
-                
+            self._save_strikes(strikes, output_file, store)
             return True
         except Exception as e:
             print(f"Process error: {e}")
             return False
 
-    def save_mock_data(self, output_file):
+    def _save_strikes(self, strikes: List[Dict], output_file: str, store=None):
+        if store is not None:
+            store.replace_marine_strikes(strikes)
+            return
+        output_path = self.data_dir / output_file
+        with open(output_path, 'w') as f:
+            json.dump(strikes, f, indent=2)
+
+    def save_mock_data(self, output_file, store=None):
         """Generate demo data if Kaggle fails"""
         mock_strikes = []
         species_list = ["Blue Whale", "Humpback Whale", "Dolphin", "Sea Turtle"]
-        for _ in range(20):
+        first_id = self.next_strike_ids(20)
+        for i in range(20):
             mock_strikes.append({
-                'id': f"STR-{random.randint(10000, 99999)}",
+                'id': f"STR-{first_id + i}",
                 'date': (datetime.now()).strftime('%Y-%m-%d'),
                 'lat': random.uniform(5.0, 25.0),
                 'lon': random.uniform(65.0, 100.0),
@@ -152,6 +256,4 @@ class MarineStrikeProcessor:
                 'severity': "Low"
             })
         
-        output_path = self.data_dir / output_file
-        with open(output_path, 'w') as f:
-            json.dump(mock_strikes, f, indent=2)
+        self._save_strikes(mock_strikes, output_file, store)
@@ -0,0 +1,186 @@
+"""
+Realtime Analysis Snapshots for SeaTrace
+Versioned vessel/spill snapshot: one full snapshot per client, then shared deltas since each client's acked revision.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+REALTIME_HISTORY_REVISIONS = int(os.environ.get('REALTIME_HISTORY_REVISIONS', 256))  # Lag before a client gets a full snapshot again
+REALTIME_SNAPSHOT_MAX_AGE = float(os.environ.get('REALTIME_SNAPSHOT_MAX_AGE', 2))      # Seconds a snapshot is reused for new subscribers
+POSITION_DECIMALS = 5              # ~1 m, for the positions merged into full snapshots
+
+# Analysis fields: what a revision tracks and a delta carries. Position, course and track change
+# every tick and already stream over the vessel stream, so they only appear in full snapshots.
+VESSEL_FIELDS = (
+    ('name', 'Unknown'), ('speed', 0), ('destination', 'Unknown'),
+    ('compliance_rating', 0), ('risk_level', 'Unknown'), ('last_inspection', 'N/A')
+)
+SPILL_FIELDS = ('vessel_name', 'lat', 'lon', 'severity', 'size_tons', 'estimated_area_km2', 'status', 'confidence')
+
+
+def vessel_payload(vessel):
+    payload = {'imo': vessel.get('imo')}
+    payload.update((field, vessel.get(field, default)) for field, default in VESSEL_FIELDS)
+    return payload
+
+
+def vessel_position(vessel, track=None):
+    """Live part of a vessel record, merged into full snapshots only"""
+    position = {
+        'lat': round(float(vessel.get('lat', 0.0)), POSITION_DECIMALS),
+        'lon': round(float(vessel.get('lon', 0.0)), POSITION_DECIMALS),
+        'course': vessel.get('course', 0)
+    }
+    if track is not None:
+        position['track'] = track
+    return position
+
+
+def spill_payload(spill):
+    payload = {'spill_id': spill['spill_id']}
+    payload.update((field, spill.get(field)) for field in SPILL_FIELDS)
+    return payload
+
+
+def revision_room(revision):
+    """Socket.IO room of the clients whose acked revision is `revision` (one shared delta per room)"""
+    return f'realtime_rev_{revision}'
+
+
+class RealtimeSnapshotService:
+    """
+    Every refresh() diffs the current vessel/spill payloads against the last ones and, if anything
+    changed, bumps the revision and logs the changed keys. A delta since revision r is the union of
+    the logged keys after r, with current payloads; each delta is built once per revision (the full
+    snapshot once per revision and positions_key) and shared by every client that needs them.
+    """
+
+    def __init__(self, history_revisions=REALTIME_HISTORY_REVISIONS):
+        self.history_revisions = history_revisions
+        self.revision = 0
+        self.refreshed_at = None
+        self.records = {'vessels': {}, 'oil_spills': {}}   # kind -> key -> payload
+        self.history = OrderedDict()                       # revision -> {'vessels': keys, 'oil_spills': keys}
+        self.clients = {}                                  # sid -> acked revision
+        self.lock = threading.Lock()
+
+        self._snapshot = None       # Full snapshot of self.revision
+        self._snapshot_key = None   # positions_key the full snapshot was built with
+        self._deltas = {}           # base revision -> delta to self.revision
+
+    def refresh(self, vessels, spills):
+        """
+        vessels / spills: iterables of payloads (vessel_payload / spill_payload).
+        Returns the revision after the refresh (unchanged if nothing differs).
+        """
+        current = {
+            'vessels': {p['imo']: p for p in vessels},
+            'oil_spills': {p['spill_id']: p for p in spills}
+        }
+        with self.lock:
+            changed = {}
+            for kind, records in current.items():
+                previous = self.records[kind]
+                keys = [key for key, payload in records.items() if previous.get(key) != payload]
+                keys += [key for key in previous if key not in records]
+                if keys:
+                    changed[kind] = keys
+            self.refreshed_at = time.monotonic()
+            if not changed:
+                return self.revision
+
+            self.revision += 1
+            self.records = current
+            self.history[self.revision] = changed
+            while len(self.history) > self.history_revisions:
+                self.history.popitem(last=False)
+            self._snapshot = None
+            self._deltas = {}
+            return self.revision
+
+    def age(self):
+        """Seconds since the last refresh (None before the first one)"""
+        return None if self.refreshed_at is None else time.monotonic() - self.refreshed_at
+
+    def snapshot(self, positions=None, positions_key=None):
+        """
+        Full snapshot of the current revision. positions: optional callable returning
+        {imo: vessel_position(...)} merged into the vessel records; the snapshot is shared by
+        every caller until the revision or positions_key (e.g. the fleet version) changes.
+        """
+        with self.lock:
+            if self._snapshot is None or self._snapshot_key != positions_key:
+                live = positions() if positions is not None else {}
+                self._snapshot = {
+                    'revision': self.revision,
+                    'full': True,
+                    'vessels': [dict(record, **live[imo]) if imo in live else record
+                                for imo, record in self.records['vessels'].items()],
+                    'oil_spills': list(self.records['oil_spills'].values()),
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+                self._snapshot_key = positions_key
+            return self._snapshot
+
+    def delta(self, base, positions=None, positions_key=None):
+        """
+        Changes from revision `base` to the current one, or None when `base` is current.
+        A full snapshot (see snapshot()) is returned instead when `base` fell out of the history.
+        """
+        with self.lock:
+            if base == self.revision:
+                return None
+            oldest = next(iter(self.history), self.revision + 1)
+            if base is None or base > self.revision or base + 1 < oldest:
+                full = True
+            else:
+                full = False
+                delta = self._deltas.get(base)
+                if delta is None:
+                    delta = self._deltas[base] = self._build_delta(base)
+        return self.snapshot(positions, positions_key) if full else delta
+
+    def _build_delta(self, base):
+        changed = {'vessels': set(), 'oil_spills': set()}
+        for revision in range(base + 1, self.revision + 1):
+            for kind, keys in self.history[revision].items():
+                changed[kind].update(keys)
+        delta = {'revision': self.revision, 'base_revision': base, 'full': False,
+                 'timestamp': datetime.utcnow().isoformat()}
+        for kind, keys in changed.items():
+            records = self.records[kind]
+            delta[kind] = [records[key] for key in keys if key in records]
+            delta[f'removed_{kind}'] = [key for key in keys if key not in records]
+        return delta
+
+    # Clients
+    def subscribe(self, sid, revision):
+        """Register a client holding `revision`; returns the revision it held before (None if new)"""
+        with self.lock:
+            previous = self.clients.get(sid)
+            self.clients[sid] = revision
+            return previous
+
+    def ack(self, sid, revision):
+        """Record a client's acked revision; returns (previous, acked) or None if nothing changed"""
+        with self.lock:
+            previous = self.clients.get(sid)
+            if previous is None or not isinstance(revision, int) or not previous < revision <= self.revision:
+                return None
+            self.clients[sid] = revision
+            return previous, revision
+
+    def unsubscribe(self, sid):
+        with self.lock:
+            return self.clients.pop(sid, None)
+
+    def client_revisions(self):
+        """Distinct acked revisions of the subscribed clients"""
+        with self.lock:
+            return set(self.clients.values())
+
+
+realtime_snapshots = RealtimeSnapshotService()
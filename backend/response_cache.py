@@ -0,0 +1,105 @@
+"""
+Serialized Response Cache for SeaTrace
+Collection GET responses serialized once per revision (orjson when available), with compressed variants and an ETag.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    print("Warning: orjson not available, using json for cached responses. Install with: pip install orjson")
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+RESPONSE_BROTLI_QUALITY = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 5))
+RESPONSE_COMPRESS_MIN_BYTES = 1024   # Smaller bodies are sent as is
+
+
+def serialize(payload):
+    """Compact JSON bytes (orjson handles numpy scalars; anything else unknown becomes a string)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), default=str).encode()
+
+
+class SerializedSnapshot:
+    """JSON body of one revision of a collection; compressed variants are made on first request"""
+
+    def __init__(self, revision, body):
+        self.revision = revision
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.encoded = {'identity': body}
+        self.lock = threading.Lock()
+
+    def encoding_for(self, accept_encoding):
+        """Best content coding the client accepts ('br', 'gzip' or 'identity')"""
+        if len(self.body) < RESPONSE_COMPRESS_MIN_BYTES:
+            return 'identity'
+        accepted = {part.split(';')[0].strip() for part in (accept_encoding or '').lower().split(',')}
+        if BROTLI_AVAILABLE and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return 'identity'
+
+    def body_for(self, encoding):
+        with self.lock:
+            data = self.encoded.get(encoding)
+            if data is None:
+                if encoding == 'br':
+                    data = brotli.compress(self.body, quality=RESPONSE_BROTLI_QUALITY)
+                else:
+                    data = gzip.compress(self.body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+                self.encoded[encoding] = data
+            return data
+
+
+class ResponseCache:
+    """
+    Latest SerializedSnapshot per collection name. A request passes the current revision of
+    the data (anything hashable that changes on every tick / mutation) and a build() that
+    returns the payload; only the first request after a change pays for serialization.
+    """
+
+    def __init__(self):
+        self.snapshots = {}
+        self.build_locks = {}
+        self.lock = threading.Lock()
+        self.metrics = {'hits': 0, 'builds': 0}
+
+    def get(self, name, revision, build):
+        snapshot = self.snapshots.get(name)
+        if snapshot is not None and snapshot.revision == revision:
+            self.metrics['hits'] += 1
+            return snapshot
+        with self.lock:
+            build_lock = self.build_locks.setdefault(name, threading.Lock())
+        # Concurrent requests for a stale collection wait for one build instead of each serializing
+        with build_lock:
+            snapshot = self.snapshots.get(name)
+            if snapshot is not None and snapshot.revision == revision:
+                self.metrics['hits'] += 1
+                return snapshot
+            snapshot = SerializedSnapshot(revision, serialize(build()))
+            self.snapshots[name] = snapshot
+            self.metrics['builds'] += 1
+            return snapshot
+
+    def clear(self):
+        with self.lock:
+            self.snapshots.clear()
+
+
+response_cache = ResponseCache()
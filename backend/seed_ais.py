@@ -1,5 +1,4 @@
 
-import json
 import random
 import os
 from pathlib import Path
@@ -133,7 +132,10 @@ if __name__ == "__main__":
     
     vessels_data = generate_vessels(TOTAL_VESSELS)
     
-    with open(data_dir / "vessels.json", "w") as f:
-        json.dump(vessels_data, f, indent=2)
+    # Through the configured storage backend (STORAGE_BACKEND=json|sqlite)
+    from data_manager import create_data_manager
+    store = create_data_manager(data_dir)
+    store.replace_vessels(vessels_data)
+    store.save_all_data()
         
     print(f"SUCCESS: Generated {len(vessels_data)} realistic AIS records along shipping lanes.")
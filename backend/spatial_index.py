@@ -0,0 +1,188 @@
+"""
+Spatial Index for SeaTrace
+Uniform lat/lon grid over point arrays; rows are bucketed by cell so bbox, radius and
+nearest-neighbour queries only touch the cells they cover.
+"""
+import threading
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.195
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance from one point to arrays of points"""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - np.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GridIndex:
+    def __init__(self, cell_deg=1.0):
+        self.cell_deg = float(cell_deg)
+        self.n_rows = int(np.ceil(180.0 / self.cell_deg))
+        self.n_cols = int(np.ceil(360.0 / self.cell_deg))
+        self.n_cells = self.n_rows * self.n_cols
+        self.lock = threading.RLock()
+
+        self.keys = None                                    # Optional row -> record key (IMO, spill_id, ...)
+        self.epoch = None                                   # Source layout version the rows refer to
+        self.lat = np.zeros(0, dtype=np.float64)
+        self.lon = np.zeros(0, dtype=np.float64)
+        self.cells = np.zeros(0, dtype=np.int64)
+        self.order = np.zeros(0, dtype=np.int64)            # Point rows sorted by cell
+        self.cell_start = np.zeros(self.n_cells + 1, dtype=np.int64)
+
+        self._cluster_cache = {}
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _cell_coords(self, lat, lon):
+        r = np.clip(((lat + 90.0) / self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+        c = np.clip(((lon + 180.0) / self.cell_deg).astype(np.int64), 0, self.n_cols - 1)
+        return r, c
+
+    def _bucket(self):
+        self.order = np.argsort(self.cells, kind='stable')
+        counts = np.bincount(self.cells, minlength=self.n_cells)
+        self.cell_start[0] = 0
+        np.cumsum(counts, out=self.cell_start[1:])
+
+    def build(self, lat, lon, keys=None, epoch=None):
+        """(Re)bucket every point by grid cell"""
+        with self.lock:
+            self.lat = np.array(lat, dtype=np.float64)
+            self.lon = np.array(lon, dtype=np.float64)
+            self.keys = list(keys) if keys is not None else None
+            self.epoch = epoch
+            r, c = self._cell_coords(self.lat, self.lon)
+            self.cells = r * self.n_cols + c
+            self._bucket()
+            self._cluster_cache = {}
+
+    def move(self, lat, lon):
+        """
+        Incremental update for the same set of rows (e.g. after a simulation tick).
+        Coordinates are refreshed in place; buckets are only re-sorted when a point crossed a cell.
+        """
+        with self.lock:
+            self.lat[:] = lat
+            self.lon[:] = lon
+            r, c = self._cell_coords(self.lat, self.lon)
+            cells = r * self.n_cols + c
+            if not np.array_equal(cells, self.cells):
+                self.cells = cells
+                self._bucket()
+            self._cluster_cache = {}
+
+    def add(self, key, lat, lon):
+        """Insert a single point (spills and other small, append-mostly collections)"""
+        with self.lock:
+            r, c = self._cell_coords(np.float64(lat), np.float64(lon))
+            self.lat = np.append(self.lat, float(lat))
+            self.lon = np.append(self.lon, float(lon))
+            self.cells = np.append(self.cells, r * self.n_cols + c)
+            if self.keys is None:
+                self.keys = [None] * (len(self.lat) - 1)
+            self.keys.append(key)
+            self._bucket()
+            self._cluster_cache = {}
+
+    def _query_box(self, south, west, north, east):
+        r0, c0 = self._cell_coords(np.float64(south), np.float64(west))
+        r1, c1 = self._cell_coords(np.float64(north), np.float64(east))
+        # Cells in one grid row are contiguous in the sorted order: one slice per row
+        slices = [
+            self.order[self.cell_start[r * self.n_cols + c0]:self.cell_start[r * self.n_cols + c1 + 1]]
+            for r in range(int(r0), int(r1) + 1)
+        ]
+        if not slices:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.concatenate(slices)
+        lat = self.lat[candidates]
+        lon = self.lon[candidates]
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return candidates[inside]
+
+    def query_bbox(self, south, west, north, east):
+        """Rows inside the box; west > east means the box crosses the antimeridian"""
+        with self.lock:
+            if west > east:
+                return np.concatenate((
+                    self._query_box(south, west, north, 180.0),
+                    self._query_box(south, -180.0, north, east),
+                ))
+            return self._query_box(south, west, north, east)
+
+    def query_radius(self, lat, lon, radius_km):
+        """Rows within radius_km (haversine) of a point, nearest first. Returns (rows, distances_km)."""
+        dlat = radius_km / KM_PER_DEG_LAT
+        south, north = lat - dlat, lat + dlat
+        cos_lat = np.cos(np.radians(min(abs(lat) + dlat, 90.0)))
+        if south <= -90 or north >= 90 or cos_lat < 1e-6 or dlat / cos_lat >= 180:
+            west, east = -180.0, 180.0
+        else:
+            dlon = dlat / cos_lat
+            west = ((lon - dlon + 180.0) % 360.0) - 180.0
+            east = ((lon + dlon + 180.0) % 360.0) - 180.0
+
+        with self.lock:
+            rows = self.query_bbox(max(south, -90.0), west, min(north, 90.0), east)
+            dist = haversine_km(lat, lon, self.lat[rows], self.lon[rows])
+        within = dist <= radius_km
+        rows, dist = rows[within], dist[within]
+        order = np.argsort(dist, kind='stable')
+        return rows[order], dist[order]
+
+    def nearest(self, lat, lon, k=10):
+        """k nearest rows by expanding the search radius. Returns (rows, distances_km)."""
+        k = min(int(k), len(self.lat))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        radius = self.cell_deg * KM_PER_DEG_LAT
+        while True:
+            rows, dist = self.query_radius(lat, lon, radius)
+            if len(rows) >= k or radius >= np.pi * EARTH_RADIUS_KM:
+                return rows[:k], dist[:k]
+            radius *= 2
+
+    def clusters(self, zoom):
+        """
+        Decimated view for low zoom levels: one centroid + count per cluster cell.
+        Computed once per update and zoom, then shared by every client at that zoom.
+        """
+        zoom = int(zoom)
+        if zoom in self._cluster_cache:
+            return self._cluster_cache[zoom]
+
+        # Roughly four clusters across a 256px map tile at this zoom
+        deg = 360.0 / (2 ** max(zoom, 0)) / 4.0
+        n_cols = int(np.ceil(360.0 / deg))
+        r = ((self.lat + 90.0) / deg).astype(np.int64)
+        c = ((self.lon + 180.0) / deg).astype(np.int64)
+        keys, inverse, counts = np.unique(r * n_cols + c, return_inverse=True, return_counts=True)
+        lat = np.bincount(inverse, weights=self.lat, minlength=len(keys)) / counts
+        lon = np.bincount(inverse, weights=self.lon, minlength=len(keys)) / counts
+
+        result = (lat, lon, counts)
+        self._cluster_cache[zoom] = result
+        return result
+
+    def clusters_in_bbox(self, zoom, south, west, north, east):
+        lat, lon, counts = self.clusters(zoom)
+        if west > east:
+            in_lon = (lon >= west) | (lon <= east)
+        else:
+            in_lon = (lon >= west) & (lon <= east)
+        mask = (lat >= south) & (lat <= north) & in_lon
+        return lat[mask], lon[mask], counts[mask]
+
+# Global indexes: fleet rows follow fleet_state, spills are keyed by spill_id,
+# strikes by their position in data_manager.get_marine_strikes()
+fleet_grid = GridIndex(cell_deg=1.0)
+spill_grid = GridIndex(cell_deg=1.0)
+strike_grid = GridIndex(cell_deg=1.0)
@@ -0,0 +1,128 @@
+"""
+Streaming Speed Statistics for SeaTrace
+Welford accumulators per vessel type and EWMA baselines per vessel, updated once per simulation tick.
+"""
+import threading
+import numpy as np
+
+EWMA_ALPHA = 0.05          # Per-tick weight of the newest sample in a vessel's own baseline
+HISTORY_WARMUP_TICKS = 10  # Samples before a vessel's own baseline is trusted
+MIN_STD_KTS = 0.5          # Floor for the std used in z-scores (constant-speed vessels)
+CLIP_Z = 3.0               # Residuals are clipped to this many std before entering the EWMA
+
+
+class SpeedStatistics:
+    def __init__(self, alpha=EWMA_ALPHA, warmup=HISTORY_WARMUP_TICKS, min_std=MIN_STD_KTS):
+        self.alpha = alpha
+        self.warmup = warmup
+        self.min_std = min_std
+        self.lock = threading.Lock()
+
+        # Per vessel type, keyed by type name (fleet type codes change on reload)
+        self.type_names = []
+        self.type_slots = {}
+        self.type_count = np.zeros(0, dtype=np.float64)
+        self.type_mean = np.zeros(0, dtype=np.float64)
+        self.type_m2 = np.zeros(0, dtype=np.float64)
+
+        # Per vessel, row-aligned with the fleet arrays of self.epoch
+        self.epoch = None
+        self.slot_of_code = np.zeros(0, dtype=np.int64)
+        self.ewma_mean = np.zeros(0, dtype=np.float64)
+        self.ewma_var = np.zeros(0, dtype=np.float64)
+        self.samples = np.zeros(0, dtype=np.int64)
+
+    def _type_slot(self, name):
+        slot = self.type_slots.get(name)
+        if slot is None:
+            slot = self.type_slots[name] = len(self.type_names)
+            self.type_names.append(name)
+            self.type_count = np.append(self.type_count, 0.0)
+            self.type_mean = np.append(self.type_mean, 0.0)
+            self.type_m2 = np.append(self.type_m2, 0.0)
+        return slot
+
+    def _sync_layout(self, epoch, types, n):
+        if len(self.slot_of_code) != len(types):
+            self.slot_of_code = np.array([self._type_slot(t) for t in types], dtype=np.int64)
+        if epoch != self.epoch or len(self.ewma_mean) != n:
+            # Rows were rebuilt: per-vessel baselines restart from the next sample
+            self.epoch = epoch
+            self.ewma_mean = np.zeros(n, dtype=np.float64)
+            self.ewma_var = np.zeros(n, dtype=np.float64)
+            self.samples = np.zeros(n, dtype=np.int64)
+
+    def update(self, fleet):
+        """Fold the current fleet speeds into both accumulators (one sample per vessel)"""
+        with fleet.lock:
+            speed = fleet.speed.copy()
+            codes = fleet.type_code.copy()
+            types = list(fleet.types)
+            epoch = fleet.epoch
+        if len(speed) == 0:
+            return
+
+        with self.lock:
+            self._sync_layout(epoch, types, len(speed))
+            slots = self.slot_of_code[codes]
+
+            # Welford per type, merged a whole batch at a time (Chan et al. parallel update)
+            n_slots = len(self.type_names)
+            n_b = np.bincount(slots, minlength=n_slots).astype(np.float64)
+            present = n_b > 0
+            mean_b = np.zeros(n_slots)
+            mean_b[present] = np.bincount(slots, weights=speed, minlength=n_slots)[present] / n_b[present]
+            m2_b = np.bincount(slots, weights=(speed - mean_b[slots]) ** 2, minlength=n_slots)
+
+            n_a = self.type_count
+            total = n_a + n_b
+            delta = mean_b - self.type_mean
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.type_mean = np.where(present, self.type_mean + delta * n_b / total, self.type_mean)
+                self.type_m2 = np.where(present, self.type_m2 + m2_b + delta ** 2 * n_a * n_b / total, self.type_m2)
+            self.type_count = total
+
+            # EWMA per vessel; residuals are clipped so one outlier cannot drag its own baseline
+            fresh = self.samples == 0
+            self.ewma_mean[fresh] = speed[fresh]
+            std = np.maximum(np.sqrt(self.ewma_var), self.min_std)
+            resid = np.clip(speed - self.ewma_mean, -CLIP_Z * std, CLIP_Z * std)
+            self.ewma_mean += self.alpha * resid
+            self.ewma_var = (1.0 - self.alpha) * (self.ewma_var + self.alpha * resid ** 2)
+            self.samples += 1
+
+    def type_std(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.type_count > 1, np.sqrt(self.type_m2 / (self.type_count - 1)), np.nan)
+
+    def zscores(self, fleet):
+        """
+        Speed z-scores against the vessel's type and against its own history.
+        Returns (type_z, history_z); entries are NaN where no baseline exists yet.
+        Caller must hold fleet.lock.
+        """
+        n = len(fleet.speed)
+        with self.lock:
+            if self.epoch != fleet.epoch or len(self.ewma_mean) != n or len(self.slot_of_code) < len(fleet.types):
+                nan = np.full(n, np.nan)
+                return nan, nan.copy()
+            slots = self.slot_of_code[fleet.type_code]
+            type_std = self.type_std()[slots]
+            type_z = (fleet.speed - self.type_mean[slots]) / np.maximum(type_std, self.min_std)
+
+            history_std = np.maximum(np.sqrt(self.ewma_var), self.min_std)
+            history_z = (fleet.speed - self.ewma_mean) / history_std
+            history_z[self.samples < self.warmup] = np.nan
+        return type_z, history_z
+
+    def type_summary(self):
+        """{type: {'samples', 'mean', 'std'}} for the types seen so far"""
+        with self.lock:
+            std = self.type_std()
+            return {
+                name: {'samples': int(self.type_count[i]), 'mean': round(float(self.type_mean[i]), 2),
+                       'std': None if np.isnan(std[i]) else round(float(std[i]), 2)}
+                for i, name in enumerate(self.type_names) if self.type_count[i] > 0
+            }
+
+speed_stats = SpeedStatistics()
@@ -1,75 +1,297 @@
 """
 Advanced Spill Forecasting Module
 Uses environmental data to predict plume trajectory and weathering.
+Ensemble Lagrangian particle tracking: every step advances all particles at once in NumPy,
+with scalar wind/current or gridded time-varying fields sampled at the particle positions.
 """
 import math
-import random
-from datetime import datetime, timedelta
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from env_fields import CURRENT_VARIABLES, WIND_VARIABLES, GriddedField, load_field
+
+# Coefficients
+WIND_DRIFT_FACTOR = 0.035        # Surface drift as a fraction of wind speed
+WINDAGE_SPREAD = 0.005           # Per-particle spread of the wind drift factor
+CURRENT_DRIFT_FACTOR = 1.0
+
+SPILL_PARTICLES = int(os.environ.get('SPILL_PARTICLES', 10000))
+MAX_PARTICLES = 200000           # Upper bound for per-request particle counts
+SPILL_DIFFUSIVITY_M2S = float(os.environ.get('SPILL_DIFFUSIVITY_M2S', 20.0))  # Horizontal random-walk diffusivity
+DT_HOURS = 1.0
+INITIAL_RADIUS_KM = 0.5          # Release patch (1 sigma = half of it)
+EVAPORATION_RATE_PER_HOUR = 0.015
+EVAPORATION_SPREAD = 0.3         # Log-normal sigma of per-particle weathering rates
+
+KM_PER_NM = 1.852
+KM_PER_DEG_LAT = 111.32
+HULL_MASS_FRACTION = 0.95        # Hulls / radii enclose this share of the floating mass
+HULL_DIRECTIONS = 64             # Support directions used for the hull polygon
+GRID_CELLS = 32                  # Concentration grid resolution per axis
+ENV_FIELD_KEYS = ('wind_field', 'current_field', 'start_time')  # env_conditions keys for gridded fields
+
+# Economic impact estimator (USD per km2 of final slick area)
+CLEANUP_COST_PER_KM2 = 50000
+MARINE_REHAB_COST_PER_KM2 = 35000
+ECONOMIC_LOSS_PER_KM2 = 25000
+
+
+def convex_hull(x, y, directions=HULL_DIRECTIONS):
+    """
+    Convex polygon through the support points of a point cloud in `directions` evenly spaced
+    directions (exact hull vertices, in counter-clockwise order; one matrix product, no sort).
+    Points inside a coarse 8-direction hull around the origin can never be support points, so
+    only the points outside its inscribed circle enter the product.
+    Returns indices into x/y.
+    """
+    candidates = np.arange(len(x))
+    coarse = _support(x, y, 8)
+    if len(coarse) >= 3:
+        inner = _inradius(x[coarse], y[coarse])
+        if inner > 0:
+            candidates = np.flatnonzero(x * x + y * y > inner * inner)
+            candidates = np.union1d(candidates, coarse)
+    return candidates[_support(x[candidates], y[candidates], directions)]
+
+
+def _support(x, y, directions):
+    """Indices of the extreme points in `directions` evenly spaced directions (deduplicated, in order)"""
+    angles = np.linspace(0, 2 * np.pi, directions, endpoint=False)
+    support = np.argmax(np.outer(x, np.cos(angles)) + np.outer(y, np.sin(angles)), axis=0)
+    _, first = np.unique(support, return_index=True)
+    return support[np.sort(first)]
+
+
+def _inradius(x, y):
+    """Distance from the origin to the nearest edge of a counter-clockwise polygon (<= 0 if outside)"""
+    ex, ey = np.roll(x, -1) - x, np.roll(y, -1) - y
+    length = np.hypot(ex, ey)
+    length[length == 0] = np.inf
+    return float(np.min((ex * -y - ey * -x) / length))
+
+
+def env_conditions_from(params):
+    """env_conditions from API parameters (wind_direction / current_direction, defaults as the UI's)"""
+    env = {
+        'wind_speed': float(params.get('wind_speed', 10)),
+        'wind_dir': float(params.get('wind_direction', 0)),
+        'current_speed': float(params.get('current_speed', 1)),
+        'current_dir': float(params.get('current_direction', 90))
+    }
+    env.update({k: params[k] for k in ENV_FIELD_KEYS if params.get(k)})
+    return env
+
+
+def economic_impact(area_km2):
+    """Cleanup, rehabilitation and tourism/fisheries cost of a slick of the given area"""
+    return {
+        'cleanup_cost': area_km2 * CLEANUP_COST_PER_KM2,
+        'marine_rehab': area_km2 * MARINE_REHAB_COST_PER_KM2,
+        'tourism_fisheries_loss': area_km2 * ECONOMIC_LOSS_PER_KM2,
+        'total_estimated_cost': area_km2 * (CLEANUP_COST_PER_KM2 + MARINE_REHAB_COST_PER_KM2 + ECONOMIC_LOSS_PER_KM2)
+    }
+
+
+def polygon_area(x, y):
+    """Shoelace area of a closed polygon given by its vertices"""
+    return 0.5 * abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+
+
+def concentration_grid(lat, lon, mass, cells=GRID_CELLS):
+    """Floating mass per lat/lon cell (tons) over the cloud's bounding box"""
+    lat0, lat1 = float(lat.min()), float(lat.max())
+    lon0, lon1 = float(lon.min()), float(lon.max())
+    dlat = max(lat1 - lat0, 1e-6) / cells
+    dlon = max(lon1 - lon0, 1e-6) / cells
+    i = np.minimum(((lat - lat0) / dlat).astype(np.int64), cells - 1)
+    j = np.minimum(((lon - lon0) / dlon).astype(np.int64), cells - 1)
+    values = np.bincount(i * cells + j, weights=mass, minlength=cells * cells).reshape(cells, cells)
+    return {
+        'lat0': lat0,
+        'lon0': lon0,
+        'dlat': dlat,
+        'dlon': dlon,
+        'shape': [cells, cells],
+        'tons': np.round(values, 4).tolist()
+    }
+
 
 class SpillForecaster:
-    def __init__(self):
-        pass
+    def __init__(self, n_particles=SPILL_PARTICLES, diffusivity_m2s=SPILL_DIFFUSIVITY_M2S, dt_hours=DT_HOURS):
+        self.n_particles = int(n_particles)
+        self.diffusivity_m2s = float(diffusivity_m2s)
+        self.dt_hours = float(dt_hours)
+
+    def _env_vectors(self, env_conditions):
+        """Wind and current as east/north components in knots"""
+        w_spd = float(env_conditions.get('wind_speed', 10))
+        w_dir = math.radians(float(env_conditions.get('wind_dir', 0)))
+        c_spd = float(env_conditions.get('current_speed', 1))
+        c_dir = math.radians(float(env_conditions.get('current_dir', 90)))
+        return (w_spd * math.sin(w_dir), w_spd * math.cos(w_dir),
+                c_spd * math.sin(c_dir), c_spd * math.cos(c_dir))
+
+    def _env_fields(self, env_conditions):
+        """
+        Gridded wind/current fields named in env_conditions ('wind_field' / 'current_field':
+        a file in ENV_FIELDS_DIR or a GriddedField); None where the scalar values apply.
+        """
+        fields = []
+        for key, variable_names in (('wind_field', WIND_VARIABLES), ('current_field', CURRENT_VARIABLES)):
+            field = env_conditions.get(key)
+            if field and not isinstance(field, GriddedField):
+                field = load_field(field, variable_names)
+            fields.append(field or None)
+        return fields
+
+    @staticmethod
+    def _sample(field, lat, lon, when, default_u, default_v):
+        """u/v in knots at every particle; the scalar values fill in outside the grid (or on land)"""
+        if field is None:
+            return default_u, default_v
+        u, v = field.sample(lat, lon, when)
+        missing = np.isnan(u) | np.isnan(v)
+        if missing.any():
+            u[missing] = default_u
+            v[missing] = default_v
+        return u, v
+
+    def simulate_particles(self, spill_initial_state, env_conditions, duration_hours=72, horizons=None,
+                           n_particles=None, seed=None, grid=False):
+        """
+        Ensemble Lagrangian forecast.
+        Particles drift with windage * wind + current, spread by a random walk with the configured
+        diffusivity and lose mass through per-particle (log-normal rate) evaporation.
+        spill_initial_state: {'lat', 'lon', 'size_tons'}
+        env_conditions: {'wind_speed', 'wind_dir', 'current_speed', 'current_dir'} (knots / degrees),
+            optionally 'wind_field' / 'current_field' (gridded fields, see env_fields) and 'start_time'
+            (ISO time the run starts at, used to pick field time steps; default now)
+        horizons: hours to report (default: every 24 h and the end of the run)
+        grid: also return a concentration grid per horizon
+        Returns {'n_particles', 'dt_hours', 'horizons': [per-horizon summary with hull polygon]}.
+        """
+        n = min(max(int(n_particles or self.n_particles), 1), MAX_PARTICLES)
+        rng = np.random.default_rng(seed)
+        duration_hours = float(duration_hours)
+        if horizons is None:
+            horizons = sorted(set(list(range(24, int(duration_hours) + 1, 24)) + [duration_hours]))
+        horizons = sorted(float(h) for h in horizons if 0 <= float(h) <= duration_hours)
+
+        lat0 = float(spill_initial_state['lat'])
+        lon0 = float(spill_initial_state['lon'])
+        size_tons = float(spill_initial_state.get('size_tons', 10) or 10)
+
+        # Release patch, in km around the spill point
+        x = rng.standard_normal(n) * (INITIAL_RADIUS_KM / 2)
+        y = rng.standard_normal(n) * (INITIAL_RADIUS_KM / 2)
+        lat = lat0 + y / KM_PER_DEG_LAT
+        lon = lon0 + x / (KM_PER_DEG_LAT * np.cos(np.radians(lat0)))
+
+        # Per-particle properties: windage and weathering rate
+        windage = WIND_DRIFT_FACTOR + WINDAGE_SPREAD * rng.standard_normal(n)
+        rate = EVAPORATION_RATE_PER_HOUR * rng.lognormal(0.0, EVAPORATION_SPREAD, n)
+        mass = np.full(n, size_tons / n)
+
+        w_u, w_v, c_u, c_v = self._env_vectors(env_conditions)
+        wind_field, current_field = self._env_fields(env_conditions)
+        sigma_km = math.sqrt(2 * self.diffusivity_m2s * self.dt_hours * 3600) / 1000
+        started = datetime.utcnow()
+        if env_conditions.get('start_time'):
+            started = datetime.fromisoformat(str(env_conditions['start_time']).replace('Z', '+00:00'))
+            if started.tzinfo:
+                started = started.astimezone(timezone.utc).replace(tzinfo=None)
+        epoch = (started - datetime(1970, 1, 1)).total_seconds()
+
+        results = []
+        pending = list(horizons)
+        t = 0.0
+        while True:
+            while pending and pending[0] <= t + 1e-9:
+                results.append(self._summarize(pending.pop(0), lat, lon, mass, size_tons, started, grid))
+            if not pending:
+                break
+            dt = min(self.dt_hours, pending[0] - t)
+            step_sigma = sigma_km * math.sqrt(dt / self.dt_hours)
+
+            # Fields are sampled at the particles' positions and the middle of the step
+            when = epoch + (t + dt / 2) * 3600
+            wind_u, wind_v = self._sample(wind_field, lat, lon, when, w_u, w_v)
+            current_u, current_v = self._sample(current_field, lat, lon, when, c_u, c_v)
+
+            # Advection (knots = NM/h) + random-walk diffusion, in km
+            dx = (windage * wind_u + CURRENT_DRIFT_FACTOR * current_u) * (KM_PER_NM * dt)
+            dy = (windage * wind_v + CURRENT_DRIFT_FACTOR * current_v) * (KM_PER_NM * dt)
+            noise = rng.standard_normal((2, n))
+            dx += noise[0] * step_sigma
+            dy += noise[1] * step_sigma
+
+            lon += dx / (KM_PER_DEG_LAT * np.cos(np.radians(lat)))
+            lat += dy / KM_PER_DEG_LAT
+            mass *= np.exp(-rate * dt)
+            t += dt
+
+        return {'n_particles': n, 'dt_hours': self.dt_hours, 'horizons': results}
+
+    def _summarize(self, hours, lat, lon, mass, size_tons, started, grid):
+        """Centroid, mass radius, hull polygon and remaining mass of the cloud at one horizon"""
+        total = float(mass.sum())
+        c_lat = float(np.dot(lat, mass) / total)
+        c_lon = float(np.dot(lon, mass) / total)
+
+        # Local km coordinates around the centroid; keep the core HULL_MASS_FRACTION of particles
+        x = (lon - c_lon) * (KM_PER_DEG_LAT * math.cos(math.radians(c_lat)))
+        y = (lat - c_lat) * KM_PER_DEG_LAT
+        dist = np.hypot(x, y)
+        radius = float(np.quantile(dist, HULL_MASS_FRACTION))
+        core = np.flatnonzero(dist <= radius)
+        hull = core[convex_hull(x[core], y[core])]
+
+        polygon = [[round(la, 5), round(lo, 5)] for la, lo in zip(lat[hull].tolist(), lon[hull].tolist())]
+        polygon.append(polygon[0])  # Close loop
+        summary = {
+            'hours': hours,
+            'timestamp': (started + timedelta(hours=hours)).isoformat(),
+            'centroid': {'lat': c_lat, 'lon': c_lon},
+            'radius_km': radius,
+            'area_km2': polygon_area(x[hull], y[hull]),
+            'mass_tons': total,
+            'mass_remaining_pct': 100.0 * total / size_tons,
+            'polygon': polygon
+        }
+        if grid:
+            summary['concentration'] = concentration_grid(lat, lon, mass)
+        return summary
 
     def run_simulation(self, spill_initial_state, env_conditions, duration_hours=24):
         """
-        Run a deterministic physics-based simulation.
+        Run a physics-based simulation (particle ensemble, summarized hourly).
         spill_initial_state: {'lat', 'lon', 'size_tons'}
-        env_conditions: {'wind_speed', 'wind_dir', 'current_speed', 'current_dir'}
+        env_conditions: {'wind_speed', 'wind_dir', 'current_speed', 'current_dir'}, optionally gridded fields
+        Returns one point per hour: {'timestamp', 'lat', 'lon', 'radius_km', 'mass_remaining_pct'}.
         """
-        path = []
-        current_lat = float(spill_initial_state['lat'])
-        current_lon = float(spill_initial_state['lon'])
-        
-        # Coefficients
-        WIND_DRIFT_FACTOR = 0.035
-        CURRENT_DRIFT_FACTOR = 1.0
-        SPREAD_RATE = 0.1 # km/hr^0.5
+        forecast = self.simulate_particles(spill_initial_state, env_conditions, duration_hours,
+                                           horizons=range(int(duration_hours) + 1))
+        return [
+            {
+                'timestamp': h['timestamp'],
+                'lat': h['centroid']['lat'],
+                'lon': h['centroid']['lon'],
+                'radius_km': max(h['radius_km'], INITIAL_RADIUS_KM),
+                'mass_remaining_pct': h['mass_remaining_pct']
+            }
+            for h in forecast['horizons']
+        ]
 
-        w_spd = float(env_conditions.get('wind_speed', 10))
-        w_dir = float(env_conditions.get('wind_dir', 0))
-        c_spd = float(env_conditions.get('current_speed', 1))
-        c_dir = float(env_conditions.get('current_dir', 90))
-
-        # Vectors (m/s approximation)
-        # 1 kt = 0.514 m/s
-        
-        total_drift_x_nm = 0
-        total_drift_y_nm = 0
-        
-        # Calculate drift per hour in Nautical Miles
-        # Wind vector
-        w_drift_nm = w_spd * WIND_DRIFT_FACTOR
-        w_dx = w_drift_nm * math.sin(math.radians(w_dir))
-        w_dy = w_drift_nm * math.cos(math.radians(w_dir))
-        
-        # Current vector
-        c_drift_nm = c_spd * CURRENT_DRIFT_FACTOR
-        c_dx = c_drift_nm * math.sin(math.radians(c_dir))
-        c_dy = c_drift_nm * math.cos(math.radians(c_dir))
-
-        hourly_dx_nm = w_dx + c_dx
-        hourly_dy_nm = w_dy + c_dy
-        
-        # 1 NM approx 0.0166 degrees Lat
-        deg_per_nm = 1/60.0
-        
-        hourly_dlat = hourly_dy_nm * deg_per_nm
-        # Longitude correction (cos lat)
-        hourly_dlon = (hourly_dx_nm * deg_per_nm) / math.cos(math.radians(current_lat))
-
-        for h in range(duration_hours + 1):
-            path.append({
-                'timestamp': (datetime.utcnow() + timedelta(hours=h)).isoformat(),
-                'lat': current_lat,
-                'lon': current_lon,
-                'radius_km': 0.5 + (SPREAD_RATE * (h**0.6)),
-                'mass_remaining_pct': max(0, 100 - (h * 1.5)) # Simple weathering
-            })
-            
-            # Step
-            current_lat += hourly_dlat
-            current_lon += hourly_dlon
-
-        return path
+    def what_if(self, spill_initial_state, env_conditions, duration_hours=24):
+        """Hourly run_simulation track plus final area and economic impact (AI 'What-If' simulation)"""
+        prediction = self.run_simulation(spill_initial_state, env_conditions, duration_hours)
+        final_area = math.pi * prediction[-1]['radius_km'] ** 2
+        return {
+            'prediction': prediction,
+            'final_area_km2': final_area,
+            'economic_impact': economic_impact(final_area)
+        }
 
 spill_forecaster = SpillForecaster()
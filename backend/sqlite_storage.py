@@ -0,0 +1,385 @@
+"""
+SeaTrace SQLite Storage Backend
+Drop-in replacement for the JSON DataManager backed by SQLite (WAL mode) with indexed queries
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from audit_log import AUDIT_LOG_RETENTION, AuditLogStore
+from id_allocator import IDAllocator
+from journal import CollectionJournal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    id INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_id ON users(id);
+CREATE TABLE IF NOT EXISTS credentials (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS company_users (
+    company TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vessels (
+    imo TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS oil_spills (
+    spill_id TEXT PRIMARY KEY,
+    status TEXT,
+    vessel_imo TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_oil_spills_status ON oil_spills(status);
+CREATE INDEX IF NOT EXISTS idx_oil_spills_vessel_imo ON oil_spills(vessel_imo);
+CREATE TABLE IF NOT EXISTS marine_strikes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT,
+    date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_marine_strikes_date ON marine_strikes(date);
+CREATE TABLE IF NOT EXISTS audit_logs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    user_email TEXT,
+    action TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_timestamp ON audit_logs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_user ON audit_logs(user_email, timestamp);
+"""
+
+
+class SQLiteDataManager:
+    def __init__(self, data_dir="data", db_path=None):
+        self.data_dir = Path(data_dir).resolve()  # ID counters are still written at exit, after any chdir
+        self.data_dir.mkdir(exist_ok=True)
+        self.db_path = Path(db_path) if db_path else self.data_dir / "seatrace.db"
+        self.lock = threading.Lock()
+        self.ids = IDAllocator(self.data_dir / "id_counters.json")
+
+        # Mutations per collection, so cached serializations know when they are stale
+        self.revisions = {}
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+        # The simulation mutates vessel dicts in place, so they are kept as a
+        # hot in-memory working set (loaded lazily) and written through on update.
+        self.vessels = None
+        # Same for the retained audit log, so its pages are served from the in-memory index
+        self.audit_log = None
+
+        if not self._get_meta('migrated_at'):
+            self.migrate_from_json(self.data_dir)
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _load_json_collection(self, file_path, default):
+        """Load a JSON snapshot plus any journal records not yet compacted into it"""
+        if not file_path.exists():
+            return default
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading {file_path}: {e}")
+            return default
+        CollectionJournal(file_path, None, None).replay(data)
+        return data
+
+    def migrate_from_json(self, data_dir):
+        """One-shot import of the existing data/*.json files"""
+        data_dir = Path(data_dir)
+        users = self._load_json_collection(data_dir / "users.json", {})
+        credentials = self._load_json_collection(data_dir / "credentials.json", {})
+        company_users = self._load_json_collection(data_dir / "company_users.json", {})
+        vessels = self._load_json_collection(data_dir / "vessels.json", {})
+        oil_spills = self._load_json_collection(data_dir / "oil_spills.json", {})
+        marine_strikes = self._load_json_collection(data_dir / "marine_strikes.json", [])
+        audit_logs = self._load_json_collection(data_dir / "audit_logs.json", [])
+
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO users (email, id, data) VALUES (?, ?, ?)",
+                [(email, int(u.get('id', 0) or 0), json.dumps(u)) for email, u in users.items()]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO credentials (key, data) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in credentials.items()]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO company_users (company, data) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in company_users.items()]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO vessels (imo, data) VALUES (?, ?)",
+                [(imo, json.dumps(v)) for imo, v in vessels.items()]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO oil_spills (spill_id, status, vessel_imo, data) VALUES (?, ?, ?, ?)",
+                [(sid, s.get('status'), s.get('vessel_imo'), json.dumps(s)) for sid, s in oil_spills.items()]
+            )
+            self.conn.executemany(
+                "INSERT INTO marine_strikes (id, date, data) VALUES (?, ?, ?)",
+                [(s.get('id'), s.get('date'), json.dumps(s)) for s in marine_strikes]
+            )
+            self.conn.executemany(
+                "INSERT INTO audit_logs (timestamp, user_email, action, data) VALUES (?, ?, ?, ?)",
+                [(log.get('timestamp'), log.get('user_email'), log.get('action'), json.dumps(log)) for log in audit_logs]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_at', ?)",
+                (datetime.now().isoformat(),)
+            )
+
+        print(f"Migrated JSON data from {data_dir} into {self.db_path} "
+              f"({len(users)} users, {len(vessels)} vessels, {len(oil_spills)} spills, "
+              f"{len(marine_strikes)} strikes, {len(audit_logs)} audit logs)")
+
+    def _touch(self, name):
+        """Count a mutation of a collection (caller holds self.lock)"""
+        self.revisions[name] = self.revisions.get(name, 0) + 1
+
+    def revision(self, name):
+        """Mutation count of a collection since startup"""
+        return self.revisions.get(name, 0)
+
+    def save_all_data(self):
+        """Checkpoint the SQLite WAL into the main database file"""
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # User operations
+    def get_users(self):
+        """Get all users"""
+        with self.lock:
+            rows = self.conn.execute("SELECT email, data FROM users").fetchall()
+        return {email: json.loads(data) for email, data in rows}
+
+    def get_user(self, email):
+        """Get user by email"""
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM users WHERE email = ?", (email,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add_user(self, email, user_data):
+        """Add new user"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO users (email, id, data) VALUES (?, ?, ?)",
+                (email, int(user_data.get('id', 0) or 0), json.dumps(user_data))
+            )
+            self._touch('users')
+
+    def update_user(self, email, updates):
+        """Update existing user"""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT data FROM users WHERE email = ?", (email,)).fetchone()
+            if not row:
+                return None
+            user = json.loads(row[0])
+            user.update(updates)
+            self.conn.execute(
+                "UPDATE users SET id = ?, data = ? WHERE email = ?",
+                (int(user.get('id', 0) or 0), json.dumps(user), email)
+            )
+            self._touch('users')
+            return user
+
+    def delete_user(self, email):
+        """Delete user"""
+        with self.lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM users WHERE email = ?", (email,))
+            self._touch('users')
+            return cursor.rowcount > 0
+
+    def get_next_user_id(self):
+        """Allocate the next user ID (MAX(id) is only queried to seed the counter once)"""
+        def max_user_id():
+            with self.lock:
+                return self.conn.execute("SELECT MAX(id) FROM users").fetchone()[0] or 0
+        return self.ids.next('user', seed=max_user_id)
+
+    # Vessel operations
+    def get_vessels(self):
+        """Get all vessels (in-memory working set shared with the simulation)"""
+        with self.lock:
+            if self.vessels is None:
+                rows = self.conn.execute("SELECT imo, data FROM vessels").fetchall()
+                self.vessels = {imo: json.loads(data) for imo, data in rows}
+            return self.vessels
+
+    def get_vessel(self, imo):
+        """Get vessel by IMO"""
+        if self.vessels is not None:
+            with self.lock:
+                return self.vessels.get(imo)
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM vessels WHERE imo = ?", (imo,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update_vessel(self, imo, updates):
+        """Update existing vessel"""
+        vessels = self.get_vessels()
+        with self.lock, self.conn:
+            if imo not in vessels:
+                return None
+            vessels[imo].update(updates)
+            self.conn.execute("UPDATE vessels SET data = ? WHERE imo = ?", (json.dumps(vessels[imo]), imo))
+            self._touch('vessels')
+            return vessels[imo]
+
+    def apply_vessel_changes(self, upserts, deletes=()):
+        """Apply a batch of vessel upserts ({imo: vessel or changed fields}) and deletes in one transaction"""
+        vessels = self.get_vessels()
+        added, updated = [], []
+        with self.lock, self.conn:
+            for imo, fields in upserts.items():
+                if imo in vessels:
+                    vessels[imo].update(fields)
+                    updated.append(imo)
+                else:
+                    vessels[imo] = fields
+                    added.append(imo)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO vessels (imo, data) VALUES (?, ?)",
+                [(imo, json.dumps(vessels[imo])) for imo in upserts]
+            )
+            deleted = [imo for imo in deletes if vessels.pop(imo, None) is not None]
+            self.conn.executemany("DELETE FROM vessels WHERE imo = ?", [(imo,) for imo in deleted])
+            self._touch('vessels')
+        return {'added': added, 'updated': updated, 'deleted': deleted}
+
+    def replace_vessels(self, vessels):
+        """Replace the whole vessel collection (full AIS sync / seeding) in one transaction"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM vessels")
+            self.conn.executemany(
+                "INSERT INTO vessels (imo, data) VALUES (?, ?)",
+                [(imo, json.dumps(v)) for imo, v in vessels.items()]
+            )
+            self.vessels = vessels
+            self._touch('vessels')
+
+    # Oil spill operations
+    def get_oil_spills(self, status=None):
+        """Get all oil spills, optionally only those with a given status"""
+        with self.lock:
+            if status is None:
+                rows = self.conn.execute("SELECT spill_id, data FROM oil_spills").fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT spill_id, data FROM oil_spills WHERE status = ?", (status,)
+                ).fetchall()
+        return {spill_id: json.loads(data) for spill_id, data in rows}
+
+    def get_oil_spill(self, spill_id):
+        """Get oil spill by ID"""
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM oil_spills WHERE spill_id = ?", (spill_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add_oil_spill(self, spill_data):
+        """Add new oil spill"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO oil_spills (spill_id, status, vessel_imo, data) VALUES (?, ?, ?, ?)",
+                (spill_data['spill_id'], spill_data.get('status'), spill_data.get('vessel_imo'), json.dumps(spill_data))
+            )
+            self._touch('oil_spills')
+
+    # Audit log operations
+    def add_audit_log(self, log_entry):
+        """Add audit log entry"""
+        if 'timestamp' not in log_entry:
+            log_entry['timestamp'] = datetime.now().isoformat()
+
+        audit_log = self._audit_log()
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO audit_logs (timestamp, user_email, action, data) VALUES (?, ?, ?, ?)",
+                (log_entry['timestamp'], log_entry.get('user_email'), log_entry.get('action'), json.dumps(log_entry))
+            )
+            # Keep only the last AUDIT_LOG_RETENTION entries (amortized: trim every 100 inserts)
+            if cursor.lastrowid % 100 == 0:
+                self.conn.execute("DELETE FROM audit_logs WHERE seq <= ?", (cursor.lastrowid - AUDIT_LOG_RETENTION,))
+            audit_log.append(log_entry)
+
+    def _audit_log(self):
+        """In-memory index of the retained audit entries, loaded on first use"""
+        with self.lock:
+            if self.audit_log is None:
+                rows = self.conn.execute(
+                    "SELECT data FROM (SELECT seq, data FROM audit_logs ORDER BY seq DESC LIMIT ?) ORDER BY seq",
+                    (AUDIT_LOG_RETENTION,)
+                ).fetchall()
+                self.audit_log = AuditLogStore(json.loads(row[0]) for row in rows)
+            return self.audit_log
+
+    def get_audit_logs(self):
+        return self._audit_log().entries_list()
+
+    def query_audit_logs(self, user_email=None, since=None, until=None, offset=0, limit=100):
+        """(total, page) of audit entries, newest first (see AuditLogStore.query)"""
+        return self._audit_log().query(user_email=user_email, since=since, until=until, offset=offset, limit=limit)
+
+    def get_marine_strikes(self):
+        """Get list of marine strikes"""
+        with self.lock:
+            rows = self.conn.execute("SELECT data FROM marine_strikes ORDER BY seq").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def replace_marine_strikes(self, strikes):
+        """Replace the marine strike list (Kaggle sync) in one transaction"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM marine_strikes")
+            self.conn.executemany(
+                "INSERT INTO marine_strikes (id, date, data) VALUES (?, ?, ?)",
+                [(s.get('id'), s.get('date'), json.dumps(s)) for s in strikes]
+            )
+            self._touch('marine_strikes')
+
+    def get_user_audit_logs(self, email, limit=50):
+        """Get audit logs for specific user (oldest first)"""
+        return self._audit_log().query(user_email=email, limit=limit)[1][::-1]
+
+    # Company operations
+    def get_company_users(self, company):
+        """Get users for a company"""
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM company_users WHERE company = ?", (company,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def get_companies(self):
+        """Get all companies"""
+        with self.lock:
+            rows = self.conn.execute("SELECT company FROM company_users").fetchall()
+        return [row[0] for row in rows]
+
+
+if __name__ == "__main__":
+    # Usage: python sqlite_storage.py [data_dir] [db_path]
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else "data"
+    db_path = sys.argv[2] if len(sys.argv) > 2 else None
+    manager = SQLiteDataManager(data_dir=data_dir, db_path=db_path)
+    print(f"SQLite storage ready at {manager.db_path}")
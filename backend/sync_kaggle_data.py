@@ -5,16 +5,27 @@ Run this script to download and process AIS data from Kaggle
 
 import os
 import sys
+import argparse
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from kaggle_ais_processor import KaggleAISProcessor
+from kaggle_ais_processor import KaggleAISProcessor, AIS_INGEST_WORKERS
 from kaggle_config import KAGGLE_DATASETS, REGION_FILTER
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download and process AIS data from Kaggle")
+    parser.add_argument('--workers', type=int, default=AIS_INGEST_WORKERS,
+                        help=f"Worker processes for CSV ingest (default: {AIS_INGEST_WORKERS}, this machine has {os.cpu_count()} cores)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Re-read only changed files and apply per-vessel upserts/deletes to the data store instead of "
+                             "replacing all vessels (server stopped; a running server syncs via POST /api/admin/ais/sync)")
+    return parser.parse_args()
+
 def main():
     """Main function to sync Kaggle data"""
+    args = parse_args()
     print("=" * 60)
     print("SeaTrace - Kaggle AIS Data Sync")
     print("=" * 60)
@@ -46,9 +57,19 @@ def main():
         print("Please update KAGGLE_DATASETS with a valid Kaggle dataset name")
         return
     
+    # Written through the configured storage backend (STORAGE_BACKEND), not to the JSON snapshots directly
+    from data_manager import create_data_manager
+    store = create_data_manager(data_dir)
+
     # Process and save AIS
     print(f"\n📦 Dataset (AIS): {dataset_name}")
-    processor.process_and_save(dataset_name=dataset_name, output_file="vessels.json", region_filter=REGION_FILTER)
+    if args.incremental:
+        summary = processor.incremental_sync(dataset_name, store, region_filter=REGION_FILTER, workers=max(1, args.workers))
+        if summary is None:
+            print("\n❌ Incremental sync failed (no AIS data)")
+    else:
+        processor.process_and_save(dataset_name=dataset_name, output_file="vessels.json", region_filter=REGION_FILTER,
+                                   workers=max(1, args.workers), store=store)
 
     # Process and save Marine Strikes
     from marine_strike_processor import MarineStrikeProcessor
@@ -57,8 +78,9 @@ def main():
     
     if strike_dataset:
         print(f"\n📦 Dataset (Strikes): {strike_dataset}")
-        strike_processor.process_and_save(dataset_name=strike_dataset, output_file="marine_strikes.json")
+        strike_processor.process_and_save(dataset_name=strike_dataset, output_file="marine_strikes.json", store=store)
     
+    store.save_all_data()
     print("\n✅ Sync complete! Data updated in data/ directory.")
 
 if __name__ == "__main__":
@@ -0,0 +1,19 @@
+"""
+Shared test setup: backend modules on sys.path, imported from an empty working directory
+(data_manager and app open ./data when imported, which must not be backend/data).
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope='session', autouse=True)
+def empty_working_directory(tmp_path_factory):
+    # Not restored afterwards: stores keep flushing their relative data paths until exit
+    os.chdir(tmp_path_factory.mktemp('cwd'))
@@ -0,0 +1,102 @@
+"""
+ID allocator tests
+Two allocators on one counter file (two processes), giving unused blocks back, crashes,
+and user IDs allocated without holding the data manager's lock during counter file I/O.
+
+Usage: python -m pytest tests/test_id_allocator.py (from backend/)
+"""
+
+import atexit
+import threading
+
+import pytest
+
+from id_allocator import IDAllocator, fcntl
+
+
+def open_allocator(path, block_size=10):
+    allocator = IDAllocator(path, block_size=block_size)
+    atexit.unregister(allocator.release)  # Released explicitly (or never, for a crash)
+    return allocator
+
+
+def test_two_allocators_on_one_file_never_hand_out_the_same_id(tmp_path):
+    path = tmp_path / 'id_counters.json'
+    first, second = open_allocator(path), open_allocator(path)
+    handed_out = {first: [], second: []}
+    for i in range(95):
+        allocator = first if i % 3 else second
+        handed_out[allocator].append(allocator.next('user'))
+
+    ids = handed_out[first] + handed_out[second]
+    assert len(set(ids)) == len(ids)
+    for allocator_ids in handed_out.values():
+        assert allocator_ids == sorted(allocator_ids)
+    # Whoever opens the file next starts above everything reserved so far
+    assert open_allocator(path).next('user') > max(ids)
+
+
+def test_seed_is_only_consulted_for_a_new_sequence(tmp_path):
+    path = tmp_path / 'id_counters.json'
+    calls = []
+
+    def seed():
+        calls.append(1)
+        return 41
+
+    allocator = open_allocator(path)
+    assert [allocator.next('spill', seed=seed) for _ in range(25)] == list(range(42, 67))
+    assert open_allocator(path).next('spill', seed=seed) > 66
+    assert len(calls) == 1
+
+
+def test_release_gives_the_unused_block_back(tmp_path):
+    path = tmp_path / 'id_counters.json'
+    allocator = open_allocator(path, block_size=100)
+    assert [allocator.next('alert') for _ in range(3)] == [1, 2, 3]
+    allocator.release()
+    assert open_allocator(path).next('alert') == 4
+
+
+def test_release_keeps_the_block_when_another_allocator_reserved_after_it(tmp_path):
+    path = tmp_path / 'id_counters.json'
+    first, second = open_allocator(path, block_size=100), open_allocator(path, block_size=100)
+    first.next('alert')
+    taken = second.next('alert')
+    first.release()
+    assert open_allocator(path).next('alert') > taken
+
+
+def test_no_id_is_reused_after_a_crash(tmp_path):
+    path = tmp_path / 'id_counters.json'
+    crashed = open_allocator(path)
+    used = [crashed.next('user') for _ in range(15)]
+    # No release: the rest of the block is skipped, never handed out again
+    restarted = open_allocator(path)
+    assert restarted.next('user') > max(used)
+
+
+@pytest.mark.skipif(fcntl is None, reason='No cross-process file lock on this platform')
+def test_user_ids_do_not_hold_the_data_lock_while_waiting_for_the_counter_file(tmp_path):
+    from data_manager import DataManager
+    store = DataManager(data_dir=tmp_path)
+    atexit.unregister(store.ids.release)
+    store.add_user('a@seatrace.com', {'email': 'a@seatrace.com', 'id': 7})
+
+    # Another process holds the counter file lock
+    with open(store.ids.lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        result = []
+        allocating = threading.Thread(target=lambda: result.append(store.get_next_user_id()))
+        allocating.start()
+        allocating.join(0.2)
+        assert allocating.is_alive()  # Waiting on the file lock
+        # ... while reads and writes of the store go on
+        assert store.lock.acquire(timeout=1.0)
+        store.lock.release()
+        store.apply_vessel_changes({'1': {'imo': '1'}})
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    allocating.join(5.0)
+    assert result == [8]
+    store.journal_writer.stop()
@@ -0,0 +1,148 @@
+"""
+Journal durability tests
+Records written through DataManager come back after a restart (a new DataManager on the same
+directory): torn final lines, snapshots replaced underneath a journal, compaction and group commit.
+
+Usage: python -m pytest tests/test_journal.py (from backend/)
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from journal import CollectionJournal, JournalWriter
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    """DataManager factory on one tmp data directory; stores are stopped (pending records flushed) at teardown"""
+    from data_manager import DataManager
+    stores = []
+
+    def open_store():
+        store = DataManager(data_dir=tmp_path)
+        stores.append(store)
+        return store
+
+    yield open_store
+    for store in stores:
+        store.journal_writer.stop()
+
+
+def restart(store, open_store):
+    """Flush what the writer thread would have written and load the directory again"""
+    store.journal_writer.stop()
+    return open_store()
+
+
+def vessel(imo, name):
+    return {'imo': imo, 'name': name}
+
+
+def test_journal_is_replayed_on_restart(open_store):
+    store = open_store()
+    store.apply_vessel_changes({'1': vessel('1', 'First'), '2': vessel('2', 'Second')})
+    store.update_vessel('1', {'name': 'Renamed'})
+    store.apply_vessel_changes({}, deletes=['2'])
+
+    store = restart(store, open_store)
+    assert store.get_vessels() == {'1': vessel('1', 'Renamed')}
+
+
+def test_torn_final_line_is_skipped(open_store, tmp_path):
+    store = open_store()
+    store.apply_vessel_changes({'1': vessel('1', 'First'), '2': vessel('2', 'Second')})
+    store.journal_writer.stop()
+    # Crash in the middle of the next record
+    with open(tmp_path / 'vessels.journal.jsonl', 'a', encoding='utf-8') as f:
+        f.write('{"op": "set", "value": {"imo": "3", "na')
+
+    store = open_store()
+    assert store.get_vessels() == {'1': vessel('1', 'First'), '2': vessel('2', 'Second')}
+
+
+def test_journal_against_a_replaced_snapshot_is_discarded(open_store, tmp_path):
+    store = open_store()
+    store.apply_vessel_changes({'1': vessel('1', 'Original')})
+    store.save_all_data()
+    store.update_vessel('1', {'name': 'EDITED'})
+    store.apply_vessel_changes({'2': vessel('2', 'GONE')})
+    store.journal_writer.stop()
+    # An offline writer replaces the snapshot the journal was written against
+    with open(tmp_path / 'vessels.json', 'w', encoding='utf-8') as f:
+        json.dump({'1': vessel('1', 'FRESH')}, f)
+
+    store = open_store()
+    assert store.get_vessels() == {'1': vessel('1', 'FRESH')}
+    # The discarded journal restarts against the new snapshot
+    store.update_vessel('1', {'name': 'After'})
+    store = restart(store, open_store)
+    assert store.get_vessels() == {'1': vessel('1', 'After')}
+
+
+def test_replace_collection_drops_earlier_records(open_store):
+    store = open_store()
+    store.apply_vessel_changes({'1': vessel('1', 'Old'), '2': vessel('2', 'Old')})
+    store.journal_writer.flush_all()
+    store.replace_vessels({'3': vessel('3', 'Synced')})
+    store.apply_vessel_changes({'4': vessel('4', 'Added after sync')})
+
+    store = restart(store, open_store)
+    assert store.get_vessels() == {'3': vessel('3', 'Synced'), '4': vessel('4', 'Added after sync')}
+
+
+def test_compaction_does_not_replay_records_twice(open_store):
+    store = open_store()
+    for i in range(3):
+        store.add_audit_log({'user_email': 'a@seatrace.com', 'action': f'flushed-{i}'})
+    store.journal_writer.flush_all()
+    # Still pending when the snapshot is written: part of the snapshot, never of the journal
+    store.add_audit_log({'user_email': 'a@seatrace.com', 'action': 'pending'})
+    store.save_all_data()
+    store.add_audit_log({'user_email': 'a@seatrace.com', 'action': 'after'})
+
+    store = restart(store, open_store)
+    assert [log['action'] for log in store.get_audit_logs()] == ['flushed-0', 'flushed-1', 'flushed-2', 'pending', 'after']
+
+
+def test_crash_between_snapshot_rename_and_journal_rewrite(open_store, tmp_path):
+    store = open_store()
+    store.add_audit_log({'user_email': 'a@seatrace.com', 'action': 'one'})
+    store.journal_writer.flush_all()
+    journal_path = tmp_path / 'audit_logs.journal.jsonl'
+    stale_journal = journal_path.read_text(encoding='utf-8')
+    store.save_all_data()
+    store.journal_writer.stop()
+    # The new snapshot is in place but the old journal was not rewritten yet
+    journal_path.write_text(stale_journal, encoding='utf-8')
+
+    store = open_store()
+    assert [log['action'] for log in store.get_audit_logs()] == ['one']
+
+
+def test_group_commit_flushes_once_a_batch_is_full(tmp_path):
+    data = {}
+    lock = threading.Lock()
+    journal = CollectionJournal(tmp_path / 'vessels.json', lambda: data, lock)
+    journal.replay(data)
+    writer = JournalWriter(flush_interval_ms=60_000, flush_max_records=3)
+    writer.register('vessels', journal)
+    writer.start()
+    try:
+        time.sleep(0.05)  # Writer is now waiting out its (long) interval
+        for i in range(2):
+            writer.notify(journal.append('set', str(i), {'imo': str(i)}))
+        time.sleep(0.2)
+        assert not journal.path.exists()
+
+        writer.notify(journal.append('set', '2', {'imo': '2'}))
+        deadline = time.monotonic() + 2.0
+        while not journal.path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        lines = [json.loads(line) for line in journal.path.read_text(encoding='utf-8').splitlines()]
+        assert [line['op'] for line in lines] == ['header', 'set', 'set', 'set']
+    finally:
+        writer._stopped = True
+        writer._wakeup.set()
@@ -0,0 +1,38 @@
+"""
+Oil spill spatial index regression test
+The first spill after startup builds the spill index and must not be indexed twice.
+
+Usage: python -m pytest tests/test_oil_spill_near.py (from backend/)
+"""
+
+import jwt
+import pytest
+
+
+@pytest.fixture(scope='module')
+def app_module():
+    # Imported from the empty working directory set up in conftest.py (the data manager opens ./data)
+    import app as app_module
+    return app_module
+
+
+def auth_header(app_module, email):
+    token = jwt.encode({'email': email}, app_module.app.config['SECRET_KEY'], algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_first_spill_is_listed_once_near_its_position(app_module):
+    data_manager = app_module.data_manager
+    data_manager.add_user('operator@test.seatrace.com', {'email': 'operator@test.seatrace.com', 'role': 'operator'})
+    data_manager.apply_vessel_changes({'9100001': {'imo': '9100001', 'name': 'Test Tanker', 'lat': 12.0, 'lon': 72.0}})
+    assert app_module.spill_grid.keys is None  # Index not built yet
+    client = app_module.app.test_client()
+    headers = auth_header(app_module, 'operator@test.seatrace.com')
+
+    response = client.post('/api/simulate-oil-spill', json={'imo': '9100001', 'lat': 12.0, 'lon': 72.0}, headers=headers)
+    assert response.status_code == 200
+    spill_id = response.get_json()['spill_id']
+
+    response = client.get('/api/oil-spills/near?lat=12.0&lon=72.0&radius_km=5', headers=headers)
+    assert response.status_code == 200
+    assert [s['spill_id'] for s in response.get_json()['oil_spills']] == [spill_id]
@@ -0,0 +1,175 @@
+"""
+Binary vessel stream round-trip tests
+Frames from VesselStreamHub are decoded with the documented layout (the same steps as
+seatrace-frontend/src/components/services/vesselStream.js) and the client's positions are
+checked against the server's quantized fleet and per-connection baseline after every tick.
+
+Usage: python -m pytest tests/test_vessel_stream.py (from backend/)
+"""
+
+import random
+
+import numpy as np
+
+from fleet_state import FleetState
+from vessel_stream import FLAG_KEYFRAME, FRAME_MAGIC, FRAME_VERSION, HEADER, VesselStreamHub
+
+SID = 'client'
+
+
+class Decoder:
+    """Python port of createVesselStreamDecoder"""
+
+    def __init__(self):
+        self.epoch = None
+        self.lat = np.zeros(0, dtype=np.int64)
+        self.lon = np.zeros(0, dtype=np.int64)
+        self.course = {}
+        self.speed = {}
+
+    def apply_index(self, epoch, imos):
+        self.epoch = epoch
+        self.lat = np.zeros(len(imos), dtype=np.int64)
+        self.lon = np.zeros(len(imos), dtype=np.int64)
+
+    def decode(self, frame):
+        magic, version, flags, _tick, epoch, count = HEADER.unpack_from(frame)
+        assert (magic, version) == (FRAME_MAGIC, FRAME_VERSION)
+        assert len(frame) == HEADER.size + count * (4 + 4 + 4 + 2 + 2)
+        if epoch != self.epoch:
+            return []
+        offset = HEADER.size
+        rows = np.frombuffer(frame, '<u4', count, offset).astype(np.int64)
+        offset += count * 4
+        lat = np.frombuffer(frame, '<i4', count, offset).astype(np.int64)
+        offset += count * 4
+        lon = np.frombuffer(frame, '<i4', count, offset).astype(np.int64)
+        offset += count * 4
+        course = np.frombuffer(frame, '<u2', count, offset)
+        offset += count * 2
+        speed = np.frombuffer(frame, '<u2', count, offset)
+        if flags & FLAG_KEYFRAME:
+            self.lat[rows] = lat
+            self.lon[rows] = lon
+        else:
+            self.lat[rows] += lat
+            self.lon[rows] += lon
+        self.course.update(zip(rows.tolist(), course.tolist()))
+        self.speed.update(zip(rows.tolist(), speed.tolist()))
+        return rows.tolist()
+
+
+def make_fleet(n, seed):
+    rng = random.Random(seed)
+    fleet = FleetState(seed=seed)
+    fleet.load({str(9000000 + i): {
+        'imo': str(9000000 + i), 'lat': rng.uniform(-60, 60), 'lon': rng.uniform(-179, 179),
+        'speed': rng.uniform(0, 25), 'course': rng.uniform(0, 360)
+    } for i in range(n)})
+    return fleet
+
+
+def tick(hub, fleet, decoder, tick_count, rows=None, step=True):
+    """One broadcast tick as app.py runs it: step, quantize, send the index if needed, decode every frame"""
+    if step:
+        fleet.step()
+    hub.update(fleet, tick_count)
+    frames, needs_index = hub.frames_for(SID, None if rows is None else np.asarray(rows, dtype=np.uint32))
+    if needs_index:
+        decoder.apply_index(fleet.epoch, fleet.imos)
+    sent = []
+    for frame in frames:
+        sent += decoder.decode(frame)
+    return frames, sent
+
+
+def assert_in_sync(hub, decoder, rows):
+    """The client's positions for `rows` equal the server's baseline for this connection"""
+    client = hub.clients[SID]
+    rows = np.asarray(rows, dtype=np.int64)
+    assert client.known[rows].all()
+    np.testing.assert_array_equal(decoder.lat[rows], client.lat[rows])
+    np.testing.assert_array_equal(decoder.lon[rows], client.lon[rows])
+
+
+def test_round_trip_matches_the_quantized_fleet_every_tick():
+    fleet = make_fleet(200, seed=3)
+    hub = VesselStreamHub(keyframe_interval=1000, move_threshold=0)  # Every row re-sent each tick
+    hub.subscribe(SID)
+    decoder = Decoder()
+    visible = np.arange(0, 100)
+
+    def check(rows):
+        np.testing.assert_array_equal(decoder.lat[rows], hub.q_lat[rows])
+        np.testing.assert_array_equal(decoder.lon[rows], hub.q_lon[rows])
+        assert [decoder.course[r] for r in rows] == hub.q_course[rows].tolist()
+        assert [decoder.speed[r] for r in rows] == hub.q_speed[rows].tolist()
+
+    # Keyframe with the index
+    frames, sent = tick(hub, fleet, decoder, 1, visible, step=False)
+    assert len(frames) == 1 and HEADER.unpack_from(frames[0])[2] & FLAG_KEYFRAME
+    assert sent == visible.tolist()
+    check(visible)
+
+    # Deltas
+    for t in range(2, 6):
+        frames, _ = tick(hub, fleet, decoder, t, visible)
+        assert not HEADER.unpack_from(frames[0])[2] & FLAG_KEYFRAME
+        check(visible)
+
+    # Rows entering the viewport arrive absolute (keyframe flag), the rest stays a delta
+    visible = np.arange(0, 150)
+    frames, sent = tick(hub, fleet, decoder, 6, visible)
+    flags = [HEADER.unpack_from(frame)[2] for frame in frames]
+    assert flags == [FLAG_KEYFRAME, 0]
+    assert sorted(sent) == visible.tolist()
+    check(visible)
+
+    # A row leaves the viewport for a few ticks and comes back against its old baseline
+    without = np.setdiff1d(visible, [10, 120])
+    for t in range(7, 10):
+        tick(hub, fleet, decoder, t, without)
+        check(without)
+    frames, _ = tick(hub, fleet, decoder, 10, visible)
+    assert [HEADER.unpack_from(frame)[2] for frame in frames] == [0]
+    check(visible)
+
+    # New fleet layout: index re-sent, keyframe, decoding continues on the new rows
+    fleet.load({imo: v for imo, v in list(zip(fleet.imos, fleet.vessels))[:180]})
+    visible = np.arange(0, 180)
+    frames, sent = tick(hub, fleet, decoder, 11, visible, step=False)
+    assert decoder.epoch == fleet.epoch and len(decoder.lat) == 180
+    assert HEADER.unpack_from(frames[0])[2] & FLAG_KEYFRAME
+    check(visible)
+    tick(hub, fleet, decoder, 12, visible)
+    check(visible)
+
+
+def test_client_baseline_never_diverges_with_thresholds():
+    fleet = make_fleet(300, seed=7)
+    hub = VesselStreamHub(keyframe_interval=8)
+    hub.subscribe(SID)
+    decoder = Decoder()
+    rng = np.random.default_rng(7)
+
+    for t in range(1, 60):
+        # Viewport wanders: rows enter, leave and come back
+        visible = np.flatnonzero(rng.random(len(fleet)) < 0.6)
+        tick(hub, fleet, decoder, t, visible)
+        assert_in_sync(hub, decoder, visible)
+        # Unsent moves stay below the threshold
+        drift = np.abs(hub.q_lat[visible] - decoder.lat[visible]) + np.abs(hub.q_lon[visible] - decoder.lon[visible])
+        assert (drift < hub.move_threshold).all()
+
+
+def test_frames_from_another_epoch_are_ignored_until_the_index_arrives():
+    fleet = make_fleet(20, seed=1)
+    hub = VesselStreamHub()
+    hub.subscribe(SID)
+    hub.update(fleet, 1)
+    frames, needs_index = hub.frames_for(SID)
+    assert needs_index
+    decoder = Decoder()
+    assert decoder.decode(frames[0]) == []
+    decoder.apply_index(fleet.epoch, fleet.imos)
+    assert decoder.decode(frames[0]) == list(range(20))
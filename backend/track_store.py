@@ -0,0 +1,247 @@
+"""
+Vessel Track Store for SeaTrace
+Ring buffers of breadcrumbs (float32 lat/lon + int64 epoch-ms, 16 bytes each) in one preallocated arena.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+TRACK_RETENTION_POINTS = int(os.environ.get('TRACK_RETENTION_POINTS', 240))  # Breadcrumbs kept per vessel
+TRACK_SAMPLE_TICKS = int(os.environ.get('TRACK_SAMPLE_TICKS', 10))          # Simulation ticks between breadcrumbs
+TRACK_BROADCAST_POINTS = int(os.environ.get('TRACK_BROADCAST_POINTS', 30))  # Tail sent with list/broadcast payloads
+
+POLYLINE_PRECISION = 5
+MAX_POLYLINE_CHUNKS = 7   # 5-bit chunks needed for any zigzagged delta of a 1e5-scaled coordinate
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def _to_ms(timestamp):
+    """ISO string (naive means UTC, as the simulator stamps) / epoch seconds / epoch ms -> epoch ms (None if unparseable)"""
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, (int, float)):
+        return int(timestamp if timestamp > 1e11 else timestamp * 1000)
+    try:
+        moment = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def encode_polylines(lat, lon, lengths, precision=POLYLINE_PRECISION):
+    """
+    Google encoded polyline for many tracks at once.
+    lat/lon: concatenated points of every track, lengths: points per track.
+    All bit twiddling is vectorized; Python only slices the final byte string per track.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    scale = 10 ** precision
+    q_lat = np.rint(np.asarray(lat, dtype=np.float64) * scale).astype(np.int64)
+    q_lon = np.rint(np.asarray(lon, dtype=np.float64) * scale).astype(np.int64)
+
+    # Deltas restart at the first point of every track
+    starts = np.cumsum(lengths) - lengths
+    d_lat = np.diff(q_lat, prepend=0)
+    d_lon = np.diff(q_lon, prepend=0)
+    nonempty = starts[lengths > 0]
+    d_lat[nonempty] = q_lat[nonempty]
+    d_lon[nonempty] = q_lon[nonempty]
+
+    # Interleave lat/lon, zigzag, then split into 5-bit chunks with continuation bits
+    values = np.empty(2 * len(q_lat), dtype=np.int64)
+    values[0::2] = d_lat
+    values[1::2] = d_lon
+    values = np.where(values < 0, ~(values << 1), values << 1)
+
+    shifts = np.arange(MAX_POLYLINE_CHUNKS, dtype=np.int64) * 5
+    shifted = values[:, None] >> shifts
+    n_chunks = np.maximum(1, np.count_nonzero(shifted, axis=1))
+    k = np.arange(MAX_POLYLINE_CHUNKS)
+    chunks = (shifted & 0x1F) | np.where(k[None, :] < n_chunks[:, None] - 1, 0x20, 0)
+    encoded = (chunks + 63)[k[None, :] < n_chunks[:, None]].astype(np.uint8).tobytes().decode('ascii')
+
+    # Slice the joined string back into tracks
+    track_of_point = np.repeat(np.arange(len(lengths)), lengths)
+    point_bytes = n_chunks.reshape(-1, 2).sum(axis=1)
+    track_bytes = np.bincount(track_of_point, weights=point_bytes, minlength=len(lengths)).astype(np.int64)
+    ends = np.cumsum(track_bytes)
+    return [encoded[e - n:e] for e, n in zip(ends.tolist(), track_bytes.tolist())]
+
+
+def encode_polyline(lat, lon, precision=POLYLINE_PRECISION):
+    return encode_polylines(lat, lon, [len(lat)], precision)[0]
+
+
+class TrackStore:
+    def __init__(self, capacity=TRACK_RETENTION_POINTS, initial_vessels=1024):
+        self.capacity = int(capacity)
+        self.lock = threading.Lock()
+
+        # IMO -> arena row
+        self.slots = {}
+        self.imos = []
+
+        self.lat = np.zeros((initial_vessels, self.capacity), dtype=np.float32)
+        self.lon = np.zeros((initial_vessels, self.capacity), dtype=np.float32)
+        self.ts = np.zeros((initial_vessels, self.capacity), dtype=np.int64)
+        self.head = np.zeros(initial_vessels, dtype=np.int64)    # Next write position
+        self.count = np.zeros(initial_vessels, dtype=np.int64)   # Valid points (<= capacity)
+
+        # Fleet row -> arena row, cached per fleet epoch
+        self._fleet_epoch = None
+        self._fleet_slots = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.imos)
+
+    def _grow(self, rows):
+        extra = rows - len(self.head)
+        pad = ((0, extra), (0, 0))
+        self.lat = np.pad(self.lat, pad)
+        self.lon = np.pad(self.lon, pad)
+        self.ts = np.pad(self.ts, pad)
+        self.head = np.pad(self.head, (0, extra))
+        self.count = np.pad(self.count, (0, extra))
+
+    def _slot(self, imo):
+        slot = self.slots.get(imo)
+        if slot is None:
+            slot = self.slots[imo] = len(self.imos)
+            self.imos.append(imo)
+            if slot >= len(self.head):
+                self._grow(max(2 * len(self.head), slot + 1))
+        return slot
+
+    def _append(self, slots, lat, lon, ts):
+        head = self.head[slots]
+        self.lat[slots, head] = lat
+        self.lon[slots, head] = lon
+        self.ts[slots, head] = ts
+        self.head[slots] = (head + 1) % self.capacity
+        self.count[slots] = np.minimum(self.count[slots] + 1, self.capacity)
+
+    def import_points(self, imo, points, interval_ms=None):
+        """Seed a vessel's track from legacy [{'lat','lon','timestamp'?}] breadcrumbs (oldest first)"""
+        if not points:
+            return
+        interval_ms = interval_ms or TRACK_SAMPLE_TICKS * 3000
+        base = now_ms() - interval_ms * len(points)
+        with self.lock:
+            slot = self._slot(imo)
+            for i, p in enumerate(points[-self.capacity:]):
+                ts = _to_ms(p.get('timestamp')) or base + i * interval_ms
+                self._append(np.array([slot]), float(p.get('lat', 0)), float(p.get('lon', 0)), ts)
+
+    def attach_fleet(self, fleet):
+        """
+        Map fleet rows to arena rows. Legacy per-vessel 'history' lists are moved into the
+        store (and dropped from the vessel dicts) the first time a vessel is seen.
+        """
+        with fleet.lock:
+            if self._fleet_epoch == fleet.epoch and len(self._fleet_slots) == len(fleet.imos):
+                return self._fleet_slots
+            legacy = [(imo, v.pop('history')) for imo, v in zip(fleet.imos, fleet.vessels) if 'history' in v]
+            with self.lock:
+                slots = np.fromiter((self._slot(imo) for imo in fleet.imos), dtype=np.int64, count=len(fleet.imos))
+            self._fleet_slots = slots
+            self._fleet_epoch = fleet.epoch
+        for imo, points in legacy:
+            if self.count[self.slots[imo]] == 0:
+                self.import_points(imo, points)
+        return slots
+
+    def record_fleet(self, fleet, ts=None):
+        """Append one breadcrumb for every vessel in the fleet (one vectorized write)"""
+        slots = self.attach_fleet(fleet)
+        if not len(slots):
+            return
+        with fleet.lock:
+            lat = fleet.lat.astype(np.float32)
+            lon = fleet.lon.astype(np.float32)
+        with self.lock:
+            self._append(slots, lat, lon, now_ms() if ts is None else ts)
+
+    def _window(self, slot, limit=None, since_ms=None):
+        n = int(self.count[slot])
+        if limit is not None:
+            n = min(n, int(limit))
+        idx = (self.head[slot] - n + np.arange(n)) % self.capacity
+        if since_ms is not None:
+            idx = idx[self.ts[slot, idx] >= since_ms]
+        return idx
+
+    def get_track(self, imo, limit=None, since_ms=None):
+        """(lat, lon, ts_ms) arrays for a vessel, oldest first; None if unknown"""
+        with self.lock:
+            slot = self.slots.get(imo)
+            if slot is None:
+                return None
+            idx = self._window(slot, limit, since_ms)
+            return self.lat[slot, idx], self.lon[slot, idx], self.ts[slot, idx]
+
+    def get_points(self, imo, limit=None):
+        """Track as the legacy list of {'lat','lon','timestamp'} dicts"""
+        track = self.get_track(imo, limit)
+        if track is None:
+            return []
+        lat, lon, ts = track
+        return [
+            {'lat': round(la, 4), 'lon': round(lo, 4), 'timestamp': datetime.utcfromtimestamp(t / 1000).isoformat()}
+            for la, lo, t in zip(lat.tolist(), lon.tolist(), ts.tolist())
+        ]
+
+    def polylines(self, imos, limit=TRACK_BROADCAST_POINTS):
+        """{imo: encoded polyline} of the last `limit` points of each vessel, encoded in one batch"""
+        with self.lock:
+            slots = np.array([self.slots.get(imo, -1) for imo in imos], dtype=np.int64)
+            known = slots >= 0
+            counts = np.zeros(len(slots), dtype=np.int64)
+            counts[known] = np.minimum(self.count[slots[known]], limit)
+            slot_rep = np.repeat(slots, counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            cols = (self.head[slot_rep] - np.repeat(counts, counts) + offsets) % self.capacity
+            lat = self.lat[slot_rep, cols]
+            lon = self.lon[slot_rep, cols]
+        return dict(zip(imos, encode_polylines(lat, lon, counts)))
+
+    def save(self, path):
+        """Persist the arena (tmp file + atomic rename)"""
+        path = Path(path)
+        with self.lock:
+            n = len(self.imos)
+            tmp = path.with_suffix('.tmp.npz')
+            np.savez(tmp, imos=np.array(self.imos, dtype=str), lat=self.lat[:n], lon=self.lon[:n],
+                     ts=self.ts[:n], head=self.head[:n], count=self.count[:n])
+        os.replace(tmp, path)
+
+    def load(self, path):
+        path = Path(path)
+        if not path.exists():
+            return False
+        try:
+            data = np.load(path)
+            if data['lat'].shape[1] != self.capacity:
+                print(f"Track store retention changed ({data['lat'].shape[1]} -> {self.capacity}); discarding {path.name}")
+                return False
+            with self.lock:
+                self.imos = data['imos'].tolist()
+                self.slots = {imo: i for i, imo in enumerate(self.imos)}
+                self.lat, self.lon, self.ts = data['lat'], data['lon'], data['ts']
+                self.head, self.count = data['head'], data['count']
+                self._grow(max(len(self.imos), 1024))
+                self._fleet_epoch = None
+            print(f"Loaded tracks for {len(self.imos)} vessels from {path.name}")
+            return True
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            return False
+
+track_store = TrackStore()
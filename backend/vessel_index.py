@@ -0,0 +1,163 @@
+"""
+Vessel Listing Index for SeaTrace
+Secondary indexes over the fleet rows (type, flag, risk level, status) for filtered, cursor-paginated vessel listings.
+"""
+import base64
+import binascii
+import bisect
+import threading
+
+import numpy as np
+
+INDEXED_FIELDS = ('type', 'flag', 'risk_level', 'status')
+VESSEL_PAGE_DEFAULT = 100
+VESSEL_PAGE_MAX = 1000
+
+
+def encode_cursor(imo):
+    """Opaque page cursor: the IMO after which the next page starts"""
+    return base64.urlsafe_b64encode(str(imo).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return base64.b64decode(cursor + '=' * (-len(cursor) % 4), altchars=b'-_', validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+
+def _normalize(value):
+    return str(value if value is not None else '').strip().lower()
+
+
+class VesselIndex:
+    """
+    Rows follow fleet_state, so bbox (fleet_grid) and speed (fleet arrays) filters share row ids
+    with the categorical ones. Each indexed field is a code array plus rows bucketed by code
+    (same layout as GridIndex cells), so a filter starts from the postings of its values
+    instead of scanning the fleet. Pages are ordered by IMO; the cursor is the last IMO served.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key = None
+        self.imos = []
+        self.sorted_imos = []
+        self.rank = np.zeros(0, dtype=np.int64)       # Row -> position in IMO order
+        self.search_text = []                         # Row -> 'name imo' (lowercase) for q=
+        self.values = {field: [] for field in INDEXED_FIELDS}     # field -> code -> value (as stored)
+        self.lookup = {field: {} for field in INDEXED_FIELDS}     # field -> normalized value -> code
+        self.codes = {field: np.zeros(0, dtype=np.int32) for field in INDEXED_FIELDS}
+        self._postings = {}                           # field -> (order, starts), rebuilt after changes
+
+    def __len__(self):
+        return len(self.imos)
+
+    def sync(self, fleet_state, revision):
+        """Rebuild from the fleet rows when their layout (epoch) or the vessel records (revision) changed"""
+        key = (fleet_state.epoch, revision)
+        if key == self.key:
+            return False
+        with fleet_state.lock:
+            vessels = list(fleet_state.vessels)
+            imos = list(fleet_state.imos)
+        with self.lock:
+            self.imos = imos
+            self.sorted_imos = sorted(imos)
+            position = {imo: i for i, imo in enumerate(self.sorted_imos)}
+            self.rank = np.fromiter((position[imo] for imo in imos), dtype=np.int64, count=len(imos))
+            self.search_text = [f"{v.get('name') or ''} {imo}".lower() for v, imo in zip(vessels, imos)]
+            for field in INDEXED_FIELDS:
+                self.values[field] = []
+                self.lookup[field] = {}
+                self.codes[field] = np.fromiter(
+                    (self._code(field, v.get(field)) for v in vessels), dtype=np.int32, count=len(vessels)
+                )
+            self._postings = {}
+            self.key = key
+        return True
+
+    def _code(self, field, value):
+        lookup = self.lookup[field]
+        norm = _normalize(value)
+        code = lookup.get(norm)
+        if code is None:
+            code = lookup[norm] = len(self.values[field])
+            self.values[field].append(value)
+        return code
+
+    def set_value(self, field, rows, value, epoch):
+        """Patch one field for some rows in place (e.g. risk flags set by the AIS analytics pass)"""
+        with self.lock:
+            if self.key is None or self.key[0] != epoch or len(rows) == 0:
+                return
+            self.codes[field][rows] = self._code(field, value)
+            self._postings.pop(field, None)
+
+    def postings(self, field, code):
+        """Rows whose field has the given code"""
+        entry = self._postings.get(field)
+        if entry is None:
+            codes = self.codes[field]
+            order = np.argsort(codes, kind='stable')
+            starts = np.zeros(len(self.values[field]) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes, minlength=len(self.values[field])), out=starts[1:])
+            entry = self._postings[field] = (order, starts)
+        order, starts = entry
+        return order[starts[code]:starts[code + 1]]
+
+    def facets(self):
+        """Distinct stored values per indexed field"""
+        with self.lock:
+            return {field: sorted(str(v) for v in self.values[field] if v not in (None, '')) for field in INDEXED_FIELDS}
+
+    def query(self, filters=None, rows=None, speed=None, speed_range=(None, None), text=None, after=None,
+              limit=VESSEL_PAGE_DEFAULT):
+        """
+        filters: {field: [values]} (values OR-ed, fields AND-ed, case-insensitive); rows: candidate
+        rows from a spatial query; speed: fleet speed array for speed_range; text: substring of name/IMO.
+        Returns (page rows in IMO order, total matches, IMO of the last row if more follow).
+        """
+        with self.lock:
+            # Most selective field first: its postings are the starting candidates
+            wanted = {}
+            for field, values in (filters or {}).items():
+                wanted[field] = [self.lookup[field][v] for v in map(_normalize, values) if v in self.lookup[field]]
+            candidates = rows
+            for field in sorted(wanted, key=lambda f: sum(len(self.postings(f, c)) for c in wanted[f])):
+                codes = wanted[field]
+                if candidates is None:
+                    candidates = np.concatenate([self.postings(field, c) for c in codes] or [np.zeros(0, dtype=np.int64)])
+                else:
+                    candidates = candidates[np.isin(self.codes[field][candidates], codes)]
+            if candidates is None:
+                candidates = np.arange(len(self.imos), dtype=np.int64)
+
+            low, high = speed_range
+            if speed is not None and (low is not None or high is not None):
+                s = speed[candidates]
+                keep = np.ones(len(candidates), dtype=bool)
+                if low is not None:
+                    keep &= s >= low
+                if high is not None:
+                    keep &= s <= high
+                candidates = candidates[keep]
+            if text:
+                text = text.lower()
+                candidates = np.array([row for row in candidates.tolist() if text in self.search_text[row]], dtype=np.int64)
+
+            total = len(candidates)
+            ranks = self.rank[candidates]
+            if after is not None:
+                later = ranks >= bisect.bisect_right(self.sorted_imos, str(after))
+                candidates, ranks = candidates[later], ranks[later]
+            more = len(candidates) > limit
+            if more:
+                first = np.argpartition(ranks, limit - 1)[:limit]
+                candidates, ranks = candidates[first], ranks[first]
+            page = candidates[np.argsort(ranks)]
+            last = self.imos[page[-1]] if more and len(page) else None
+            return page, total, last
+
+
+vessel_index = VesselIndex()
@@ -0,0 +1,175 @@
+"""
+Binary Vessel Movement Stream for SeaTrace
+Delta-encodes quantized fleet positions against a per-connection baseline into packed binary frames.
+
+Frame layout (little-endian):
+    header  : magic b'VS', uint8 version, uint8 flags, uint32 tick, uint32 epoch, uint32 count
+    indices : uint32[count]  stable vessel row (see 'vessel_stream_index' for row -> IMO)
+    lat     : int32[count]   keyframe: absolute deg*1e5 (resets those rows), otherwise delta
+    lon     : int32[count]   same as lat
+    course  : uint16[count]  degrees * 100
+    speed   : uint16[count]  knots * 10
+"""
+import struct
+import threading
+import numpy as np
+
+FRAME_MAGIC = b'VS'
+FRAME_VERSION = 1
+FLAG_KEYFRAME = 0x01
+HEADER = struct.Struct('<2sBBIII')
+
+QUANT_SCALE = 100000          # 1e-5 deg (~1.1 m)
+MOVE_THRESHOLD = 10           # Quantized units (~1e-4 deg) a vessel must move to be re-sent
+COURSE_THRESHOLD = 100        # Course change (deg * 100) that forces a re-send
+KEYFRAME_INTERVAL = 30        # Ticks between full keyframes per connection
+CLUSTER_BELOW_ZOOM = 3        # Viewports zoomed out further get clusters instead of vessels
+
+
+class StreamClient:
+    """Per-connection baseline: the last quantized values this client has applied"""
+
+    def __init__(self):
+        self.epoch = None
+        self.lat = None
+        self.lon = None
+        self.course = None
+        self.known = None              # Rows this client holds a baseline for
+        self.last_keyframe_tick = None
+
+        # Optional viewport: (south, west, north, east) and map zoom level
+        self.bbox = None
+        self.zoom = None
+
+    def wants_clusters(self):
+        return self.bbox is not None and self.zoom is not None and self.zoom < CLUSTER_BELOW_ZOOM
+
+
+class VesselStreamHub:
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL, move_threshold=MOVE_THRESHOLD):
+        self.keyframe_interval = keyframe_interval
+        self.move_threshold = move_threshold
+        self.clients = {}
+        self.lock = threading.Lock()
+
+        # Quantized fleet for the current tick, shared by every connection
+        self.tick = 0
+        self.epoch = None
+        self.q_lat = np.zeros(0, dtype=np.int32)
+        self.q_lon = np.zeros(0, dtype=np.int32)
+        self.q_course = np.zeros(0, dtype=np.uint16)
+        self.q_speed = np.zeros(0, dtype=np.uint16)
+
+    def subscribe(self, sid, epoch=None):
+        """
+        Register a connection; subscribing again keeps its viewport and baseline. epoch is the
+        fleet layout whose index the subscriber holds: if it is not the one last sent to this
+        connection (e.g. a freshly created decoder), the index and a keyframe are re-sent.
+        """
+        with self.lock:
+            client = self.clients.setdefault(sid, StreamClient())
+            if client.epoch != epoch:
+                client.epoch = None
+                client.last_keyframe_tick = None
+
+    def unsubscribe(self, sid):
+        with self.lock:
+            self.clients.pop(sid, None)
+
+    def set_viewport(self, sid, bbox, zoom):
+        with self.lock:
+            client = self.clients.get(sid)
+            if client:
+                client.bbox = bbox
+                client.zoom = zoom
+
+    def has_clients(self):
+        return bool(self.clients)
+
+    def request_keyframe(self, sid):
+        """Force the next frame for this client to be a keyframe (e.g. after a reconnect)"""
+        with self.lock:
+            client = self.clients.get(sid)
+            if client:
+                client.last_keyframe_tick = None
+
+    def update(self, fleet, tick):
+        """Quantize the fleet once per tick"""
+        with fleet.lock:
+            self.q_lat = np.rint(fleet.lat * QUANT_SCALE).astype(np.int32)
+            self.q_lon = np.rint(fleet.lon * QUANT_SCALE).astype(np.int32)
+            self.q_course = np.rint(fleet.course * 100).astype(np.uint16)
+            self.q_speed = np.rint(np.clip(fleet.speed, 0, 6553) * 10).astype(np.uint16)
+            self.epoch = fleet.epoch
+        self.tick = tick
+
+    def _pack(self, flags, rows, lat, lon):
+        header = HEADER.pack(FRAME_MAGIC, FRAME_VERSION, flags, self.tick & 0xFFFFFFFF,
+                             self.epoch & 0xFFFFFFFF, len(rows))
+        return b''.join((
+            header,
+            rows.astype('<u4').tobytes(),
+            lat.astype('<i4').tobytes(),
+            lon.astype('<i4').tobytes(),
+            self.q_course[rows].astype('<u2').tobytes(),
+            self.q_speed[rows].astype('<u2').tobytes(),
+        ))
+
+    def frames_for(self, sid, rows=None):
+        """
+        Build the next frames for a client.
+        rows: optional array of fleet rows this client should see (all rows if None).
+        Returns (frames, needs_index); needs_index means the row -> IMO index must be (re)sent first.
+        Rows the client has no baseline for yet (e.g. just scrolled into view) go out in an
+        absolute frame flagged as a keyframe, which only resets the baseline of those rows.
+        """
+        with self.lock:
+            client = self.clients.get(sid)
+        if client is None or self.epoch is None:
+            return [], False
+
+        n = len(self.q_lat)
+        if rows is None:
+            rows = np.arange(n, dtype=np.uint32)
+        needs_index = client.epoch != self.epoch
+
+        keyframe = (
+            needs_index
+            or client.last_keyframe_tick is None
+            or self.tick - client.last_keyframe_tick >= self.keyframe_interval
+        )
+
+        if keyframe:
+            client.epoch = self.epoch
+            client.lat = self.q_lat.copy()
+            client.lon = self.q_lon.copy()
+            client.course = self.q_course.copy()
+            client.known = np.zeros(n, dtype=bool)
+            client.known[rows] = True
+            client.last_keyframe_tick = self.tick
+            return [self._pack(FLAG_KEYFRAME, rows, self.q_lat[rows], self.q_lon[rows])], needs_index
+
+        frames = []
+        is_new = ~client.known[rows]
+        if is_new.any():
+            fresh = rows[is_new]
+            client.lat[fresh] = self.q_lat[fresh]
+            client.lon[fresh] = self.q_lon[fresh]
+            client.course[fresh] = self.q_course[fresh]
+            client.known[fresh] = True
+            frames.append(self._pack(FLAG_KEYFRAME, fresh, self.q_lat[fresh], self.q_lon[fresh]))
+            rows = rows[~is_new]
+
+        d_lat = self.q_lat[rows] - client.lat[rows]
+        d_lon = self.q_lon[rows] - client.lon[rows]
+        d_course = np.abs(self.q_course[rows].astype(np.int32) - client.course[rows])
+        moved = (np.abs(d_lat) + np.abs(d_lon) >= self.move_threshold) | (d_course >= COURSE_THRESHOLD)
+        if moved.any():
+            sent = rows[moved]
+            client.lat[sent] = self.q_lat[sent]
+            client.lon[sent] = self.q_lon[sent]
+            client.course[sent] = self.q_course[sent]
+            frames.append(self._pack(0, sent, d_lat[moved], d_lon[moved]))
+        return frames, False
+
+vessel_stream = VesselStreamHub()
@@ -434,12 +434,15 @@ function App() {
       transports: ['websocket', 'polling']
     });
 
+    // Last real-time analysis revision applied; sent on reconnect so only the changes come back
+    let analysisRevision = null;
+
     newSocket.on('connect', () => {
       setConnectionStatus('connected');
       newSocket.emit('subscribe_vessels');
       newSocket.emit('subscribe_alerts');
       newSocket.emit('subscribe_spills');
-      newSocket.emit('subscribe_realtime_analysis');
+      newSocket.emit('subscribe_realtime_analysis', analysisRevision === null ? {} : { revision: analysisRevision });
     });
 
     newSocket.on('disconnect', () => {
@@ -457,17 +460,46 @@ function App() {
       });
     });
 
+    const ackAnalysis = (revision) => {
+      if (revision === undefined) return;
+      analysisRevision = revision;
+      newSocket.emit('realtime_analysis_ack', { revision });
+    };
+
+    // Upsert changed records by key and drop removed ones
+    const applyChanges = (prev, changed, removed, key) => {
+      const byKey = new Map(prev.map(item => [item[key], item]));
+      (removed || []).forEach(k => byKey.delete(k));
+      (changed || []).forEach(item => byKey.set(item[key], { ...byKey.get(item[key]), ...item }));
+      return Array.from(byKey.values());
+    };
+
     newSocket.on('realtime_analysis_update', (data) => {
-      // Update vessels and oil spills from real-time analysis
+      // Full snapshot of vessels and oil spills from real-time analysis
       if (data.vessels) {
         setVessels(data.vessels);
       }
       if (data.oil_spills) {
         setOilSpills(data.oil_spills);
       }
+      ackAnalysis(data.revision);
+    });
+
+    newSocket.on('realtime_analysis_delta', (data) => {
+      // A delta from a revision we never applied leaves a gap: resubscribe for a full snapshot
+      if (analysisRevision === null || data.base_revision > analysisRevision) {
+        analysisRevision = null;
+        newSocket.emit('subscribe_realtime_analysis', {});
+        return;
+      }
+      if (data.revision <= analysisRevision) return;
+      setVessels(prev => applyChanges(prev, data.vessels, data.removed_vessels, 'imo'));
+      setOilSpills(prev => applyChanges(prev, data.oil_spills, data.removed_oil_spills, 'spill_id'));
+      ackAnalysis(data.revision);
     });
 
     setSocket(newSocket);
+    window.socket = newSocket; // Shared with LiveMap's movement stream listeners
     return newSocket;
   };
 
@@ -1301,7 +1333,7 @@ function App() {
                       )}
                   </div>
                 ) : (
-                  <VesselsPage vessels={vessels} onVesselSelect={setSelectedVessel} onAddClick={() => setIsAddVesselModalOpen(true)} />
+                  <VesselsPage token={token} vessels={vessels} onVesselSelect={setSelectedVessel} onAddClick={() => setIsAddVesselModalOpen(true)} />
                 )
               )
             }
@@ -1,11 +1,13 @@
 import React, { useState, useEffect } from 'react';
+import axios from 'axios';
+import { API_BASE_URL } from '../config';
 import {
     LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer,
     BarChart, Bar
 } from 'recharts';
 import { Loader2, Ship, Waves, Cpu, ShieldCheck, Zap, Activity } from 'lucide-react';
 
-const AnalyticsPanel = () => {
+const AnalyticsPanel = ({ token }) => {
     const [anomalies, setAnomalies] = useState([]);
     const [loading, setLoading] = useState(true);
     // const [satelliteData, setSatelliteData] = useState(null); // Unused
@@ -88,16 +90,25 @@ const AnalyticsPanel = () => {
 
     const fetchAnomalies = async () => {
         try {
-            const token = localStorage.getItem('token');
+            // Only the flagged vessels, and only the fields the feed needs
+            const response = await axios.get(`${API_BASE_URL}/vessels`, {
+                headers: { 'Authorization': `Bearer ${token || localStorage.getItem('token')}` },
+                params: { risk_level: 'High', fields: 'imo,name,risk_details', limit: 50 }
+            });
+            setAnomalies(response.data.vessels.map(v => ({
+                type: 'AIS Anomaly',
+                details: v.risk_details || `${v.name} flagged as high risk`,
+                vessel_imo: v.imo
+            })));
+            setLoading(false);
+        } catch (err) {
+            console.error(err);
             // Mock data fallback if API fails
             setAnomalies([
                 { type: 'Course Violation', details: 'Vessel deviated from shipping lane', vessel_imo: '9123456' },
                 { type: 'Speed Alert', details: 'Excessive speed in coastal zone', vessel_imo: '8899776' }
             ]);
             setLoading(false);
-        } catch (err) {
-            console.error(err);
-            setLoading(false);
         }
     };
 
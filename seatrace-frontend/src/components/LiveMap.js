@@ -1,8 +1,10 @@
 import React from 'react';
-import { MapContainer, TileLayer, Marker, Popup, Circle, LayersControl, GeoJSON, Polyline } from 'react-leaflet';
+import { MapContainer, TileLayer, Marker, Popup, Circle, CircleMarker, LayersControl, GeoJSON, Polyline, useMapEvents } from 'react-leaflet';
 import L from 'leaflet';
 import { Activity } from 'lucide-react';
 import 'leaflet/dist/leaflet.css';
+import { createVesselStreamDecoder } from './services/vesselStream';
+import { decodePolyline } from './services/polyline';
 
 // Fix leaflet icon issue (if not already handled globally, but good to ensure)
 delete L.Icon.Default.prototype._getIconUrl;
@@ -12,6 +14,36 @@ L.Icon.Default.mergeOptions({
     shadowUrl: require('leaflet/dist/images/marker-shadow.png'),
 });
 
+// Reports the visible map bounds so the backend only streams vessels in view
+const CLUSTER_BELOW_ZOOM = 3; // Keep in sync with backend/vessel_stream.py
+
+const ViewportReporter = ({ onZoomChange }) => {
+    const report = (map) => {
+        onZoomChange(map.getZoom());
+        if (!window.socket) return;
+        const bounds = map.getBounds();
+        window.socket.emit('subscribe_viewport', {
+            south: bounds.getSouth(),
+            west: bounds.getWest(),
+            north: bounds.getNorth(),
+            east: bounds.getEast(),
+            zoom: map.getZoom()
+        });
+    };
+    const map = useMapEvents({
+        moveend: () => report(map),
+        zoomend: () => report(map)
+    });
+    React.useEffect(() => {
+        report(map);
+        if (!window.socket) return;
+        const onConnect = () => report(map);
+        window.socket.on('connect', onConnect); // New sid after reconnect has no viewport yet
+        return () => window.socket.off('connect', onConnect);
+    }, [map]);
+    return null;
+};
+
 const LiveMap = (props) => {
     const {
         vessels,
@@ -65,6 +97,9 @@ const LiveMap = (props) => {
         }
     }, [vessels]);
 
+    const [vesselClusters, setVesselClusters] = React.useState([]);
+    const [mapZoom, setMapZoom] = React.useState(3);
+
     const toggleLayer = (layer) => {
         setVisibleLayers(prev => ({ ...prev, [layer]: !prev[layer] }));
     };
@@ -73,8 +108,7 @@ const LiveMap = (props) => {
     React.useEffect(() => {
         if (!window.socket) return;
 
-        // Listen for Optimized BATCH updates from backend
-        window.socket.on('vessel_movement_batch', (batchData) => {
+        const applyUpdates = (batchData) => {
             setLiveVessels(prevVessels => {
                 // Create a map for faster lookup if list is large
                 const vesselMap = new Map(prevVessels.map(v => [v.imo, v]));
@@ -95,9 +129,30 @@ const LiveMap = (props) => {
 
                 return Array.from(vesselMap.values());
             });
+        };
+
+        // Compact binary delta stream (preferred)
+        const decoder = createVesselStreamDecoder();
+        window.socket.on('vessel_stream_index', (payload) => decoder.applyIndex(payload));
+        window.socket.on('vessel_stream', (frame) => {
+            const updates = decoder.decode(frame);
+            if (updates.length) applyUpdates(updates);
         });
+        const subscribeStream = () => window.socket.emit('subscribe_vessel_stream', { epoch: decoder.getEpoch() });
+        window.socket.on('connect', subscribeStream); // Re-subscribe after reconnects (new sid)
+        subscribeStream();
+
+        // Server-side clusters replace individual vessels when zoomed far out
+        window.socket.on('vessel_clusters', (payload) => setVesselClusters(payload.clusters || []));
+
+        // Legacy JSON BATCH updates from backend
+        window.socket.on('vessel_movement_batch', applyUpdates);
 
         return () => {
+            window.socket.off('connect', subscribeStream);
+            window.socket.off('vessel_stream_index');
+            window.socket.off('vessel_stream');
+            window.socket.off('vessel_clusters');
             window.socket.off('vessel_movement_batch');
         };
     }, []);
@@ -218,6 +273,20 @@ const LiveMap = (props) => {
                         </LayersControl.BaseLayer>
                     </LayersControl>
 
+                    <ViewportReporter onZoomChange={setMapZoom} />
+
+                    {/* Server-side vessel clusters (zoomed far out) */}
+                    {mapZoom < CLUSTER_BELOW_ZOOM && vesselClusters.map(([lat, lon, count], index) => (
+                        <CircleMarker
+                            key={`cluster-${index}`}
+                            center={[lat, lon]}
+                            radius={Math.min(6 + Math.log2(count) * 2, 24)}
+                            pathOptions={{ color: '#06b6d4', fillColor: '#06b6d4', fillOpacity: 0.35, weight: 1 }}
+                        >
+                            <Popup>{count} vessels</Popup>
+                        </CircleMarker>
+                    ))}
+
                     {/* GeoJSON Boundaries */}
                     {Object.values(countryBoundaries).map((country, index) => (
                         <GeoJSON key={index} data={country} style={{ color: '#00f3ff', weight: 0.5, fillColor: '#00f3ff', fillOpacity: 0.02, dashArray: '5, 5' }} />
@@ -225,6 +294,7 @@ const LiveMap = (props) => {
 
                     {/* High Density Vessel Rendering */}
                     {liveVessels.filter(v => {
+                        if (mapZoom < CLUSTER_BELOW_ZOOM) return false;
                         if (v.type.includes('Tanker') && !visibleLayers.tanker) return false;
                         if ((v.type.includes('Container') || v.type.includes('Cargo')) && !visibleLayers.cargo) return false;
                         if ((v.type.includes('Navy') || v.type.includes('Military')) && !visibleLayers.navy) return false;
@@ -244,8 +314,8 @@ const LiveMap = (props) => {
                             iconAnchor: [4, 4]
                         });
 
-                        // Priority Trails: Use pre-calculated history if available (from seed), else realtime movement
-                        let trailData = vessel.history || [];
+                        // Priority Trails: Use the server track (encoded polyline) if available, else realtime movement
+                        let trailData = vessel.history || decodePolyline(vessel.track);
                         if (vesselMovementData && vesselMovementData[vessel.imo]) {
                             trailData = vesselMovementData[vessel.imo]; // Prefer live movement if active simulation running
                         }
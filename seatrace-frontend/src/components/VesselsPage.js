@@ -1,21 +1,78 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
+import axios from 'axios';
+import { API_BASE_URL } from '../config';
 import { Search, Filter, Ship, Anchor, Navigation, Package, Flag, Activity, Plus } from 'lucide-react';
 
-const VesselsPage = ({ vessels, onVesselSelect, onAddClick }) => {
+// Only the fields the cards show; pages are filtered and paginated server-side
+const PAGE_SIZE = 60;
+const CARD_FIELDS = 'imo,name,type,flag,status,speed,cargo_manifest';
+
+const VesselsPage = ({ token, vessels, onVesselSelect, onAddClick }) => {
     const [searchTerm, setSearchTerm] = useState('');
     const [filterType, setFilterType] = useState('All');
+    const [pageVessels, setPageVessels] = useState(null); // null: listing API unavailable, filter locally
+    const [nextCursor, setNextCursor] = useState(null);
+    const [matchCount, setMatchCount] = useState(0);
+    const [fleetSize, setFleetSize] = useState(0);
+    const [serverTypes, setServerTypes] = useState([]);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     // Convert object to array if needed
     const vesselsList = Array.isArray(vessels) ? vessels : Object.values(vessels || {});
 
-    const filteredVessels = vesselsList.filter(vessel => {
+    const fetchPage = useCallback(async (cursor) => {
+        const params = { limit: PAGE_SIZE, fields: CARD_FIELDS };
+        if (filterType !== 'All') params.type = filterType;
+        if (searchTerm) params.q = searchTerm;
+        if (cursor) params.cursor = cursor;
+        try {
+            const response = await axios.get(`${API_BASE_URL}/vessels`, {
+                headers: { 'Authorization': `Bearer ${token || localStorage.getItem('token')}` },
+                params
+            });
+            const data = response.data;
+            setPageVessels(prev => (cursor && prev ? [...prev, ...data.vessels] : data.vessels));
+            setNextCursor(data.next_cursor);
+            setMatchCount(data.total);
+            if (data.facets) {
+                setServerTypes(data.facets.type);
+                setFleetSize(data.fleet_size);
+            }
+        } catch (error) {
+            console.error('Error fetching vessel page - filtering loaded vessels instead:', error);
+            setPageVessels(null);
+        }
+    }, [token, filterType, searchTerm]);
+
+    // First page again whenever the filters change (debounced while typing)
+    useEffect(() => {
+        const timer = setTimeout(() => fetchPage(null), 250);
+        return () => clearTimeout(timer);
+    }, [fetchPage]);
+
+    const loadMore = async () => {
+        setLoadingMore(true);
+        await fetchPage(nextCursor);
+        setLoadingMore(false);
+    };
+
+    const localMatches = vesselsList.filter(vessel => {
         const matchesSearch = vessel.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
             vessel.imo.toString().includes(searchTerm);
         const matchesType = filterType === 'All' || vessel.type === filterType;
         return matchesSearch && matchesType;
     });
 
-    const uniqueTypes = ['All', ...new Set(vesselsList.map(v => v.type))];
+    const filteredVessels = pageVessels || localMatches;
+    const shownMatches = pageVessels ? matchCount : localMatches.length;
+    const shownFleet = pageVessels ? fleetSize : vesselsList.length;
+    const uniqueTypes = ['All', ...(pageVessels ? serverTypes : new Set(vesselsList.map(v => v.type)))];
+
+    // Cards only carry the listed fields; hand the full record to the details view when loaded
+    const selectVessel = (vessel) => {
+        if (typeof onVesselSelect !== 'function') return;
+        onVesselSelect(vesselsList.find(v => v.imo === vessel.imo) || vessel);
+    };
 
     // Image set for vessels
     const vehicleImages = [
@@ -68,7 +125,7 @@ const VesselsPage = ({ vessels, onVesselSelect, onAddClick }) => {
                     </div>
                 </div>
                 <div className="text-cyan-400 font-mono text-sm">
-                    FLEET COUNT: <span className="text-white font-bold text-lg">{filteredVessels.length}</span> / {vesselsList.length}
+                    FLEET COUNT: <span className="text-white font-bold text-lg">{shownMatches}</span> / {shownFleet}
                 </div>
             </div>
 
@@ -77,7 +134,7 @@ const VesselsPage = ({ vessels, onVesselSelect, onAddClick }) => {
                 {filteredVessels.map((vessel, index) => (
                     <div
                         key={vessel.imo || index}
-                        onClick={() => typeof onVesselSelect === 'function' && onVesselSelect(vessel)}
+                        onClick={() => selectVessel(vessel)}
                         className="bg-slate-800/60 backdrop-blur-md rounded-xl overflow-hidden border border-slate-700/50 hover:border-cyan-500 hover:shadow-[0_0_20px_rgba(0,243,255,0.2)] group relative cursor-pointer transform hover:-translate-y-1 transition-all duration-300"
                         style={{ animationDelay: `${index * 50}ms` }}
                     >
@@ -132,6 +189,18 @@ const VesselsPage = ({ vessels, onVesselSelect, onAddClick }) => {
                 ))}
             </div>
 
+            {pageVessels && nextCursor && (
+                <div className="flex justify-center pb-20 md:pb-0">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="bg-slate-800 hover:bg-slate-700 border border-cyan-500/30 text-cyan-400 px-6 py-2 rounded-lg text-sm font-mono disabled:opacity-50"
+                    >
+                        {loadingMore ? 'LOADING...' : `LOAD MORE (${filteredVessels.length} / ${shownMatches})`}
+                    </button>
+                </div>
+            )}
+
             {filteredVessels.length === 0 && (
                 <div className="text-center py-20 text-slate-500">
                     <Ship className="w-16 h-16 mx-auto mb-4 opacity-20" />
@@ -0,0 +1,36 @@
+// SeaTrace Encoded Polyline Decoder
+// Vessel tracks arrive as Google encoded polylines (see backend/track_store.py)
+
+/**
+ * Decode an encoded polyline into [{lat, lon}] points.
+ * @param {string} encoded - Polyline string
+ * @param {number} precision - Decimal places used when encoding (default 5)
+ */
+export const decodePolyline = (encoded, precision = 5) => {
+    const points = [];
+    if (!encoded) return points;
+
+    const factor = Math.pow(10, precision);
+    let index = 0;
+    let lat = 0;
+    let lon = 0;
+
+    const nextValue = () => {
+        let result = 0;
+        let shift = 0;
+        let byte;
+        do {
+            byte = encoded.charCodeAt(index++) - 63;
+            result |= (byte & 0x1f) << shift;
+            shift += 5;
+        } while (byte >= 0x20);
+        return (result & 1) ? ~(result >> 1) : (result >> 1);
+    };
+
+    while (index < encoded.length) {
+        lat += nextValue();
+        lon += nextValue();
+        points.push({ lat: lat / factor, lon: lon / factor });
+    }
+    return points;
+};
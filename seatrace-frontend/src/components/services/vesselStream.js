@@ -0,0 +1,69 @@
+// SeaTrace Binary Vessel Stream Decoder
+// Mirrors backend/vessel_stream.py: header + uint32 rows + int32 lat/lon + uint16 course/speed
+
+const HEADER_BYTES = 16;
+const FLAG_KEYFRAME = 0x01;
+const QUANT_SCALE = 100000;
+
+/**
+ * Creates a decoder holding this connection's baseline (last quantized lat/lon per row).
+ * Call applyIndex() with 'vessel_stream_index' payloads and decode() with 'vessel_stream' frames.
+ */
+export const createVesselStreamDecoder = () => {
+    let epoch = null;
+    let imos = [];
+    let baseLat = new Int32Array(0);
+    let baseLon = new Int32Array(0);
+
+    const applyIndex = (payload) => {
+        epoch = payload.epoch;
+        imos = payload.imos || [];
+        baseLat = new Int32Array(imos.length);
+        baseLon = new Int32Array(imos.length);
+    };
+
+    /**
+     * Decode one frame into [{imo, lat, lon, course, speed}] updates.
+     * @param {ArrayBuffer|Uint8Array} data - Binary frame from the server
+     */
+    const decode = (data) => {
+        const buffer = data instanceof ArrayBuffer ? data : data.buffer.slice(data.byteOffset, data.byteOffset + data.byteLength);
+        const view = new DataView(buffer);
+        if (view.byteLength < HEADER_BYTES || view.getUint8(0) !== 0x56 || view.getUint8(1) !== 0x53) return [];
+
+        const flags = view.getUint8(3);
+        const frameEpoch = view.getUint32(8, true);
+        const count = view.getUint32(12, true);
+        if (frameEpoch !== epoch) return []; // Index not received yet for this fleet layout
+
+        const keyframe = (flags & FLAG_KEYFRAME) !== 0;
+        let offset = HEADER_BYTES;
+        const rowsAt = offset; offset += count * 4;
+        const latAt = offset; offset += count * 4;
+        const lonAt = offset; offset += count * 4;
+        const courseAt = offset; offset += count * 2;
+        const speedAt = offset;
+
+        const updates = new Array(count);
+        for (let i = 0; i < count; i++) {
+            const row = view.getUint32(rowsAt + i * 4, true);
+            const qLat = view.getInt32(latAt + i * 4, true);
+            const qLon = view.getInt32(lonAt + i * 4, true);
+            baseLat[row] = keyframe ? qLat : baseLat[row] + qLat;
+            baseLon[row] = keyframe ? qLon : baseLon[row] + qLon;
+            updates[i] = {
+                imo: imos[row],
+                lat: baseLat[row] / QUANT_SCALE,
+                lon: baseLon[row] / QUANT_SCALE,
+                course: view.getUint16(courseAt + i * 2, true) / 100,
+                speed: view.getUint16(speedAt + i * 2, true) / 10
+            };
+        }
+        return updates;
+    };
+
+    // Fleet layout of the index held (sent back on subscribe so an existing baseline is kept)
+    const getEpoch = () => epoch;
+
+    return { applyIndex, decode, getEpoch };
+};